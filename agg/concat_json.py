@@ -1,40 +1,147 @@
 import os
 import json
+import hashlib
+import argparse
 
-def dedupe_list_of_dicts(items):
-    seen = set()
-    deduped = []
-    for item in items:
-        key = json.dumps(item, sort_keys=True)
-        if key not in seen:
-            seen.add(key)
-            deduped.append(item)
-    return deduped
-
-def load_and_concat_jsons(dir_path):
-    data = []
-    for filename in os.listdir(dir_path):
-        if filename.endswith(".json"):
-            full_path = os.path.join(dir_path, filename)
+from shared import canonical_url
+
+JSON_WHITESPACE = " \t\n\r"
+
+
+def iter_json_items(f, chunk_size=1 << 16):
+    """
+    Yield the elements of a top-level JSON array without loading the whole file
+
+    A document whose top level is not an array is yielded as a single item.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    while not buf:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        buf = chunk.lstrip(JSON_WHITESPACE)
+    if not buf.startswith("["):
+        yield json.loads(buf + f.read())
+        return
+
+    pos = 1
+    while True:
+        # Skip to the next value (or the closing bracket)
+        while True:
+            while pos < len(buf) and buf[pos] in JSON_WHITESPACE:
+                pos += 1
+            if pos < len(buf):
+                break
+            buf, pos = f.read(chunk_size), 0
+            if not buf:
+                raise ValueError("Unterminated JSON array")
+        if buf[pos] == "]":
+            return
+
+        # Decode one value; it only counts once the ',' or ']' after it is buffered,
+        # otherwise a number split across chunks would be cut short
+        while True:
             try:
-                with open(full_path, "r", encoding="utf-8") as f:
-                    content = json.load(f)
-                    if isinstance(content, list):
-                        deduped = dedupe_list_of_dicts(content)
-                        data.extend(deduped)
-                    else:
-                        data.append(content)
-            except Exception as e:
-                print(f"⚠️ Skipping {filename}: {e}")
-    return data
+                item, end = decoder.raw_decode(buf, pos)
+                delim = end
+                while delim < len(buf) and buf[delim] in JSON_WHITESPACE:
+                    delim += 1
+                if delim < len(buf) and buf[delim] in ",]":
+                    break
+            except json.JSONDecodeError:
+                pass
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError("Truncated or malformed JSON array")
+            buf, pos = buf[pos:] + chunk, 0
 
-if __name__ == "__main__":
-    dir_path = "./"
-    all_data = load_and_concat_jsons(dir_path)
+        yield item
+        if buf[delim] == "]":
+            return
+        pos = delim + 1
 
-    with open("agg.json", "w", encoding="utf-8") as f:
-        json.dump(all_data, f, indent=2)
+def iter_ndjson_items(f):
+    """Yield one item per non-blank line of a newline-delimited JSON file"""
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
 
-    print(f"✅ Saved {len(all_data)} unique items to agg.json")
+def fingerprint(url):
+    """64-bit hash of a URL's canonical form"""
+    return int.from_bytes(hashlib.blake2b(canonical_url(url).encode("utf-8"), digest_size=8).digest(), "big")
+
+def iter_concat_jsons(dir_path, exclude=()):
+    """
+    Stream the unique URLs of every *_urls.json and *_urls.ndjson file in dir_path
+
+    Other JSON files in a collector directory (the run manifest, metrics,
+    the feed cache) are not URL lists and are ignored, as is any item that
+    is not a string. URLs are de-duplicated across all files by fingerprint,
+    so memory grows with the number of unique URLs rather than with the size
+    of the input.
+    """
+    exclude = {os.path.abspath(path) for path in exclude}
+    seen = set()
+    for filename in sorted(os.listdir(dir_path)):
+        full_path = os.path.join(dir_path, filename)
+        if os.path.abspath(full_path) in exclude:
+            continue
+        if filename.endswith("_urls.json"):
+            reader = iter_json_items
+        elif filename.endswith("_urls.ndjson"):
+            reader = iter_ndjson_items
+        else:
+            continue
+        try:
+            with open(full_path, "r", encoding="utf-8") as f:
+                skipped = 0
+                for item in reader(f):
+                    if not isinstance(item, str):
+                        skipped += 1
+                        continue
+                    key = fingerprint(item)
+                    if key not in seen:
+                        seen.add(key)
+                        yield item
+                if skipped:
+                    print(f"⚠️ Skipped {skipped} non-URL items in {filename}")
+        except Exception as e:
+            print(f"⚠️ Skipping rest of {filename}: {e}")
+
+def write_json_array(items, f):
+    """Write items as a compact JSON array, one element at a time; returns the count"""
+    count = 0
+    f.write("[")
+    for item in items:
+        if count:
+            f.write(",")
+        f.write(json.dumps(item))
+        count += 1
+    f.write("]")
+    return count
+
+def write_ndjson(items, f):
+    """Write items as newline-delimited JSON; returns the count"""
+    count = 0
+    for item in items:
+        f.write(json.dumps(item) + "\n")
+        count += 1
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Concatenate and de-duplicate JSON URL files.')
+    parser.add_argument('dir_path', nargs='?', default="./",
+                        help='Directory holding the *_urls.json / *_urls.ndjson files')
+    parser.add_argument('--output', help='Output file (default: agg.json or agg.ndjson)')
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                        help='Compact JSON array or newline-delimited JSON (default: json)')
+    args = parser.parse_args()
 
+    output = args.output or f"agg.{args.format}"
+    writer = write_ndjson if args.format == 'ndjson' else write_json_array
+    with open(output, "w", encoding="utf-8") as f:
+        count = writer(iter_concat_jsons(args.dir_path, exclude=[output]), f)
 
+    print(f"✅ Saved {count} unique items to {output}")
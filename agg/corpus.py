@@ -0,0 +1,162 @@
+"""
+Corpus
+Lazy, chunked query API over the per-source stories databases written by
+create_db.py.
+
+    from corpus import Corpus
+
+    nyt = Corpus.open("../nyt.db").filter(since="2024-01-01", until="2024-12-31")
+    for batch in nyt.iter_batches(1000):
+        for row in batch:
+            print(row["url"], row["title"])
+
+Filters are pushed into SQL, rows are streamed from a cursor one batch at a
+time, and the `text` column is only read when asked for with
+`.columns(...)` or `.with_text()`, so iterating the whole corpus runs in
+constant memory.
+"""
+
+import os
+import sqlite3
+from urllib.parse import quote
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# newspaper stores a missing publish date as the string 'None' (or '')
+DATED = "[publish_date] NOT IN ('None', '')"
+
+STORY_COLUMNS = ("url", "source", "publish_date", "title", "authors", "text", "extraction_date", "domain")
+DEFAULT_COLUMNS = tuple(column for column in STORY_COLUMNS if column != "text")
+
+
+def stories_tables(conn):
+    """Names of the *_stories tables in an open database"""
+    return [name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%\\_stories' ESCAPE '\\' ORDER BY name")]
+
+
+class Corpus:
+    def __init__(self, paths, columns=DEFAULT_COLUMNS, filters=(), limit=None):
+        """Use Corpus.open(); filter(), columns() and limit() return new Corpus objects"""
+        self.paths = tuple(paths)
+        self._columns = tuple(columns)
+        self._filters = tuple(filters)
+        self._limit = limit
+
+    @classmethod
+    def open(cls, *paths):
+        """
+        Open one or more stories databases
+
+        Args:
+            paths: SQLite files written by create_db.py (e.g., "../cnn.db")
+        """
+        if not paths:
+            raise ValueError("Corpus.open() needs at least one database path")
+        return cls(paths)
+
+    def _replace(self, **changes):
+        state = {"columns": self._columns, "filters": self._filters, "limit": self._limit}
+        state.update(changes)
+        return Corpus(self.paths, **state)
+
+    def filter(self, source=None, domain=None, since=None, until=None, url_like=None):
+        """
+        Narrow the corpus; all conditions are combined with AND and run in SQL
+
+        Args:
+            source: Value of the source column (e.g., "CNN")
+            domain: Exact domain (e.g., "www.cnn.com")
+            since, until: Inclusive publish dates (YYYY-MM-DD); undated rows
+                never match either bound
+            url_like: SQL LIKE pattern on the url (e.g., "%/politics/%")
+        """
+        filters = list(self._filters)
+        for clause, value in (("[source] = ?", source), ("[domain] = ?", domain),
+                              (f"substr([publish_date], 1, 10) >= substr(?, 1, 10) AND {DATED}", since),
+                              (f"substr([publish_date], 1, 10) <= substr(?, 1, 10) AND {DATED}", until),
+                              ("[url] LIKE ?", url_like)):
+            if value is not None:
+                filters.append((clause, value))
+        return self._replace(filters=tuple(filters))
+
+    def columns(self, *columns):
+        """Select the columns to return (any of STORY_COLUMNS)"""
+        unknown = [column for column in columns if column not in STORY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+        return self._replace(columns=columns)
+
+    def with_text(self):
+        """Also return the article text"""
+        if "text" in self._columns:
+            return self
+        return self._replace(columns=self._columns + ("text",))
+
+    def limit(self, n):
+        """Stop after n rows in total"""
+        return self._replace(limit=n)
+
+    def _query(self, table_name, select):
+        sql = f"SELECT {select} FROM [{table_name}]"
+        if self._filters:
+            sql += " WHERE " + " AND ".join(clause for clause, _ in self._filters)
+        return sql, [value for _, value in self._filters]
+
+    def _cursors(self, select):
+        """Yield a cursor over every stories table of every database, one at a time"""
+        for path in self.paths:
+            conn = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+            try:
+                for table_name in stories_tables(conn):
+                    sql, params = self._query(table_name, select)
+                    yield conn.execute(sql, params)
+            finally:
+                conn.close()
+
+    def iter_tuples(self, n=1000):
+        """Yield lists of up to n row tuples, in self._columns order"""
+        select = ", ".join(f"[{column}]" for column in self._columns)
+        remaining = self._limit
+        for cursor in self._cursors(select):
+            while remaining is None or remaining > 0:
+                rows = cursor.fetchmany(n if remaining is None else min(n, remaining))
+                if not rows:
+                    break
+                if remaining is not None:
+                    remaining -= len(rows)
+                yield rows
+            if remaining == 0:
+                return
+
+    def iter_batches(self, n=1000, arrow=False):
+        """
+        Yield the matching rows in batches of up to n
+
+        Args:
+            n: Rows per batch
+            arrow: Yield pyarrow.RecordBatch objects instead of lists of dicts
+        """
+        if arrow and pa is None:
+            raise ImportError("arrow=True requires pyarrow (pip install pyarrow)")
+        schema = pa.schema([(column, pa.string()) for column in self._columns]) if arrow else None
+        for rows in self.iter_tuples(n):
+            if arrow:
+                yield pa.RecordBatch.from_arrays(
+                    [pa.array(values, pa.string()) for values in zip(*rows)], schema=schema)
+            else:
+                yield [dict(zip(self._columns, row)) for row in rows]
+
+    def __iter__(self):
+        for batch in self.iter_batches():
+            yield from batch
+
+    def count(self):
+        """Number of matching rows, counted in SQL"""
+        total = 0
+        for cursor in self._cursors("count(*)"):
+            total += cursor.fetchone()[0]
+        return total if self._limit is None else min(total, self._limit)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Corpus DB
+A single SQLite database holding the articles of every source, with an FTS5
+full-text index over title and text.
+
+Articles are keyed by URL and indexed by source, domain and publish_date;
+authors are normalized into their own table. The FTS index is an external
+content table kept in sync by triggers, so it is maintained incrementally as
+rows are added (create_db.py adds every batch it writes).
+
+    python corpus_db.py import ../cbs.db --source CBS
+    python corpus_db.py search "supreme court" --source NYT --since 2024-01-01
+"""
+
+import json
+import sqlite3
+import argparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    domain TEXT,
+    publish_date TEXT,
+    title TEXT,
+    text TEXT,
+    extraction_date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source, publish_date);
+CREATE INDEX IF NOT EXISTS idx_articles_domain ON articles (domain);
+CREATE INDEX IF NOT EXISTS idx_articles_publish_date ON articles (publish_date);
+
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS article_authors (
+    article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE,
+    author_id INTEGER NOT NULL REFERENCES authors (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (article_id, author_id)
+);
+CREATE INDEX IF NOT EXISTS idx_article_authors_author ON article_authors (author_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 (
+    title, text, content='articles', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, text ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+    INSERT INTO articles_fts (rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+"""
+
+UPSERT_ARTICLE = """
+INSERT INTO articles (url, source, domain, publish_date, title, text, extraction_date)
+VALUES (:url, :source, :domain, :publish_date, :title, :text, :extraction_date)
+ON CONFLICT (url) DO UPDATE SET
+    source = excluded.source, domain = excluded.domain, publish_date = excluded.publish_date,
+    title = excluded.title, text = excluded.text, extraction_date = excluded.extraction_date
+"""
+
+
+def _clean_date(value):
+    """newspaper stores a missing date as the string 'None'"""
+    return None if value in (None, "", "None") else value
+
+
+def _parse_authors(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            value = [value]
+    names = []
+    for name in value:
+        name = " ".join(str(name).split())
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+class CorpusDB:
+    def __init__(self, path="corpus.db"):
+        """Open (or create) the unified corpus database at path"""
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def add(self, rows):
+        """
+        Insert or update articles in one transaction
+
+        Args:
+            rows: Iterable of dicts in the create_db.py row format (url, source,
+                publish_date, title, authors as a JSON list, text,
+                extraction_date, domain)
+
+        Returns:
+            Number of rows written
+        """
+        count = 0
+        cur = self.conn.cursor()
+        cur.execute("BEGIN")
+        try:
+            for row in rows:
+                record = {key: row.get(key) for key in
+                          ("url", "source", "domain", "title", "text", "extraction_date")}
+                record["publish_date"] = _clean_date(row.get("publish_date"))
+                cur.execute(UPSERT_ARTICLE, record)
+                article_id = cur.execute("SELECT id FROM articles WHERE url = ?", (record["url"],)).fetchone()[0]
+                self._set_authors(cur, article_id, _parse_authors(row.get("authors")))
+                count += 1
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        return count
+
+    def _set_authors(self, cur, article_id, names):
+        cur.execute("DELETE FROM article_authors WHERE article_id = ?", (article_id,))
+        for position, name in enumerate(names):
+            cur.execute("INSERT OR IGNORE INTO authors (name) VALUES (?)", (name,))
+            author_id = cur.execute("SELECT id FROM authors WHERE name = ?", (name,)).fetchone()[0]
+            cur.execute("INSERT OR IGNORE INTO article_authors (article_id, author_id, position) VALUES (?, ?, ?)",
+                        (article_id, author_id, position))
+
+    def import_stories(self, db_file, table_name, source=None, chunk_size=5000):
+        """
+        Copy a per-source {source}_stories table into the corpus, chunk by chunk
+
+        Returns:
+            Number of rows imported
+        """
+        stories = sqlite3.connect(db_file)
+        stories.row_factory = sqlite3.Row
+        total = 0
+        try:
+            cursor = stories.execute(f"SELECT * FROM [{table_name}]")
+            while True:
+                chunk = [dict(row) for row in cursor.fetchmany(chunk_size)]
+                if not chunk:
+                    break
+                if source:
+                    for row in chunk:
+                        row["source"] = source
+                total += self.add(chunk)
+                logger.info(f"Imported {total} rows from {db_file}")
+        finally:
+            stories.close()
+        return total
+
+    def search(self, query, source=None, domain=None, since=None, until=None, limit=20):
+        """
+        Full-text search over title and text, best matches first
+
+        Args:
+            query: FTS5 query (e.g., 'climate AND "supreme court"')
+            source, domain: Optional exact filters
+            since, until: Optional publish dates (YYYY-MM-DD, inclusive; until
+                covers the whole day)
+            limit: Maximum number of results
+
+        Returns:
+            List of dicts with url, source, publish_date, title and a snippet
+        """
+        sql = ["""
+            SELECT a.url, a.source, a.publish_date, a.title,
+                   snippet(articles_fts, 1, '[', ']', '...', 12) AS snippet
+            FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid
+            WHERE articles_fts MATCH ?
+        """]
+        params = [query]
+        for clause, value in (("a.source = ?", source), ("a.domain = ?", domain),
+                              ("a.publish_date >= ?", since), ("a.publish_date < date(?, '+1 day')", until)):
+            if value is not None:
+                sql.append(f"AND {clause}")
+                params.append(value)
+        sql.append("ORDER BY rank LIMIT ?")
+        params.append(limit)
+
+        self.conn.row_factory = sqlite3.Row
+        try:
+            return [dict(row) for row in self.conn.execute(" ".join(sql), params)]
+        finally:
+            self.conn.row_factory = None
+
+    def articles_by_author(self, name, limit=100):
+        """URLs and titles of articles credited to author name"""
+        return self.conn.execute("""
+            SELECT a.url, a.title, a.publish_date FROM authors au
+            JOIN article_authors aa ON aa.author_id = au.id
+            JOIN articles a ON a.id = aa.article_id
+            WHERE au.name = ? ORDER BY a.publish_date DESC LIMIT ?
+        """, (name, limit)).fetchall()
+
+    def optimize(self):
+        """Merge FTS index segments (worth running after a large import)"""
+        self.conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Unified multi-source article corpus with full-text search.')
+    parser.add_argument('--db', default='corpus.db', help='Corpus database (default: corpus.db)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Import a per-source stories database')
+    import_parser.add_argument('db_file', help='Per-source database (e.g., ../cbs.db)')
+    import_parser.add_argument('--table', help='Table name (default: the only *_stories table)')
+    import_parser.add_argument('--source', help='Override the source column (e.g., CBS)')
+
+    search_parser = subparsers.add_parser('search', help='Full-text search')
+    search_parser.add_argument('query', help='FTS5 query')
+    search_parser.add_argument('--source', help='Only this source')
+    search_parser.add_argument('--domain', help='Only this domain')
+    search_parser.add_argument('--since', help='Earliest publish date (e.g., 2024-01-01)')
+    search_parser.add_argument('--until', help='Latest publish date, inclusive (e.g., 2024-12-31)')
+    search_parser.add_argument('--limit', type=int, default=20, help='Maximum results (default: 20)')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    corpus = CorpusDB(args.db)
+    if args.command == 'import':
+        table = args.table
+        if table is None:
+            conn = sqlite3.connect(args.db_file)
+            tables = [name for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%_stories'")]
+            conn.close()
+            if len(tables) != 1:
+                parser.error(f"--table is required; found tables: {tables}")
+            table = tables[0]
+        count = corpus.import_stories(args.db_file, table, source=args.source)
+        corpus.optimize()
+        print(f"Imported {count} articles from {args.db_file} [{table}]")
+    else:
+        for result in corpus.search(args.query, source=args.source, domain=args.domain,
+                                    since=args.since, until=args.until, limit=args.limit):
+            print(f"{result['publish_date'] or '':<25} {result['source']:<8} {result['title']}")
+            print(f"    {result['url']}")
+            print(f"    {' '.join(result['snippet'].split())}")
+    corpus.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,22 @@
 import json
-import time
-import sys
 import os
+import queue
 import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 from urllib.parse import urlparse
 from newspaper import Article
+from newspaper.article import ArticleDownloadState
 from sqlite_utils import Database
 
+from corpus_db import CorpusDB
+from html_cache import HTMLCache
+from shared import read_urls
+from stories_writer import StoriesWriter
+from throttle import DomainThrottle
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -19,8 +28,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def create_db(source, batch_size=100):
-    current_batch = []
+def create_db(source, batch_size=1000, download_workers=16, parse_workers=None,
+              per_domain_rate=5.0, per_domain_connections=4, cache_dir="html_cache", reparse=False,
+              pragmas=None, corpus_file="corpus.db"):
+    """
+    Download, parse and store every new URL for source
+
+    Downloads run on a thread pool, throttled per domain; newspaper's parse()
+    runs in a process pool; a single StoriesWriter thread batches inserts into
+    SQLite (WAL mode).
+    Downloaded HTML is kept in an HTMLCache, and pages already in the cache are
+    never downloaded again.
+
+    Args:
+        source: Source name (e.g., CNN); selects the URLs collected for it
+            ({source}_urls.ndjson, else {source}_urls.json) and {source}.db
+        batch_size: Rows per insert transaction
+        download_workers: Concurrent download threads
+        parse_workers: Parser processes (None for one per CPU)
+        per_domain_rate: Maximum downloads per second from one domain
+        per_domain_connections: Maximum simultaneous downloads from one domain
+        cache_dir: HTML cache directory (None to disable the cache)
+        reparse: Re-parse every cached page of the source's URL list and
+            replace its row, without any network access
+        pragmas: Optional StoriesWriter pragma settings (synchronous,
+            cache_size, mmap_size)
+        corpus_file: Unified full-text corpus that every written batch is
+            also added to (None to skip it)
+    """
     db_file = f"{source.lower()}.db"
     table_name = f"{source.lower()}_stories"
     urls_file = f"{source.lower()}_urls.json"
@@ -53,134 +88,231 @@ def create_db(source, batch_size=100):
     
     # Load URLs
     try:
-        with open(urls_file, "r", encoding="utf-8") as f:
-            urls = json.load(f)
+        urls = read_urls(urls_file)
         logger.info(f"Loaded {len(urls)} URLs from {urls_file}")
     except Exception as e:
         logger.error(f"Failed to load URL list from {urls_file}: {e}")
         return
     
-    # Get existing URLs from database
-    existing_urls = set()
-    try:
-        for row in db[table_name].rows:
-            existing_urls.add(row["url"])
-        logger.info(f"Found {len(existing_urls)} existing URLs in database")
-    except Exception as e:
-        logger.error(f"Failed to retrieve existing URLs from database: {e}")
-        existing_urls = set()  # Reset to empty set if there was an error
-    
-    # Filter out URLs that are already in the database
-    new_urls = [url for url in urls if url not in existing_urls]
-    logger.info(f"Found {len(new_urls)} new URLs to process")
+    cache = HTMLCache(cache_dir) if cache_dir else None
+    if reparse:
+        if cache is None:
+            logger.error("Reparse mode needs the HTML cache")
+            return
+        new_urls = cache.cached_urls(urls)
+        logger.info(f"Reparsing {len(new_urls)} cached pages of {len(urls)} URLs")
+    else:
+        # Find URLs that are not in the database yet, reading only the url primary key
+        try:
+            new_urls = _find_new_urls(db, table_name, urls)
+            logger.info(f"{len(urls) - len(new_urls)} of {len(urls)} URLs are already in the database")
+        except Exception as e:
+            logger.error(f"Failed to retrieve existing URLs from database: {e}")
+            new_urls = list(urls)  # Fall back to processing everything if there was an error
+        logger.info(f"Found {len(new_urls)} new URLs to process")
     
     # Stats tracking
     total_urls = len(new_urls)
-    successful = 0
-    skipped = 0
-    errors = 0
+    stats = {"successful": 0, "skipped": 0, "errors": 0}
     
     if total_urls == 0:
         logger.info("No new URLs to process. Exiting.")
         return
     
-    # Process each URL
-    for index, url in enumerate(new_urls):
-        logger.info(f"Processing URL {index+1}/{total_urls}: {url}")
-        
-        # Filter out unwanted URLs
-        if (
-            '/video/' in url
-            or url == 'https://www.comparecards.com/'
-            or '/live-news/january-6-hearings' in url
-            or 'cnn-underscored' in url
-            or (source == 'CNN' and 'cnn.com' not in url)
-        ):
+    # Filter out unwanted URLs
+    wanted_urls = []
+    for url in new_urls:
+        if _is_filtered(url, source):
             logger.info(f"Skipped (filtered): {url}")
-            skipped += 1
-            continue
-        
-        # Extract article
-        row = {}
-        article = Article(url)
-        
-        try:
-            article.download()
-            logger.debug(f"Downloaded: {url}")
-        except Exception as e:
-            logger.error(f"Failed to download {url}: {e}")
-            errors += 1
-            continue
-        
-        try:
-            article.parse()
-            logger.debug(f"Parsed: {url}")
-        except Exception as e:
-            logger.error(f"Failed to parse {url}: {e}")
-            errors += 1
-            continue
-        
-        # Store article data
-        row['source'] = source
-        row['url'] = url
-        row['publish_date'] = str(article.publish_date)
-        row['title'] = article.title
-        row['authors'] = json.dumps(article.authors)  # Store authors as JSON string
-        row['text'] = article.text
-        row['extraction_date'] = datetime.now().isoformat()
-        
-        # Domain for additional categorization
-        domain = urlparse(url).netloc
-        row['domain'] = domain
-        
-        # Log article details for debugging
-        logger.debug(f"Article details: Title: {article.title}, Date: {article.publish_date}, Authors: {article.authors}")
-        logger.debug(f"Text length: {len(article.text)} characters")
-        
-        # Add to current batch
-        current_batch.append(row)
-        successful += 1
-        
-        # If batch is full, insert into database
-        if len(current_batch) >= batch_size:
-            _insert_batch(db, table_name, current_batch)
-            logger.info(f"Inserted batch of {len(current_batch)} articles ({successful} of {total_urls} processed)")
-            current_batch = []  # Reset batch
-        
-        # Rate limiting
-        time.sleep(0.1)
+            stats["skipped"] += 1
+        else:
+            wanted_urls.append(url)
+    
+    # Open the corpus once up front so a bad path fails before any download
+    if corpus_file:
+        CorpusDB(corpus_file).close()
+
+    # Single writer thread owns its own connection and batches the inserts
+    rows = queue.Queue(maxsize=batch_size * 4)
+    failure = []
+    writer = threading.Thread(target=_writer_loop,
+                              args=(db_file, table_name, rows, batch_size, pragmas or {}, corpus_file, failure),
+                              daemon=True)
+    writer.start()
     
-    # Insert any remaining articles
-    if current_batch:
-        _insert_batch(db, table_name, current_batch)
-        logger.info(f"Inserted final batch of {len(current_batch)} articles")
+    throttle = DomainThrottle(per_domain_rate, per_domain_connections)
+    try:
+        _run_pipeline(wanted_urls, source, rows, writer, stats, throttle, cache, download_workers, parse_workers)
+    finally:
+        _put(rows, None, writer)
+        writer.join()
+        if failure:
+            # Raised from here so the writer's error replaces the pipeline's "writer stopped"
+            raise failure[0]
     
     # Log final statistics
     logger.info(f"Processing complete for {source}")
     logger.info(f"Total new URLs: {total_urls}")
-    logger.info(f"Successfully processed: {successful}")
-    logger.info(f"Skipped: {skipped}")
-    logger.info(f"Errors: {errors}")
+    logger.info(f"Successfully processed: {stats['successful']}")
+    logger.info(f"Skipped: {stats['skipped']}")
+    logger.info(f"Errors: {stats['errors']}")
+
+def _find_new_urls(db, table_name, urls):
+    """
+    Return the URLs (in their original order) that are not yet in table_name
+
+    Only the url column is selected, which SQLite answers from the primary key
+    index alone (a covering index scan), so article text is never read.
+    """
+    existing_urls = {url for (url,) in db.conn.execute(f"SELECT url FROM [{table_name}]")}
+    return [url for url in urls if url not in existing_urls]
+
+def _is_filtered(url, source):
+    """Return True for URLs we never want to extract"""
+    return (
+        '/video/' in url
+        or url == 'https://www.comparecards.com/'
+        or '/live-news/january-6-hearings' in url
+        or 'cnn-underscored' in url
+        or (source == 'CNN' and 'cnn.com' not in url)
+    )
+
+def _download(url, throttle, cache):
+    """Download stage: return the cached HTML, or fetch it honoring the per-domain limits"""
+    if cache is not None:
+        html = cache.get(url)
+        if html is not None:
+            return html
+    with throttle.limit(url):
+        article = Article(url)
+        article.download()
+    if article.download_state != ArticleDownloadState.SUCCESS:
+        raise RuntimeError(article.download_exception_msg or "download failed")
+    if cache is not None:
+        cache.put(url, article.html)
+    return article.html
+
+def _parse(source, url, html):
+    """Parse stage (runs in a worker process): extract the article fields from HTML"""
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return {
+        'source': source,
+        'url': url,
+        'publish_date': str(article.publish_date),
+        'title': article.title,
+        'authors': json.dumps(article.authors),  # Store authors as JSON string
+        'text': article.text,
+        'extraction_date': datetime.now().isoformat(),
+        'domain': urlparse(url).netloc,  # Domain for additional categorization
+    }
+
+def _put(rows, item, writer, timeout=1.0):
+    """Queue item for the writer thread; return False instead of blocking forever if the writer has died"""
+    while writer.is_alive():
+        try:
+            rows.put(item, timeout=timeout)
+            return True
+        except queue.Full:
+            continue
+    return False
 
-def _insert_batch(db, table_name, batch):
-    """Helper function to insert a batch of articles into the database"""
+def _run_pipeline(urls, source, rows, writer, stats, throttle, cache, download_workers, parse_workers):
+    """Feed URLs through the download and parse stages, passing parsed rows to the writer"""
+    total = len(urls)
+    url_iter = iter(urls)
+    max_downloads = download_workers * 2
+    max_parses = (parse_workers or os.cpu_count()) * 4
+    downloads, parses = {}, {}
+    
+    with ThreadPoolExecutor(max_workers=download_workers) as download_pool, \
+            ProcessPoolExecutor(max_workers=parse_workers) as parse_pool:
+        while True:
+            # Keep the download stage busy, but stop feeding it while parsing lags behind
+            while len(downloads) < max_downloads and len(parses) < max_parses:
+                url = next(url_iter, None)
+                if url is None:
+                    break
+                downloads[download_pool.submit(_download, url, throttle, cache)] = url
+            if not downloads and not parses:
+                break
+            
+            done, _ = wait(list(downloads) + list(parses), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in downloads:
+                    url = downloads.pop(future)
+                    try:
+                        html = future.result()
+                        logger.debug(f"Downloaded: {url}")
+                    except Exception as e:
+                        logger.error(f"Failed to download {url}: {e}")
+                        stats["errors"] += 1
+                        continue
+                    parses[parse_pool.submit(_parse, source, url, html)] = url
+                else:
+                    url = parses.pop(future)
+                    try:
+                        row = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to parse {url}: {e}")
+                        stats["errors"] += 1
+                        continue
+                    logger.debug(f"Article details: Title: {row['title']}, Date: {row['publish_date']}, Authors: {row['authors']}")
+                    logger.debug(f"Text length: {len(row['text'])} characters")
+                    if not _put(rows, row, writer):
+                        raise RuntimeError("The database writer stopped")
+                    stats["successful"] += 1
+                    done_count = stats["successful"] + stats["errors"]
+                    logger.info(f"Processed URL {done_count}/{total}: {url}")
+
+def _writer_loop(db_file, table_name, rows, batch_size, pragmas, corpus_file=None, failure=None):
+    """
+    Writer stage: insert rows from the queue in batches until it yields None
+
+    An exception is logged and appended to failure; the thread then exits,
+    which the producers notice in _put. The corpus is best-effort: if it
+    cannot be opened or written, the stories are still written.
+    """
     try:
-        db[table_name].insert_all(batch, pk="url")
-        return True
+        corpus = _open_corpus(corpus_file) if corpus_file else None
+        pending = []
+        with StoriesWriter(db_file, table_name, batch_size=batch_size, **pragmas) as writer:
+            while True:
+                row = rows.get()
+                if row is None:
+                    break
+                before = writer.inserted
+                writer.add(row)
+                pending.append(row)
+                if writer.inserted != before:
+                    logger.info(f"Inserted batch of {writer.inserted - before} articles ({writer.inserted} total)")
+                    _add_to_corpus(corpus, pending)
+                    pending = []
+        _add_to_corpus(corpus, pending)
+        if corpus:
+            corpus.close()
+        logger.info(f"Writer finished: {writer.inserted} articles inserted, {writer.failed} failed")
     except Exception as e:
-        logger.error(f"Failed to insert batch into database: {e}")
-        # If batch insert fails, try inserting one by one
-        logger.info("Attempting to insert articles individually")
-        successful = 0
-        for row in batch:
-            try:
-                db[table_name].insert(row, pk="url", replace=True)
-                successful += 1
-            except Exception as article_e:
-                logger.error(f"Failed to insert article {row['url']}: {article_e}")
-        
-        logger.info(f"Individual insertion: {successful}/{len(batch)} articles inserted")
-        return successful > 0
+        logger.error(f"Database writer failed: {e}")
+        if failure is not None:
+            failure.append(e)
+
+def _open_corpus(corpus_file):
+    try:
+        return CorpusDB(corpus_file)
+    except Exception as e:
+        logger.error(f"Failed to open corpus {corpus_file}, not indexing this run: {e}")
+        return None
+
+def _add_to_corpus(corpus, batch):
+    """Mirror a written batch into the unified corpus (and its full-text index)"""
+    if corpus is None or not batch:
+        return
+    try:
+        corpus.add(batch)
+    except Exception as e:
+        logger.error(f"Failed to add batch to corpus {corpus.path}: {e}")
 
 def get_db_schema(source):
     """Function to print the database schema"""
@@ -216,21 +348,52 @@ def get_db_schema(source):
         print(f"Error accessing database: {e}")
 
 def main():
-    if len(sys.argv) < 2:
-        logger.error("Usage: python create_db.py SOURCE_NAME [--schema]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Download and parse article text into a SQLite DB.')
+    parser.add_argument('source', metavar='SOURCE_NAME', help='Source name (e.g., CNN)')
+    parser.add_argument('--schema', action='store_true', help='Print the database schema and exit')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Rows per insert transaction (default: 1000)')
+    parser.add_argument('--download-workers', type=int, default=16,
+                        help='Concurrent download threads (default: 16)')
+    parser.add_argument('--parse-workers', type=int,
+                        help='Parser processes (default: one per CPU)')
+    parser.add_argument('--per-domain-rate', type=float, default=5.0,
+                        help='Maximum downloads per second from one domain (default: 5, 0 for no limit)')
+    parser.add_argument('--per-domain-connections', type=int, default=4,
+                        help='Maximum simultaneous downloads from one domain (default: 4)')
+    parser.add_argument('--cache-dir', default='html_cache',
+                        help='Compressed HTML cache shared with usat_downloader (default: html_cache)')
+    parser.add_argument('--no-html-cache', action='store_true', help='Do not read or write the HTML cache')
+    parser.add_argument('--reparse', action='store_true',
+                        help='Rebuild rows from cached HTML only (no network)')
+    parser.add_argument('--synchronous', default='NORMAL', choices=['OFF', 'NORMAL', 'FULL'],
+                        help='SQLite synchronous pragma (default: NORMAL)')
+    parser.add_argument('--cache-size', type=int, default=-65536,
+                        help='SQLite cache_size pragma; negative values are KiB (default: -65536)')
+    parser.add_argument('--mmap-size', type=int, default=256 * 1024 * 1024,
+                        help='SQLite mmap_size pragma in bytes (default: 256 MiB)')
+    parser.add_argument('--corpus', default='corpus.db',
+                        help='Unified full-text corpus DB to keep in sync (default: corpus.db)')
+    parser.add_argument('--no-corpus', action='store_true', help='Do not update the corpus DB')
     
-    source = sys.argv[1]
+    args = parser.parse_args()
+    source = args.source
     
     # Check if we should just print the schema
-    if len(sys.argv) > 2 and sys.argv[2] == "--schema":
+    if args.schema:
         get_db_schema(source)
         return
     
     logger.info(f"Starting extraction for source: {source}")
     
     try:
-        create_db(source)
+        create_db(source, batch_size=args.batch_size, download_workers=args.download_workers,
+                  parse_workers=args.parse_workers, per_domain_rate=args.per_domain_rate,
+                  per_domain_connections=args.per_domain_connections,
+                  cache_dir=None if args.no_html_cache else args.cache_dir, reparse=args.reparse,
+                  pragmas={"synchronous": args.synchronous, "cache_size": args.cache_size,
+                           "mmap_size": args.mmap_size},
+                  corpus_file=None if args.no_corpus else args.corpus)
     except Exception as e:
         logger.error(f"Unhandled exception in create_db: {e}", exc_info=True)
     
@@ -2,28 +2,132 @@
 """
 Dataverse File Uploader
 A script to upload files to Harvard Dataverse or other Dataverse instances.
+
+Files are streamed from disk with byte-level progress, and every request is
+retried with exponential backoff. When the dataset's store supports direct
+upload, large files go up in parts straight to storage (uploadurls -> PUT
+parts -> complete -> add); finished parts and the completion are recorded in
+a <file>.dvupload.json state file, so an interrupted upload resumes where it
+stopped (after a failed registration, straight at add). Otherwise the file
+is streamed to the native /add endpoint.
+
+    python dataverse.py corpus.db.gz stories_parquet.zip --token XXX \
+        --dataset doi:10.7910/DVN/XXXXXXX --workers 2
 """
 
 import os
+import json
+import time
+import uuid
+import random
+import hashlib
 import argparse
 import requests
 import sys
 import math
+import threading
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 import mimetypes
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+STATE_SUFFIX = ".dvupload.json"
+READ_SIZE = 1024 * 1024
+
+
+class _BodyReader:
+    """
+    File-like request body made of byte strings and (path, offset, length)
+    file ranges; it is streamed by requests (which sizes it with len()) and
+    reports the file bytes read to a tqdm bar.
+    """
+
+    def __init__(self, segments, progress=None):
+        self.segments = segments
+        self.progress = progress
+        self.sent = 0
+        self._length = sum(len(s) if isinstance(s, bytes) else s[2] for s in segments)
+        self._index = 0
+        self._pos = 0
+        self._file = None
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        size = READ_SIZE if size is None or size < 0 else size
+        while self._index < len(self.segments):
+            segment = self.segments[self._index]
+            if isinstance(segment, bytes):
+                data = segment[self._pos:self._pos + size]
+            else:
+                path, offset, length = segment
+                if self._file is None:
+                    self._file = open(path, 'rb')
+                    self._file.seek(offset)
+                data = self._file.read(min(size, length - self._pos))
+            if data:
+                self._pos += len(data)
+                if self.progress is not None and not isinstance(segment, bytes):
+                    self.sent += len(data)
+                    self.progress.update(len(data))
+                return data
+            self.close()
+            self._index += 1
+            self._pos = 0
+        return b''
+
+    def rewind(self):
+        """Undo the progress of a failed attempt"""
+        if self.progress is not None and self.sent:
+            self.progress.update(-self.sent)
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
 class DataverseUploader:
-    def __init__(self, server_url, api_token, dataset_id):
-        """Initialize the uploader with server info and credentials."""
+    def __init__(self, server_url, api_token, dataset_id, retries=5, backoff=2.0, timeout=300, direct=True,
+                 url_expiration=3600):
+        """
+        Initialize the uploader with server info and credentials.
+
+        Args:
+            server_url: Dataverse installation (e.g., https://dataverse.harvard.edu)
+            api_token: API token
+            dataset_id: Dataset persistent ID
+            retries: Retries per request on connection errors, timeouts, 429 and 5xx
+            backoff: Base delay in seconds, doubled after every failed attempt
+            timeout: Socket timeout in seconds for each request
+            direct: Try the direct (multipart) upload flow before the /add endpoint
+            url_expiration: Seconds the presigned part URLs stay valid; older
+                resume state is discarded and the upload starts over
+        """
         self.server_url = server_url.rstrip('/')
         self.api_token = api_token
         self.dataset_id = dataset_id
         self.upload_url = f"{self.server_url}/api/datasets/:persistentId/add"
+        self.upload_urls_url = f"{self.server_url}/api/datasets/:persistentId/uploadurls"
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.direct = direct
+        self.url_expiration = url_expiration
+        self.session = requests.Session()
+        self.session.headers['X-Dataverse-key'] = api_token
+        # Presigned storage URLs must not receive the API token
+        self.storage = requests.Session()
+        # Registering files edits the dataset version; one at a time avoids lock conflicts
+        self._add_lock = threading.Lock()
 
     def _get_mimetype(self, file_path):
         """Determine the MIME type based on file extension."""
         mime_type, _ = mimetypes.guess_type(file_path)
-        
+
         # Default mappings for common compressed file types
         if file_path.endswith('.tar.gz') or file_path.endswith('.tgz'):
             return 'application/x-gzip'
@@ -35,12 +139,174 @@ class DataverseUploader:
             return 'text/csv'
         elif file_path.endswith('.json'):
             return 'application/json'
-        
+
         # Use detected MIME type or default to octet-stream
         return mime_type or 'application/octet-stream'
 
-    def upload_file(self, file_path, description=None):
-        """Upload a file to the Dataverse dataset."""
+    def _request(self, method, url, body=None, session=None, **kwargs):
+        """
+        Send a request, retrying with exponential backoff and jitter
+
+        Args:
+            body: Optional callable returning a fresh _BodyReader for each attempt
+            session: Session to send with (default: the authenticated Dataverse session)
+
+        Returns:
+            The last response (which may be an error status once retries run out)
+        """
+        for attempt in range(self.retries + 1):
+            reader = body() if body else None
+            try:
+                response = (session or self.session).request(method, url, data=reader, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response, error = None, e
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                error = f"HTTP {response.status_code}"
+            finally:
+                if reader is not None:
+                    reader.close()
+            if attempt == self.retries:
+                if response is None:
+                    raise error
+                return response
+            if reader is not None:
+                reader.rewind()
+            retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+            delay = float(retry_after) if retry_after.isdigit() else \
+                min(self.backoff * 2 ** attempt, 120) * random.uniform(0.5, 1.0)
+            tqdm.write(f"⚠️  {method} {url.split('?')[0]} failed ({error}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _md5(self, file_path):
+        digest = hashlib.md5()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(READ_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _load_state(self, file_path, file_size):
+        """Return the saved multipart state for file_path if it still applies"""
+        try:
+            with open(file_path + STATE_SUFFIX) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (state.get('dataset') != self.dataset_id or state.get('size') != file_size
+                or state.get('mtime') != os.path.getmtime(file_path)):
+            return None
+        if not state.get('completed') and time.time() - state.get('created', 0) > self.url_expiration:
+            if state.get('abort'):
+                try:
+                    self.session.delete(urljoin(self.server_url + '/', state['abort']), timeout=self.timeout)
+                except requests.RequestException:
+                    pass
+            return None
+        return state
+
+    def _save_state(self, file_path, state):
+        tmp_path = f"{file_path}{STATE_SUFFIX}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path + STATE_SUFFIX)
+
+    def _clear_state(self, file_path):
+        try:
+            os.remove(file_path + STATE_SUFFIX)
+        except FileNotFoundError:
+            pass
+
+    def _request_upload_urls(self, file_path, file_size):
+        """Ask Dataverse for presigned storage URLs; None if direct upload is not enabled"""
+        response = self._request('GET', self.upload_urls_url,
+                                 params={'persistentId': self.dataset_id, 'size': file_size})
+        if response.status_code != 200:
+            return None
+        data = response.json()['data']
+        return {
+            'dataset': self.dataset_id,
+            'size': file_size,
+            'mtime': os.path.getmtime(file_path),
+            'created': time.time(),
+            'storageIdentifier': data['storageIdentifier'],
+            'partSize': data.get('partSize', file_size),
+            'url': data.get('url'),
+            'urls': data.get('urls'),
+            'complete': data.get('complete'),
+            'abort': data.get('abort'),
+            'etags': {},
+            'completed': False,
+        }
+
+    def _upload_direct(self, file_path, state, pbar):
+        """PUT the file (in parts when multipart) to storage, recording finished parts in state"""
+        file_size = state['size']
+        if state.get('completed'):
+            pbar.update(file_size)
+            return
+        if state['url']:
+            response = self._request('PUT', urljoin(self.server_url + '/', state['url']), session=self.storage,
+                                     headers={'x-amz-tagging': 'dv-state=temp'},
+                                     body=lambda: _BodyReader([(file_path, 0, file_size)], pbar))
+            response.raise_for_status()
+            return
+
+        part_size = state['partSize']
+        for part in sorted(state['urls'], key=int):
+            offset = (int(part) - 1) * part_size
+            length = min(part_size, file_size - offset)
+            if part in state['etags']:
+                pbar.update(length)
+                continue
+            response = self._request('PUT', urljoin(self.server_url + '/', state['urls'][part]),
+                                     session=self.storage, body=lambda: _BodyReader([(file_path, offset, length)], pbar))
+            response.raise_for_status()
+            state['etags'][part] = response.headers.get('ETag', '')
+            self._save_state(file_path, state)
+
+        response = self._request('PUT', urljoin(self.server_url + '/', state['complete']),
+                                 json=state['etags'])
+        response.raise_for_status()
+        # The parts are now one stored object; a retry only needs to register it
+        state['completed'] = True
+        self._save_state(file_path, state)
+
+    def _register(self, file_path, state, json_data):
+        """Add a file already in storage to the dataset"""
+        json_data = dict(json_data, storageIdentifier=state['storageIdentifier'],
+                         checksum={'@type': 'MD5', '@value': self._md5(file_path)})
+        with self._add_lock:
+            return self._request('POST', self.upload_url, params={'persistentId': self.dataset_id},
+                                 files={'jsonData': (None, json.dumps(json_data))})
+
+    def _upload_native(self, file_path, json_data, mime_type, pbar):
+        """Stream the file to the /add endpoint as multipart/form-data"""
+        boundary = uuid.uuid4().hex
+        head = (f'--{boundary}\r\nContent-Disposition: form-data; name="jsonData"\r\n'
+                f'Content-Type: application/json\r\n\r\n{json.dumps(json_data)}\r\n'
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+                f'filename="{json_data["fileName"]}"\r\nContent-Type: {mime_type}\r\n\r\n').encode('utf-8')
+        tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        file_size = os.path.getsize(file_path)
+        return self._request('POST', self.upload_url, params={'persistentId': self.dataset_id},
+                             headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
+                             body=lambda: _BodyReader([head, (file_path, 0, file_size), tail], pbar))
+
+    def upload_file(self, file_path, description=None, position=None):
+        """
+        Upload a file to the Dataverse dataset.
+
+        Args:
+            file_path: File to upload
+            description: Optional file description
+            position: tqdm bar position (for parallel uploads)
+
+        Returns:
+            True on success
+        """
         if not os.path.exists(file_path):
             print(f"Error: File not found: {file_path}")
             return False
@@ -48,59 +314,67 @@ class DataverseUploader:
         file_size = os.path.getsize(file_path)
         filename = os.path.basename(file_path)
         mime_type = self._get_mimetype(file_path)
-        
-        print(f"Uploading {filename} ({self._format_size(file_size)}) to dataset {self.dataset_id}...")
-        
-        # Set up parameters for the request
-        params = {
-            'persistentId': self.dataset_id,
-            'key': self.api_token
-        }
-        
-        # Add description if provided
+
+        tqdm.write(f"Uploading {filename} ({self._format_size(file_size)}) to dataset {self.dataset_id}...")
+
+        json_data = {'fileName': filename, 'mimeType': mime_type}
         if description:
-            params['description'] = description
+            json_data['description'] = description
 
         try:
-            with open(file_path, 'rb') as file_obj:
-                files = {
-                    'file': (filename, file_obj, mime_type)
-                }
-                
-                # Use tqdm to show progress (note: actual progress tracking is limited)
-                with tqdm(total=100, unit="%") as pbar:
-                    # We can't track actual upload progress with simple requests
-                    # So we'll update at key points
-                    pbar.update(10)  # Starting upload
-                    
-                    response = requests.post(
-                        self.upload_url, 
-                        params=params,
-                        files=files
-                    )
-                    
-                    pbar.update(90)  # Completed upload
-            
+            with tqdm(total=file_size, unit="B", unit_scale=True, unit_divisor=1024,
+                      desc=filename, position=position, leave=True) as pbar:
+                state = self._load_state(file_path, file_size) if self.direct else None
+                if state and state.get('completed'):
+                    tqdm.write(f"Resuming {filename}: already in storage, registering it")
+                elif state:
+                    tqdm.write(f"Resuming {filename}: {len(state['etags'])} part(s) already uploaded")
+                elif self.direct:
+                    state = self._request_upload_urls(file_path, file_size)
+                    if state and state['urls']:
+                        self._save_state(file_path, state)
+
+                if state:
+                    self._upload_direct(file_path, state, pbar)
+                    response = self._register(file_path, state, json_data)
+                else:
+                    response = self._upload_native(file_path, json_data, mime_type, pbar)
+
             # Check response
             if response.status_code == 200:
+                self._clear_state(file_path)
                 result = response.json()
                 file_id = result['data']['files'][0]['dataFile']['id']
                 persistent_id = result.get('data', {}).get('files', [{}])[0].get('dataFile', {}).get('persistentId', 'Not available')
-                
-                print(f"✅ Upload successful!")
-                print(f"File ID: {file_id}")
+
+                tqdm.write(f"✅ Upload of {filename} successful!")
+                tqdm.write(f"File ID: {file_id}")
                 if persistent_id != 'Not available':
-                    print(f"Persistent ID: {persistent_id}")
+                    tqdm.write(f"Persistent ID: {persistent_id}")
                 return True
             else:
-                print(f"❌ Upload failed with status code {response.status_code}")
-                print(f"Response: {response.text}")
+                tqdm.write(f"❌ Upload of {filename} failed with status code {response.status_code}")
+                tqdm.write(f"Response: {response.text}")
                 return False
-                
+
         except Exception as e:
-            print(f"❌ Error during upload: {str(e)}")
+            tqdm.write(f"❌ Error during upload of {filename}: {str(e)}")
+            if os.path.exists(file_path + STATE_SUFFIX):
+                tqdm.write(f"Run the same command again to resume from {file_path + STATE_SUFFIX}")
             return False
 
+    def upload_files(self, file_paths, description=None, workers=2):
+        """
+        Upload several files in parallel
+
+        Returns:
+            Dict of file path -> True/False
+        """
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {path: executor.submit(self.upload_file, path, description, position)
+                       for position, path in enumerate(file_paths)}
+            return {path: future.result() for path, future in futures.items()}
+
     def _format_size(self, size_bytes):
         """Format file size in a human-readable format."""
         if size_bytes == 0:
@@ -116,22 +390,28 @@ class DataverseUploader:
 def main():
     """Main entry point for the script."""
     parser = argparse.ArgumentParser(description='Upload files to a Dataverse instance.')
-    parser.add_argument('file_path', help='Path to the file to upload')
-    parser.add_argument('--server', default='https://dataverse.harvard.edu', 
+    parser.add_argument('file_paths', nargs='+', help='Path(s) of the file(s) to upload')
+    parser.add_argument('--server', default='https://dataverse.harvard.edu',
                         help='Dataverse server URL (default: https://dataverse.harvard.edu)')
     parser.add_argument('--token', required=True, help='API token for authentication')
     parser.add_argument('--dataset', required=True, help='Dataset persistent ID (e.g., doi:10.7910/DVN/XXXXXXX)')
     parser.add_argument('--description', help='Optional description for the file')
-    
+    parser.add_argument('--workers', type=int, default=2, help='Files uploaded in parallel (default: 2)')
+    parser.add_argument('--retries', type=int, default=5, help='Retries per request (default: 5)')
+    parser.add_argument('--timeout', type=int, default=300, help='Socket timeout in seconds (default: 300)')
+    parser.add_argument('--no-direct', action='store_true',
+                        help='Always stream through the /add endpoint instead of direct upload')
+
     args = parser.parse_args()
-    
+
     # Create uploader and perform upload
-    uploader = DataverseUploader(args.server, args.token, args.dataset)
-    success = uploader.upload_file(args.file_path, args.description)
-    
+    uploader = DataverseUploader(args.server, args.token, args.dataset, retries=args.retries,
+                                 timeout=args.timeout, direct=not args.no_direct)
+    results = uploader.upload_files(args.file_paths, args.description, args.workers)
+
     # Exit with appropriate status code
-    sys.exit(0 if success else 1)
+    sys.exit(0 if all(results.values()) else 1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Parquet Export
+Streams the {source}_stories tables into a Parquet dataset partitioned by
+source and publish month (hive layout: source=NYT/month=2024-03/...).
+Undated articles go to the null partition (month=__HIVE_DEFAULT_PARTITION__),
+so month range filters leave them out.
+
+Rows are read from SQLite in chunks and written through pyarrow's dataset
+writer, so memory stays flat regardless of corpus size. Columns are
+dictionary-encoded where it pays off and zstd-compressed, so analysts can
+read just the columns and partitions they need, e.g.
+
+    pq.read_table("stories_parquet", columns=["title"],
+                  filters=[("source", "=", "NYT"), ("month", ">=", "2024-01")])
+
+With --archive the dataset is also packed into a zip for upload with
+dataverse.py (Dataverse unpacks zips and keeps the directory layout).
+
+Requires pyarrow (pip install pyarrow).
+"""
+
+import os
+import re
+import sys
+import sqlite3
+import zipfile
+import argparse
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+STORY_COLUMNS = ("url", "source", "publish_date", "title", "authors", "text", "extraction_date", "domain")
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}")
+
+
+def _schema():
+    return pa.schema([(column, pa.string()) for column in STORY_COLUMNS] + [("month", pa.string())])
+
+
+def _stories_table(db_file):
+    """Name of the single *_stories table in db_file"""
+    conn = sqlite3.connect(db_file)
+    try:
+        tables = [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%\\_stories' ESCAPE '\\'")]
+    finally:
+        conn.close()
+    if len(tables) != 1:
+        raise ValueError(f"Expected one *_stories table in {db_file}, found {tables}")
+    return tables[0]
+
+
+def _publish_month(publish_date):
+    """YYYY-MM of a publish date, or None (the null partition) for undated rows"""
+    if publish_date and MONTH_PATTERN.match(publish_date):
+        return publish_date[:7]
+    return None
+
+
+def iter_record_batches(db_files, chunk_size=10000, source=None):
+    """
+    Yield Arrow record batches of story rows (plus a month column) from db_files
+
+    Args:
+        db_files: Per-source SQLite databases written by create_db.py
+        chunk_size: Rows fetched from SQLite per batch
+        source: Optional value that overrides the source column
+    """
+    schema = _schema()
+    select = ", ".join(f"[{column}]" for column in STORY_COLUMNS)
+    for db_file in db_files:
+        table_name = _stories_table(db_file)
+        logger.info(f"Exporting {db_file} [{table_name}]")
+        conn = sqlite3.connect(db_file)
+        try:
+            cursor = conn.execute(f"SELECT {select} FROM [{table_name}]")
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                columns = [list(values) for values in zip(*rows)]
+                if source:
+                    columns[1] = [source] * len(rows)
+                columns[1] = [value or "unknown" for value in columns[1]]
+                columns.append([_publish_month(value) for value in columns[2]])
+                yield pa.RecordBatch.from_arrays([pa.array(values, pa.string()) for values in columns],
+                                                 schema=schema)
+        finally:
+            conn.close()
+
+
+def export_parquet(db_files, out_dir, chunk_size=10000, row_group_size=50000, source=None):
+    """
+    Write the stories in db_files to a Parquet dataset partitioned by source and month
+
+    Returns:
+        The output directory
+    """
+    schema = _schema()
+    reader = pa.RecordBatchReader.from_batches(schema, iter_record_batches(db_files, chunk_size, source))
+    file_format = ds.ParquetFileFormat()
+    ds.write_dataset(
+        reader,
+        out_dir,
+        format=file_format,
+        file_options=file_format.make_write_options(compression="zstd", use_dictionary=True),
+        partitioning=ds.partitioning(pa.schema([("source", pa.string()), ("month", pa.string())]),
+                                     flavor="hive"),
+        basename_template="part-{i}.parquet",
+        max_rows_per_group=row_group_size,
+        min_rows_per_group=min(row_group_size, 10000),
+        existing_data_behavior="delete_matching",
+    )
+    return out_dir
+
+
+def archive_dataset(out_dir, archive_path):
+    """Pack the dataset directory into a zip (stored, since Parquet is already compressed)"""
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for root, _, files in os.walk(out_dir):
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                archive.write(path, os.path.relpath(path, os.path.dirname(os.path.abspath(out_dir))))
+    return archive_path
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Export stories DBs to a partitioned Parquet dataset.')
+    parser.add_argument('db_files', nargs='+', help='Per-source databases (e.g., ../cnn.db ../nyt.db)')
+    parser.add_argument('--out', default='stories_parquet', help='Output directory (default: stories_parquet)')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows read from SQLite at a time')
+    parser.add_argument('--row-group-size', type=int, default=50000, help='Maximum rows per Parquet row group')
+    parser.add_argument('--source', help='Override the source column (only with a single DB)')
+    parser.add_argument('--archive', help='Also write the dataset to this zip for Dataverse upload')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if pa is None:
+        print("Error: pyarrow is required for Parquet export (pip install pyarrow)")
+        sys.exit(1)
+    if args.source and len(args.db_files) > 1:
+        parser.error("--source can only be used with a single database")
+
+    export_parquet(args.db_files, args.out, args.chunk_size, args.row_group_size, args.source)
+    print(f"✅ Wrote Parquet dataset to {args.out}")
+    if args.archive:
+        archive_dataset(args.out, args.archive)
+        print(f"✅ Packed {args.out} into {args.archive}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+HTML Cache
+Compressed, content-addressed store of downloaded article HTML.
+
+Each page body is stored once under the SHA-256 of its content
+(objects/ab/abcdef....html.gz), compressed with zstd when the zstandard package
+is installed and gzip otherwise. A SQLite index maps every URL to its blob, so
+extractors can re-parse from the cache without touching the network.
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+from shared import CODECS, DEFAULT_CODEC
+
+
+class HTMLCache:
+    def __init__(self, root="html_cache", codec=DEFAULT_CODEC):
+        """
+        Open (or create) the cache
+
+        Args:
+            root: Cache directory
+            codec: Compression for new blobs ("zst" or "gz")
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported codec {codec!r}; available: {', '.join(CODECS)}")
+        self.root = root
+        self.codec = codec
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def _blob_path(self, sha256, codec):
+        return os.path.join(self.root, "objects", sha256[:2], f"{sha256}.html.{codec}")
+
+    def __contains__(self, url):
+        return self.lookup(url) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT count(*) FROM pages").fetchone()[0]
+
+    def lookup(self, url):
+        """Return the blob path stored for url, or None"""
+        with self._lock:
+            row = self.conn.execute("SELECT sha256, codec FROM pages WHERE url = ?", (url,)).fetchone()
+        return self._blob_path(*row) if row else None
+
+    def get(self, url):
+        """Return the cached HTML for url as text, or None"""
+        with self._lock:
+            row = self.conn.execute("SELECT sha256, codec FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        sha256, codec = row
+        try:
+            with open(self._blob_path(sha256, codec), "rb") as f:
+                return CODECS[codec][1](f.read()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    def put(self, url, html):
+        """Store html for url and return the blob path"""
+        data = html.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha256, self.codec)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(CODECS[self.codec][0](data))
+            os.replace(tmp_path, path)
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pages (url, sha256, codec, size, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                    (url, sha256, self.codec, len(data), datetime.now().isoformat()))
+        return path
+
+    def cached_urls(self, urls):
+        """Return the subset of urls (in order) that have a cached page"""
+        with self._lock:
+            cached = {url for (url,) in self.conn.execute("SELECT url FROM pages")}
+        return [url for url in urls if url in cached]
+
+    def close(self):
+        self.conn.close()
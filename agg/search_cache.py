@@ -0,0 +1,206 @@
+"""
+Search Cache
+Persistent cache of Custom Search results and a daily-quota scheduler for
+usat_downloader.py.
+
+Results are stored in SQLite keyed by the search query (site + slug terms).
+Found articles are kept for ttl_days, "no results" answers for the shorter
+negative_ttl_days, so re-running over the same URLs costs no API calls for
+slugs that were already resolved. The same database counts the calls made per
+quota day (Google resets the Custom Search quota at midnight Pacific time),
+and SearchScheduler spreads the calls left in the day's budget over the time
+left until the reset with a token bucket, waiting for the reset once the
+budget is spent. quota_error reads Google's structured error body to tell a
+spent daily quota from a per-minute rate limit.
+"""
+
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from throttle import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+# error.errors[].reason values (and ErrorInfo reasons) of Google API errors
+DAILY_LIMIT_REASONS = {"dailyLimitExceeded", "dailyLimitExceededUnreg", "quotaExceeded"}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "RATE_LIMIT_EXCEEDED"}
+
+
+def quota_day(now=None):
+    """The current quota day as YYYY-MM-DD"""
+    return (now or datetime.now(QUOTA_TIMEZONE)).strftime("%Y-%m-%d")
+
+
+def seconds_until_reset(now=None):
+    now = now or datetime.now(QUOTA_TIMEZONE)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+
+def quota_error(payload):
+    """
+    Classify a Google API error body ({"error": {"errors": [{"reason": ...}], ...}})
+
+    Returns:
+        "daily" when the day's quota is spent, "rate" for a per-minute rate
+        limit, or None for any other error (e.g., an invalid key)
+    """
+    error = payload.get("error") if isinstance(payload, dict) else None
+    if not isinstance(error, dict):
+        return None
+    reasons = {item.get("reason") for item in error.get("errors") or [] if isinstance(item, dict)}
+    for detail in error.get("details") or []:
+        if not isinstance(detail, dict):
+            continue
+        reasons.add(detail.get("reason"))
+        # Newer responses name the exhausted limit, e.g. "DefaultPerDayPerProject"
+        if "PerDay" in str((detail.get("metadata") or {}).get("quota_limit", "")):
+            reasons.add("dailyLimitExceeded")
+    if reasons & DAILY_LIMIT_REASONS:
+        return "daily"
+    if reasons & RATE_LIMIT_REASONS or error.get("status") == "RESOURCE_EXHAUSTED":
+        return "rate"
+    return None
+
+
+class SearchCache:
+    def __init__(self, path="search_cache.db", ttl_days=90, negative_ttl_days=7):
+        """
+        Open (or create) the cache
+
+        Args:
+            path: SQLite file
+            ttl_days: Days a found result stays valid
+            negative_ttl_days: Days a "no results" answer stays valid
+        """
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS searches (
+                query TEXT PRIMARY KEY,
+                found_url TEXT,
+                found_title TEXT,
+                searched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS quota (
+                day TEXT PRIMARY KEY,
+                calls INTEGER NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def get(self, query):
+        """
+        Look up a query
+
+        Returns:
+            None on a miss (or an expired entry), otherwise (found_url,
+            found_title), which is (None, None) for a cached "no results"
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT found_url, found_title, searched_at FROM searches WHERE query = ?", (query,)).fetchone()
+        if row is None:
+            return None
+        found_url, found_title, searched_at = row
+        ttl = self.ttl if found_url else self.negative_ttl
+        if time.time() - searched_at > ttl:
+            return None
+        return found_url, found_title
+
+    def put(self, query, found_url, found_title):
+        """Store the answer to query (found_url None for no results)"""
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO searches (query, found_url, found_title, searched_at) VALUES (?, ?, ?, ?)",
+                    (query, found_url, found_title, time.time()))
+
+    def purge(self):
+        """Delete expired entries; returns the number removed"""
+        now = time.time()
+        with self._lock:
+            with self.conn:
+                return self.conn.execute(
+                    "DELETE FROM searches WHERE searched_at < ? - (CASE WHEN found_url IS NULL THEN ? ELSE ? END)",
+                    (now, self.negative_ttl, self.ttl)).rowcount
+
+    def calls(self, day):
+        """API calls recorded for a quota day"""
+        with self._lock:
+            row = self.conn.execute("SELECT calls FROM quota WHERE day = ?", (day,)).fetchone()
+        return row[0] if row else 0
+
+    def record_call(self, day, calls=1):
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO quota (day, calls) VALUES (?, ?) ON CONFLICT (day) DO UPDATE SET calls = calls + ?",
+                    (day, calls, calls))
+
+    def set_calls(self, day, calls):
+        with self._lock:
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO quota (day, calls) VALUES (?, ?)", (day, calls))
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT count(*) FROM searches").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class SearchScheduler:
+    def __init__(self, cache, daily_quota=10000, burst=100):
+        """
+        Pace API calls to fit a daily quota
+
+        The pace is the calls left today over the seconds left until the
+        reset, recomputed on every call, so a run that starts late in the
+        quota day (or after a quiet morning) can still use the whole budget.
+
+        Args:
+            cache: SearchCache holding the per-day call counts
+            daily_quota: API calls allowed per quota day
+            burst: Calls that may go out back to back before pacing starts
+        """
+        self.cache = cache
+        self.daily_quota = daily_quota
+        self.bucket = TokenBucket(self._rate(), min(burst, daily_quota))
+        self._lock = threading.Lock()
+
+    def _rate(self):
+        """Calls per second that spend what is left of today's budget by the reset"""
+        return max(1, self.remaining()) / max(1.0, seconds_until_reset())
+
+    def acquire(self):
+        """Wait for a slot in today's budget and record the call"""
+        while True:
+            with self._lock:
+                day = quota_day()
+                if self.cache.calls(day) < self.daily_quota:
+                    self.cache.record_call(day)
+                    self.bucket.set_rate(self._rate())
+                    break
+                delay = seconds_until_reset() + 1
+            logger.warning(f"Daily search quota of {self.daily_quota} used up; waiting {delay / 3600:.1f}h for the reset")
+            time.sleep(delay)
+        self.bucket.acquire()
+
+    def exhaust(self):
+        """Mark today's quota as spent (e.g., after the API reports it exceeded)"""
+        self.cache.set_calls(quota_day(), self.daily_quota)
+
+    def remaining(self):
+        return max(0, self.daily_quota - self.cache.calls(quota_day()))
@@ -0,0 +1,28 @@
+"""
+Shared
+The helpers at the repository root that agg/ uses, importable from the agg/
+scripts (which run from agg/) in one place:
+
+    read_urls       -- url_store.py: the collected URLs of a source
+    canonical_url   -- canonical.py: the identity of a URL
+    extract_slug    -- url_batch.py: the slug of a USA Today RSS URL
+    CODECS, DEFAULT_CODEC -- blob_codecs.py: blob compression (shared with feed_archive.py)
+
+This is the only module that edits sys.path. The root is appended, so agg/'s
+own modules win over root modules of the same name (concat_json.py), and
+modules at the root never import from agg/.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from blob_codecs import CODECS, DEFAULT_CODEC  # noqa: E402
+from canonical import canonical_url  # noqa: E402
+from url_batch import extract_slug  # noqa: E402
+from url_store import read_urls  # noqa: E402
+
+__all__ = ["CODECS", "DEFAULT_CODEC", "canonical_url", "extract_slug", "read_urls"]
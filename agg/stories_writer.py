@@ -0,0 +1,104 @@
+"""
+Stories Writer
+Batched, tuned SQLite writer for the {source}_stories tables.
+
+The database runs in WAL mode with configurable synchronous / cache_size /
+mmap_size pragmas, and rows are written in large single-transaction batches.
+When a batch fails because of its rows (a constraint violation or a value
+SQLite cannot bind), it is bisected until the offending rows are isolated,
+so one bad row costs a few extra transactions instead of a commit per row.
+Any other error (database locked, disk full, I/O error) is raised.
+"""
+
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Errors caused by the rows themselves; anything else is the database's problem
+ROW_ERRORS = (sqlite3.IntegrityError, sqlite3.InterfaceError, sqlite3.DataError)
+
+STORY_COLUMNS = ("url", "source", "publish_date", "title", "authors", "text", "extraction_date", "domain")
+
+
+class StoriesWriter:
+    def __init__(self, db_file, table_name, batch_size=1000, synchronous="NORMAL",
+                 cache_size=-65536, mmap_size=256 * 1024 * 1024, columns=STORY_COLUMNS):
+        """
+        Open db_file for writing rows into table_name
+
+        Args:
+            db_file: SQLite database file (the table must already exist)
+            table_name: Table to write to
+            batch_size: Rows per transaction
+            synchronous: PRAGMA synchronous (OFF, NORMAL, FULL)
+            cache_size: PRAGMA cache_size (negative values are KiB)
+            mmap_size: PRAGMA mmap_size in bytes
+            columns: Columns to write, in order
+        """
+        self.db_file = db_file
+        self.table_name = table_name
+        self.batch_size = batch_size
+        self.columns = columns
+        self.inserted = 0
+        self.failed = 0
+        self._batch = []
+
+        self.conn = sqlite3.connect(db_file, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={synchronous}")
+        self.conn.execute(f"PRAGMA cache_size={int(cache_size)}")
+        self.conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+
+        column_list = ", ".join(f"[{column}]" for column in columns)
+        placeholders = ", ".join("?" for _ in columns)
+        self._sql = f"INSERT OR REPLACE INTO [{table_name}] ({column_list}) VALUES ({placeholders})"
+
+    def add(self, row):
+        """Queue a row (dict), writing the batch once it is full"""
+        self._batch.append(tuple(row.get(column) for column in self.columns))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def add_all(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def flush(self):
+        """Write the queued rows; returns the number written"""
+        batch, self._batch = self._batch, []
+        if not batch:
+            return 0
+        written = self._write(batch)
+        self.inserted += written
+        return written
+
+    def _write(self, batch):
+        """Write batch in one transaction, bisecting on row errors to isolate bad rows"""
+        try:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(self._sql, batch)
+            self.conn.execute("COMMIT")
+            return len(batch)
+        except sqlite3.Error as e:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            if not isinstance(e, ROW_ERRORS):
+                raise
+            if len(batch) == 1:
+                logger.error(f"Failed to insert article {batch[0][0]}: {e}")
+                self.failed += 1
+                return 0
+            middle = len(batch) // 2
+            return self._write(batch[:middle]) + self._write(batch[middle:])
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
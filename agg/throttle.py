@@ -0,0 +1,92 @@
+"""
+Throttle
+Thread-safe rate limiting shared by the downloaders.
+
+DomainThrottle spaces out requests to the same domain and caps how many run at
+once, so concurrent downloads stay polite to each site. TokenBucket meters
+calls to a rate-limited API, allowing short bursts up to its capacity.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+class DomainThrottle:
+    def __init__(self, rate=5.0, connections=4):
+        """
+        Initialize the throttle
+
+        Args:
+            rate: Maximum requests per second to a single domain (0 for no limit)
+            connections: Maximum simultaneous requests to a single domain
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self.connections = connections
+        self._lock = threading.Lock()
+        self._next_slot = {}
+        self._semaphores = {}
+
+    def _domain_state(self, domain):
+        with self._lock:
+            if domain not in self._semaphores:
+                self._semaphores[domain] = threading.BoundedSemaphore(self.connections)
+                self._next_slot[domain] = 0.0
+            return self._semaphores[domain]
+
+    def _reserve(self, domain):
+        """Claim the next free start time for domain and return how long to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot[domain])
+            self._next_slot[domain] = slot + self.interval
+            return slot - now
+
+    @contextmanager
+    def limit(self, url):
+        """Hold a connection slot for url's domain, waiting for its rate limit first"""
+        domain = urlparse(url).netloc.lower()
+        semaphore = self._domain_state(domain)
+        with semaphore:
+            delay = self._reserve(domain)
+            if delay > 0:
+                time.sleep(delay)
+            yield
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        """
+        Initialize a full bucket
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held (the largest burst)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate):
+        """Change the refill rate; tokens accumulated so far are kept"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def acquire(self, tokens=1):
+        """Take tokens, sleeping until enough have accumulated"""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                delay = (tokens - self.tokens) / self.rate
+            time.sleep(delay)
@@ -1,13 +1,22 @@
 import pandas as pd
 import newspaper
-import re
 import time
 import requests
 import json
 import os
+import argparse
+import queue
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from urllib.parse import quote, urlparse
 import logging
+from newspaper.article import ArticleDownloadState
+
+from html_cache import HTMLCache
+from search_cache import SearchCache, SearchScheduler, quota_error
+from shared import extract_slug, read_urls
+from throttle import DomainThrottle
 
 # Set up logging
 logging.basicConfig(
@@ -20,57 +29,110 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_article(url, html_content):
+    """Parse stage (runs in a worker process): extract the article fields from HTML"""
+    article = newspaper.Article(url)
+    article.download(input_html=html_content)
+    article.parse()
+    return {
+        "url": url,
+        "title": article.title,
+        "text": article.text[:500] + "..." if len(article.text) > 500 else article.text,
+        "publish_date": str(article.publish_date),
+        "authors": article.authors,
+        "text_size": len(article.text),
+        "success": True
+    }
+
+
+def _checkpoint_result(line):
+    """The result dict on a complete results line, or None if the line is torn or corrupt"""
+    if not line.endswith(b'\n'):
+        return None
+    try:
+        result = json.loads(line)
+    except ValueError:
+        return None
+    return result if isinstance(result, dict) else None
+
+
+def _start_workers(inbox, handle, count, finished):
+    """Start count threads that pass items from inbox to handle until they get None"""
+    def work():
+        while True:
+            item = inbox.get()
+            if item is None:
+                return
+            try:
+                handle(item)
+            except Exception as e:
+                # Never let a worker die with items still queued behind it
+                logger.error(f"Unexpected pipeline error: {str(e)}")
+                result = item[0] if isinstance(item, tuple) else item
+                if isinstance(result, str):
+                    result = {"original_rss_url": result}
+                result.update(success=False, error=str(e))
+                finished.put(result)
+
+    workers = [threading.Thread(target=work, daemon=True) for _ in range(max(1, count))]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
 class ArticleFinder:
-    def __init__(self, api_key, search_engine_id, output_dir="downloaded_articles"):
+    def __init__(self, api_key, search_engine_id, output_dir="html_cache", search_cache_file="search_cache.db",
+                 daily_quota=10000, burst=100, cache_ttl_days=90, max_retries=5, backoff=2.0,
+                 search_url="https://www.googleapis.com/customsearch/v1", per_domain_rate=2.0,
+                 per_domain_connections=4):
         """
         Initialize the ArticleFinder with required credentials and settings
         
         Args:
             api_key: Google API key
             search_engine_id: Google Custom Search Engine ID
-            output_dir: Directory to save HTML files
+            output_dir: Directory of the compressed HTML cache (shared with create_db.py)
+            search_cache_file: SQLite cache of search results and daily API usage
+            daily_quota: Search API calls allowed per day
+            burst: Searches that may run back to back before pacing starts
+            cache_ttl_days: Days a cached search result stays valid
+            max_retries: Retries for a search on rate limits, 5xx and connection errors
+            backoff: Base retry delay in seconds, doubled on every attempt
+            search_url: Custom Search endpoint
+            per_domain_rate: Maximum article downloads per second from one domain
+            per_domain_connections: Maximum simultaneous downloads from one domain
         """
         self.api_key = api_key
         self.search_engine_id = search_engine_id
         self.output_dir = output_dir
+        self.search_url = search_url
+        self.max_retries = max_retries
+        self.backoff = backoff
         
-        # Create output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
-        logger.info(f"HTML files will be saved to {output_dir}")
+        # Open (or create) the HTML cache
+        self.cache = HTMLCache(output_dir)
+        logger.info(f"HTML will be cached in {output_dir}")
+
+        # Cached searches cost no API calls; the rest are paced to fit the daily quota
+        self.search_cache = SearchCache(search_cache_file, ttl_days=cache_ttl_days)
+        self.scheduler = SearchScheduler(self.search_cache, daily_quota=daily_quota, burst=burst)
+        logger.info(f"{len(self.search_cache)} cached searches, {self.scheduler.remaining()} API calls left today")
+
+        # Be nice to servers
+        self.throttle = DomainThrottle(rate=per_domain_rate, connections=per_domain_connections)
         
         # Track API usage to avoid exceeding limits
         self.search_count = 0
-        self.results = []
+        self.cached_search_count = 0
+        self._count_lock = threading.Lock()
     
     def extract_slug(self, url):
-        """Extract the article slug from RSS feed URLs"""
-        # Try multiple patterns to extract slugs from different URL formats
-
-        # Pattern for specific sections (newstopstories, techtopstories, etc.)
-        match = re.search(r'usatoday-(\w+)~(.*?)(?:/|$)', url)
-        if match:
-            slug = match.group(2)
-            search_term = slug.replace('-', ' ')
-            return slug, search_term
-
-        # Pattern for nation-topstories format
-        match = re.search(r'usatodaycom(\w+)-topstories~(.*?)(?:/|$)', url)
-        if match:
-            slug = match.group(2)
-            search_term = slug.replace('-', ' ')
-            return slug, search_term
-
-        # Last resort: Extract the last segment of the URL path
-        parts = url.rstrip('/').split('/')
-        if parts and len(parts) > 0:
-            last_segment = parts[-1]
-            # Check if it looks like a slug (contains dashes)
-            if '-' in last_segment and not last_segment.startswith('~'):
-                search_term = last_segment.replace('-', ' ')
-                return last_segment, search_term
+        """Extract the article slug and search term from an RSS feed URL (see url_batch.extract_slug)"""
+        return extract_slug(url)
 
-        return None, None
-    
     def search_for_article(self, search_term, site="usatoday.com"):
         """
         Search for an article using Google's Custom Search API
@@ -80,20 +142,21 @@ class ArticleFinder:
             site: The site to restrict search to
             
         Returns:
-            The URL of the first search result, or None if no results
+            (url, title) of the first search result, or (None, None) if no
+            results; answers are cached, so repeated searches are free
         """
         # Properly format the search query with site restriction
         query = f"site:{site} {search_term}"
+
+        cached = self.search_cache.get(query)
+        if cached is not None:
+            with self._count_lock:
+                self.cached_search_count += 1
+            logger.info(f"Cached search result for: {query}")
+            return cached
+
         logger.info(f"Searching for: {query}")
         
-        # Track API usage (Google CSE has limits)
-        self.search_count += 1
-        if self.search_count % 10 == 0:
-            logger.info(f"Search API count: {self.search_count}")
-        
-        # Custom Search API URL
-        search_url = "https://www.googleapis.com/customsearch/v1"
-        
         # Parameters for the API request
         params = {
             "key": self.api_key,
@@ -102,110 +165,150 @@ class ArticleFinder:
             "num": 5  # Request 5 results
         }
         
-        try:
-            # Make the API request with proper error handling
-            response = requests.get(search_url, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Check if we have search items
-                if "items" in data and len(data["items"]) > 0:
-                    # Get the first result URL
-                    result_url = data["items"][0]["link"]
-                    result_title = data["items"][0]["title"]
-                    logger.info(f"Found article: {result_title} at {result_url}")
-                    return result_url, result_title
-                else:
+        for attempt in range(self.max_retries + 1):
+            # Wait for room in the daily budget (Google CSE has limits)
+            self.scheduler.acquire()
+            with self._count_lock:
+                self.search_count += 1
+                search_count = self.search_count
+            if search_count % 10 == 0:
+                logger.info(f"Search API count: {search_count}")
+
+            limit = None
+            try:
+                # Make the API request with proper error handling
+                response = requests.get(self.search_url, params=params, timeout=30)
+                data = response.json() if response.status_code == 200 else None
+            except (requests.RequestException, ValueError) as e:
+                error = str(e)
+            else:
+                if response.status_code == 200:
+                    # Check if we have search items
+                    if "items" in data and len(data["items"]) > 0:
+                        # Get the first result URL
+                        result_url = data["items"][0]["link"]
+                        result_title = data["items"][0]["title"]
+                        logger.info(f"Found article: {result_title} at {result_url}")
+                        self.search_cache.put(query, result_url, result_title)
+                        return result_url, result_title
+
                     logger.warning(f"No search results found for '{query}'")
                     if "searchInformation" in data:
                         logger.info(f"Total results: {data['searchInformation'].get('totalResults', 0)}")
-            else:
+                    self.search_cache.put(query, None, None)
+                    return None, None
+
                 # Detailed error logging
                 logger.error(f"Search API error: {response.status_code}")
                 logger.error(f"Error details: {response.text}")
-                
-                # Handle specific error codes
-                if response.status_code == 403:
-                    logger.error("Error 403: API quota exceeded or invalid credentials")
-                elif response.status_code == 429:
-                    logger.warning("Error 429: Rate limit exceeded, waiting before retry")
-                    time.sleep(10)  # Wait longer for rate limit
-                    
-        except Exception as e:
-            logger.error(f"Search API exception: {str(e)}")
-        
+
+                try:
+                    limit = quota_error(response.json())
+                except ValueError:
+                    limit = None
+                if limit == "daily":
+                    # The next acquire() waits for the quota reset
+                    logger.error("Daily search quota exceeded")
+                    self.scheduler.exhaust()
+                elif response.status_code == 403 and limit is None:
+                    logger.error("Error 403: invalid credentials or API not enabled")
+                    return None, None
+                elif limit is None and response.status_code not in RETRY_STATUSES:
+                    return None, None
+                error = f"HTTP {response.status_code}" + (f" ({limit} limit)" if limit else "")
+
+            if attempt < self.max_retries and limit != "daily":
+                delay = min(self.backoff * 2 ** attempt, 300) * random.uniform(0.5, 1.0)
+                logger.warning(f"Search failed ({error}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+        logger.error(f"Giving up on '{query}' after {self.max_retries + 1} attempts")
         return None, None
     
-    def download_and_parse_article(self, url):
+    def download_article(self, url):
         """
-        Download and parse an article using newspaper3k
-        
-        Args:
-            url: URL of the article to download
-            
+        Download stage: return the article HTML from the cache, or download and cache it
+
         Returns:
-            Dictionary with article data and success status
+            (html, path of the cached blob)
         """
+        html_content = self.cache.get(url)
+        if html_content is not None:
+            logger.info(f"Using cached HTML for: {url}")
+            return html_content, self.cache.lookup(url)
+
         logger.info(f"Downloading article from: {url}")
-        
-        try:
-            article = newspaper.Article(url)
+        article = newspaper.Article(url)
+        with self.throttle.limit(url):
             article.download()
-            
-            # Save the HTML content
-            html_content = article.html
-            
-            # Create a filename based on the URL
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc.replace(".", "_")
-            path = parsed_url.path.strip("/").replace("/", "_")
-            if not path:
-                path = "index"
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{domain}_{path}_{timestamp}.html"
-            filepath = os.path.join(self.output_dir, filename)
-            
-            # Save the HTML
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(html_content)
-            
-            # Parse the article
-            article.parse()
-            
-            return {
-                "url": url,
-                "title": article.title,
-                "text": article.text[:500] + "..." if len(article.text) > 500 else article.text,
-                "publish_date": str(article.publish_date),
-                "authors": article.authors,
-                "html_saved_path": filepath,
-                "html_size": len(html_content),
-                "text_size": len(article.text),
-                "success": True
-            }
-            
-        except Exception as e:
-            logger.error(f"Error downloading/parsing {url}: {str(e)}")
-            return {
-                "url": url,
-                "error": str(e),
-                "success": False
-            }
-    
-    def process_rss_urls(self, urls, max_urls=None, results_file="article_results.jsonl"):
+        if article.download_state != ArticleDownloadState.SUCCESS:
+            raise RuntimeError(article.download_exception_msg or "download failed")
+        return article.html, self.cache.put(url, article.html)
+
+    def resolve_url(self, url):
+        """
+        Search stage: extract the slug from an RSS URL and find the article
+
+        Returns:
+            Result dict; it has a found_url when the article was found, and
+            success=False with an error otherwise
+        """
+        slug, search_term = self.extract_slug(url)
+        result = {
+            "original_rss_url": url,
+            "slug": slug,
+            "search_term": search_term,
+            "found_url": None,
+            "found_title": None,
+        }
+        if not slug:
+            logger.warning(f"Could not extract slug from URL: {url}")
+            result.update(success=False, error="Could not extract slug")
+            return result
+
+        logger.info(f"Extracted slug: {slug}")
+        found_url, found_title = self.search_for_article(search_term)
+        if not found_url:
+            logger.warning(f"No article found for slug: {slug}")
+            result.update(success=False, error="No article found")
+            return result
+
+        result.update(found_url=found_url, found_title=found_title)
+        return result
+
+    def process_rss_urls(self, urls, max_urls=None, results_file="article_results.jsonl",
+                         search_workers=4, download_workers=8, parse_workers=2, queue_size=64,
+                         resume=False, fsync_every=100, manifest_file=None, csv_file=None):
         """
         Process a list of RSS feed URLs to find and download the actual articles
 
+        URLs flow through three stages connected by bounded queues (search ->
+        download -> parse), each with its own thread pool; parsing runs in a
+        process pool. Results are streamed to results_file as they finish, and
+        nothing is kept in memory; the returned DataFrame is read back from the
+        JSONL at the end.
+
+        With resume=True the existing results_file is kept (minus any torn or
+        unreadable lines) and URLs it already records as successful are
+        skipped, so a killed run can be restarted cheaply. Every run is
+        recorded in a manifest next to the results file.
+
         Args:
             urls: List of RSS feed URLs
             max_urls: Maximum number of URLs to process (None for all)
             results_file: JSONL file to save results to incrementally
+            search_workers: Concurrent searches (still paced by the daily quota)
+            download_workers: Concurrent downloads (still throttled per domain)
+            parse_workers: Parser processes
+            queue_size: Capacity of each queue between stages
+            resume: Continue from results_file instead of truncating it
+            fsync_every: Results written between fsyncs of results_file
+            manifest_file: Run manifest (default: <results_file stem>.manifest.json)
+            csv_file: CSV summary (default: <results_file stem>.csv)
 
         Returns:
             Pandas DataFrame with article data
         """
-        self.results = []
         total_urls = len(urls)
 
         if max_urls:
@@ -214,104 +317,174 @@ class ArticleFinder:
         else:
             logger.info(f"Processing all {total_urls} URLs")
 
-        # Create or truncate the JSONL file at the start
-        with open(results_file, 'w') as f:
-            f.write('')  # Just create/truncate the file
-
-        for i, url in enumerate(urls):
-            logger.info(f"Processing {i+1}/{len(urls)}: {url}")
-
-            # Extract the slug
-            slug, search_term = self.extract_slug(url)
-            if not slug:
-                logger.warning(f"Could not extract slug from URL: {url}")
-
-                # Create failed entry
-                result = {
-                    "original_rss_url": url,
-                    "slug": None,
-                    "search_term": None,
-                    "found_url": None,
-                    "found_title": None,
-                    "success": False,
-                    "error": "Could not extract slug",
-                    "timestamp": datetime.now().isoformat()
-                }
-
-                # Append to JSONL file
-                self._append_to_jsonl(result, results_file)
-
-                # Also keep in memory
-                self.results.append(result)
-                continue
-
-            logger.info(f"Extracted slug: {slug}")
-            logger.info(f"Search term: {search_term}")
-
-            # Search for the article - just one simple search approach
-            found_url, found_title = self.search_for_article(search_term)
-
-            if not found_url:
-                logger.warning(f"No article found for slug: {slug}")
-                
-                # Create failed entry
-                result = {
-                    "original_rss_url": url,
-                    "slug": slug,
-                    "search_term": search_term,
-                    "found_url": None,
-                    "found_title": None,
-                    "success": False,
-                    "error": "No article found",
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                # Append to JSONL file
-                self._append_to_jsonl(result, results_file)
-                
-                # Also keep in memory
-                self.results.append(result)
-                continue
-
-            # Download and parse the article
-            article_data = self.download_and_parse_article(found_url)
-
-            # Add original URL info and search results
-            result = {
-                "original_rss_url": url,
-                "slug": slug,
-                "search_term": search_term,
-                "found_url": found_url,
-                "found_title": found_title,
-                "timestamp": datetime.now().isoformat()
-            }
-            result.update(article_data)
-
-            # Append to JSONL file
-            self._append_to_jsonl(result, results_file)
-
-            # Also keep in memory
-            self.results.append(result)
-
-            # Be nice to servers
-            time.sleep(2)
-
-        # Create DataFrame from final results
-        df = pd.DataFrame(self.results)
-
-        # Save final results as CSV as well
-        self.save_results("article_results.csv", df)
+        run = {
+            "started": datetime.now().isoformat(),
+            "results_file": results_file,
+            "resume": resume,
+            "urls": len(urls),
+            "skipped": 0,
+        }
+        if resume and os.path.exists(results_file):
+            done, size = self._read_checkpoint(results_file)
+            pending = [url for url in urls if url not in done]
+            run["skipped"] = len(urls) - len(pending)
+            urls = pending
+            logger.info(f"Resuming: {run['skipped']} URLs already done, {len(urls)} to go")
+        else:
+            size = 0
+
+        # Start a fresh run from an empty file (a resumed one is already clean)
+        with open(results_file, 'a') as f:
+            f.truncate(size)
+        run["offset"] = size
+
+        to_search = queue.Queue(queue_size)
+        to_download = queue.Queue(queue_size)
+        to_parse = queue.Queue(queue_size)
+        finished = queue.Queue(queue_size)
+
+        def search_stage(url):
+            result = self.resolve_url(url)
+            (to_download if result["found_url"] else finished).put(result)
+
+        def download_stage(result):
+            try:
+                html_content, filepath = self.download_article(result["found_url"])
+            except Exception as e:
+                logger.error(f"Error downloading {result['found_url']}: {str(e)}")
+                result.update(url=result["found_url"], error=str(e), success=False)
+                finished.put(result)
+                return
+            result.update(html_saved_path=filepath, html_size=len(html_content))
+            to_parse.put((result, html_content))
+
+        with ProcessPoolExecutor(max_workers=parse_workers) as parse_pool:
+            def parse_stage(item):
+                result, html_content = item
+                try:
+                    result.update(parse_pool.submit(parse_article, result["found_url"], html_content).result())
+                except Exception as e:
+                    logger.error(f"Error parsing {result['found_url']}: {str(e)}")
+                    result.update(url=result["found_url"], error=str(e), success=False)
+                finished.put(result)
+
+            counts = {"written": 0, "successful": 0}
+            sink = threading.Thread(target=self._write_results,
+                                    args=(finished, results_file, len(urls), counts, fsync_every))
+            sink.start()
+            stages = [
+                (to_search, _start_workers(to_search, search_stage, search_workers, finished)),
+                (to_download, _start_workers(to_download, download_stage, download_workers, finished)),
+                (to_parse, _start_workers(to_parse, parse_stage, parse_workers, finished)),
+            ]
+
+            for url in urls:
+                to_search.put(url)
+
+            # Drain the stages in order: each one's input is complete once the previous one has stopped
+            for inbox, workers in stages:
+                for _ in workers:
+                    inbox.put(None)
+                for worker in workers:
+                    worker.join()
+            finished.put(None)
+            sink.join()
+
+        logger.info(f"Search API calls: {self.search_count} (answered from cache: {self.cached_search_count})")
+
+        run.update(finished=datetime.now().isoformat(), processed=counts["written"],
+                   successful=counts["successful"], failed=counts["written"] - counts["successful"],
+                   search_api_calls=self.search_count, cached_searches=self.cached_search_count)
+        self._record_run(manifest_file or f"{os.path.splitext(results_file)[0]}.manifest.json", run)
+
+        # Build the summary from the JSONL and save it as CSV as well
+        df = self.load_results(results_file)
+        self.save_results(csv_file or f"{os.path.splitext(results_file)[0]}.csv", df)
 
         return df
 
-    def _append_to_jsonl(self, result, jsonl_file):
+    def _write_results(self, finished, results_file, total, counts, fsync_every=100, fsync_interval=5.0):
         """
-        Append a single result to a JSONL file
+        Sink stage: append finished results to the JSONL file until the queue yields None
 
-        Args:
-            result: Result dictionary to append
-            jsonl_file: Path to JSONL file
+        Each result is one write of a complete line; the file is fsynced every
+        fsync_every results or fsync_interval seconds, so a crash loses at
+        most the last unsynced batch (and _read_checkpoint drops a torn line).
+        """
+        unsynced = 0
+        last_sync = time.monotonic()
+        with open(results_file, 'a', encoding='utf-8') as f:
+            while True:
+                result = finished.get()
+                if result is None:
+                    break
+                result["timestamp"] = datetime.now().isoformat()
+                f.write(self._to_jsonl(result))
+                f.flush()
+                counts["written"] += 1
+                counts["successful"] += bool(result.get("success"))
+                unsynced += 1
+                if unsynced >= fsync_every or time.monotonic() - last_sync >= fsync_interval:
+                    os.fsync(f.fileno())
+                    unsynced, last_sync = 0, time.monotonic()
+                logger.info(f"Processed {counts['written']}/{total}: {result['original_rss_url']}")
+            os.fsync(f.fileno())
+
+    def _read_checkpoint(self, results_file):
+        """
+        Scan an existing results file, dropping unreadable lines
+
+        A torn last line (from a crash mid-write) or a corrupt line anywhere
+        in the file is skipped, and the results after it are kept. If any
+        line was dropped, the file is rewritten without it (to a temporary
+        file that then replaces the original), so appending can continue.
+
+        Returns:
+            (set of original_rss_url values recorded as successful, byte size
+            of the file)
         """
+        done = set()
+        size = 0
+        dropped = 0
+        with open(results_file, 'rb') as f:
+            for line in f:
+                result = _checkpoint_result(line)
+                if result is None:
+                    dropped += 1
+                    continue
+                size += len(line)
+                if result.get("success"):
+                    done.add(result.get("original_rss_url"))
+        if dropped:
+            logger.warning(f"Dropping {dropped} unreadable line(s) from {results_file}")
+            tmp_path = f"{results_file}.tmp"
+            with open(results_file, 'rb') as f, open(tmp_path, 'wb') as out:
+                for line in f:
+                    if _checkpoint_result(line) is not None:
+                        out.write(line)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, results_file)
+        return done, size
+
+    def _record_run(self, manifest_file, run):
+        """Append run to the manifest's list of runs (written atomically)"""
+        try:
+            with open(manifest_file, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {"runs": []}
+        manifest["runs"].append(run)
+        tmp_path = f"{manifest_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, manifest_file)
+        logger.info(f"Run recorded in {manifest_file}")
+
+    def _to_jsonl(self, result):
+        """Serialize a result as one JSONL line, truncating bulky fields"""
         # Create a copy of the result to avoid modifying the original
         result_copy = result.copy()
 
@@ -323,55 +496,86 @@ class ArticleFinder:
         if "text" in result_copy and len(result_copy["text"]) > 1000:
             result_copy["text"] = result_copy["text"][:1000] + "..."
 
-        # Append to the JSONL file
-        with open(jsonl_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(result_copy) + '\n')
+        return json.dumps(result_copy) + '\n'
 
-        logger.debug(f"Appended result for {result_copy.get('slug', 'unknown')} to {jsonl_file}")
+    def load_results(self, results_file="article_results.jsonl"):
+        """Read a results JSONL file into a DataFrame, keeping the latest result per RSS URL"""
+        with open(results_file, encoding='utf-8') as f:
+            df = pd.DataFrame([json.loads(line) for line in f if line.strip()])
+        if "original_rss_url" in df:
+            df = df.drop_duplicates("original_rss_url", keep="last").reset_index(drop=True)
+        return df
     
-    def save_results(self, filename="article_results.csv", df=None):
+    def save_results(self, filename="article_results.csv", df=None, results_file="article_results.jsonl"):
         """
-        Save results to a CSV file using append mode
+        Save results to a CSV file
+
+        The CSV is rewritten atomically from the (de-duplicated) results, so a
+        resumed run never adds duplicate rows.
 
         Args:
             filename: Name of the CSV file
-            df: DataFrame to save (uses self.results if None)
+            df: DataFrame to save (read from results_file if None)
+            results_file: JSONL file of results
 
         Returns:
             The DataFrame that was saved
         """
         if df is None:
-            df = pd.DataFrame(self.results)
+            df = self.load_results(results_file)
 
-        # Check if file exists to determine if header should be written
-        file_exists = os.path.isfile(filename)
+        tmp_path = f"{filename}.tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, filename)
 
-        # Append to file if it exists, create new file if it doesn't
-        df.to_csv(filename, mode='a', header=not file_exists, index=False)
-
-        logger.info(f"Results {'appended to' if file_exists else 'saved to'} {filename}")
+        logger.info(f"Results saved to {filename}")
 
         return df
 
-# Example usage
-if __name__ == "__main__":
-    API_KEY = ""
-    SEARCH_ENGINE_ID = ""
-
-    with open('usat_urls.json', 'r', encoding='utf-8') as f:
-        urls = json.load(f)[501:9000]
-        
-    finder = ArticleFinder(API_KEY, SEARCH_ENGINE_ID)
+def main(argv=None):
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Find USA Today articles from RSS URLs via Google search and download them.')
+    parser.add_argument('urls_file', nargs='?', default='usat_urls.json',
+                        help='Collected RSS URLs; the usat_urls.ndjson log is read when present (default: usat_urls.json)')
+    parser.add_argument('--start', type=int, default=501, help='First URL index to process (default: 501)')
+    parser.add_argument('--end', type=int, default=9000, help='URL index to stop at (default: 9000)')
+    parser.add_argument('--api-key', default=os.environ.get('GOOGLE_API_KEY', ''), help='Google API key (default: $GOOGLE_API_KEY)')
+    parser.add_argument('--cx', default=os.environ.get('GOOGLE_CSE_ID', ''), help='Custom Search Engine ID (default: $GOOGLE_CSE_ID)')
+    parser.add_argument('--results', default='article_results.jsonl', help='Results JSONL file (default: article_results.jsonl)')
+    parser.add_argument('--csv', help='CSV summary (default: the results file with a .csv extension)')
+    parser.add_argument('--resume', action='store_true', help='Skip URLs already successful in the results file instead of starting over')
+    parser.add_argument('--search-workers', type=int, default=4, help='Concurrent searches')
+    parser.add_argument('--download-workers', type=int, default=8, help='Concurrent downloads')
+    parser.add_argument('--parse-workers', type=int, default=2, help='Parser processes')
+    parser.add_argument('--daily-quota', type=int, default=10000, help='Search API calls per day')
+
+    args = parser.parse_args(argv)
+
+    urls = read_urls(args.urls_file)[args.start:args.end]
+
+    finder = ArticleFinder(args.api_key, args.cx, daily_quota=args.daily_quota)
         
-    df = finder.process_rss_urls(urls)
+    df = finder.process_rss_urls(urls, results_file=args.results, resume=args.resume,
+                                 search_workers=args.search_workers, download_workers=args.download_workers,
+                                 parse_workers=args.parse_workers, csv_file=args.csv)
         
+    # An empty results file gives a DataFrame without columns
+    succeeded = int(df['success'].sum()) if 'success' in df else 0
     print("\nResults Summary:")
     print(f"Total URLs processed: {len(df)}")
-    print(f"Successfully retrieved: {df['success'].sum()}")
-    print(f"Failed: {len(df) - df['success'].sum()}")
-        
+    print(f"Successfully retrieved: {succeeded}")
+    print(f"Failed: {len(df) - succeeded}")
+    print(f"Search API calls: {finder.search_count} (answered from cache: {finder.cached_search_count})")
+    if df.empty:
+        return
+
     # Show the DataFrame
     print("\nDataFrame Preview:")
     pd.set_option('display.max_columns', None)
     pd.set_option('display.width', 1000)
-    print(df[['slug', 'found_title', 'found_url', 'success', 'html_saved_path']].head())
\ No newline at end of file
+    columns = [c for c in ['slug', 'found_title', 'found_url', 'success', 'html_saved_path'] if c in df]
+    print(df[columns].head())
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Fast Feed Benchmark
+Times fast_feed.parse_entries against feedparser.parse on the same feed
+bodies and checks that both give the same links.
+
+Without arguments it generates RSS 2.0 and Atom feeds shaped like the ones
+we collect (CDATA descriptions, media and Dublin Core elements, categories);
+pass saved feed files or directories to use real ones.
+
+    python bench/fast_feed_bench.py
+    python bench/fast_feed_bench.py feeds/ --repeat 5
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import feedparser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fast_feed import parse_entries, _feed_files, _read
+
+RSS_ITEM = """<item>
+  <title><![CDATA[Story {i}: Lawmakers weigh a {n}-point plan &amp; more]]></title>
+  <link>https://www.example.com/2025/03/{d:02d}/politics/story-{i}-slug/index.html</link>
+  <guid isPermaLink="false">example-{i}</guid>
+  <description><![CDATA[<p>Lead paragraph of story {i} with <a href="https://www.example.com/x">a link</a>.</p>]]></description>
+  <pubDate>Mon, {d:02d} Mar 2025 1{h}:00:00 GMT</pubDate>
+  <dc:creator>Reporter {n}</dc:creator>
+  <category domain="https://www.example.com/section">Politics</category>
+  <category>Congress</category>
+  <media:content url="https://media.example.com/{i}.jpg" medium="image" width="1024" height="576"/>
+  <media:credit>Photographer {n}</media:credit>
+</item>"""
+
+RSS = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:media="http://search.yahoo.com/mrss/"
+     xmlns:atom="http://www.w3.org/2005/Atom">
+<channel><title>Example Politics</title><link>https://www.example.com/politics</link>
+<atom:link href="https://rss.example.com/politics.xml" rel="self" type="application/rss+xml"/>
+<description>Politics</description><language>en-us</language>
+{items}
+</channel></rss>"""
+
+ATOM_ENTRY = """<entry>
+  <title type="html">Story {i} &amp;amp; more</title>
+  <link rel="alternate" type="text/html" href="https://www.example.org/news/{i}"/>
+  <link rel="enclosure" href="https://media.example.org/{i}.mp3" type="audio/mpeg"/>
+  <id>tag:example.org,2025:{i}</id>
+  <published>2025-03-{d:02d}T1{h}:00:00Z</published><updated>2025-03-{d:02d}T1{h}:30:00-05:00</updated>
+  <summary type="html">&lt;p&gt;Summary {i}&lt;/p&gt;</summary>
+  <category term="world" label="World"/>
+  <author><name>Reporter {n}</name></author>
+</entry>"""
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Example News</title><id>tag:example.org,2025:feed</id>
+<updated>2025-03-01T00:00:00Z</updated>
+{items}
+</feed>"""
+
+
+def synthetic_feeds(count, items):
+    feeds = []
+    for f in range(count):
+        template, item = (ATOM, ATOM_ENTRY) if f % 4 == 3 else (RSS, RSS_ITEM)
+        body = template.format(items="\n".join(
+            item.format(i=f * 1000 + i, n=i % 7, d=1 + i % 28, h=i % 10) for i in range(items)))
+        feeds.append((f"synthetic-{f}", body.encode("utf-8")))
+    return feeds
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the fast feed parser against feedparser.')
+    parser.add_argument('paths', nargs='*', help='Saved feed files or directories (default: synthetic feeds)')
+    parser.add_argument('--feeds', type=int, default=80, help='Synthetic feeds (default: 80, one hourly run)')
+    parser.add_argument('--items', type=int, default=30, help='Items per synthetic feed (default: 30)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per timing, best kept (default: 3)')
+    args = parser.parse_args()
+
+    if args.paths:
+        feeds = [(path, _read(path)) for path in _feed_files(args.paths)]
+    else:
+        feeds = synthetic_feeds(args.feeds, args.items)
+    bodies = [body for _, body in feeds]
+
+    fast_results = [parse_entries(body) for body in bodies]
+    fallback = sum(entries is None for entries in fast_results)
+    mismatched = 0
+    for (name, body), entries in zip(feeds, fast_results):
+        if entries is not None:
+            expected = [entry["link"] for entry in feedparser.parse(body).entries if "link" in entry]
+            if [entry["link"] for entry in entries] != expected:
+                mismatched += 1
+                print(f"links differ: {name}")
+
+    fast = best_of(lambda: [parse_entries(body) for body in bodies], args.repeat)
+    reference = best_of(lambda: [feedparser.parse(body) for body in bodies], args.repeat)
+    items = sum(len(entries) for entries in fast_results if entries is not None)
+    size = sum(len(body) for body in bodies)
+
+    print(f"{len(bodies)} feeds, {items:,} items, {size / 1e6:.1f} MB; "
+          f"{fallback} left to feedparser, {mismatched} with different links")
+    print(f"  feedparser  {reference * 1000:9.1f} ms  ({reference / len(bodies) * 1000:.2f} ms per feed)")
+    print(f"  fast_feed   {fast * 1000:9.1f} ms  ({fast / len(bodies) * 1000:.2f} ms per feed)"
+          f"  {reference / fast:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
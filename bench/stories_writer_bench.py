@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Stories Writer Benchmark
+Measures insert throughput (rows/sec) of StoriesWriter into a fresh
+{source}_stories table at increasing corpus sizes, alongside the previous
+approach (sqlite_utils insert_all in batches of 100 with default pragmas) for
+sizes up to --baseline-limit.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agg"))
+from sqlite_utils import Database
+from stories_writer import StoriesWriter
+
+SCHEMA = {
+    "url": str,
+    "source": str,
+    "publish_date": str,
+    "title": str,
+    "authors": str,
+    "text": str,
+    "extraction_date": str,
+    "domain": str,
+}
+
+
+def make_rows(n, text_size):
+    text = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (text_size // 56 + 1))[:text_size]
+    for i in range(n):
+        yield {
+            "url": f"https://www.example.com/2025/03/{i % 28 + 1:02d}/story-{i}",
+            "source": "BENCH",
+            "publish_date": "2025-03-01 00:00:00",
+            "title": f"Story {i}",
+            "authors": '["Jane Doe"]',
+            "text": text,
+            "extraction_date": "2025-03-02T00:00:00",
+            "domain": "www.example.com",
+        }
+
+
+def create_table(db_file, table_name):
+    Database(db_file)[table_name].create(SCHEMA, pk="url")
+
+
+def bench_writer(db_file, table_name, n, text_size, batch_size, synchronous):
+    create_table(db_file, table_name)
+    start = time.perf_counter()
+    with StoriesWriter(db_file, table_name, batch_size=batch_size, synchronous=synchronous) as writer:
+        writer.add_all(make_rows(n, text_size))
+    return n / (time.perf_counter() - start)
+
+
+def bench_baseline(db_file, table_name, n, text_size):
+    create_table(db_file, table_name)
+    db = Database(db_file)
+    start = time.perf_counter()
+    batch = []
+    for row in make_rows(n, text_size):
+        batch.append(row)
+        if len(batch) >= 100:
+            db[table_name].insert_all(batch, pk="url")
+            batch = []
+    if batch:
+        db[table_name].insert_all(batch, pk="url")
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark StoriesWriter insert throughput.')
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='Comma-separated row counts (default: 10k,100k,1M)')
+    parser.add_argument('--text-size', type=int, default=2000, help='Characters of text per row')
+    parser.add_argument('--batch-size', type=int, default=1000, help='StoriesWriter rows per transaction')
+    parser.add_argument('--synchronous', default='NORMAL', help='SQLite synchronous pragma')
+    parser.add_argument('--baseline-limit', type=int, default=100000,
+                        help='Largest size to run the insert_all baseline on')
+    parser.add_argument('--dir', help='Directory for the scratch databases (default: a temp dir)')
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'writer rows/s':>14} {'baseline rows/s':>16}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for n in (int(size) for size in args.sizes.split(',')):
+            db_file = os.path.join(tmp, f"writer_{n}.db")
+            writer_rate = bench_writer(db_file, "bench_stories", n, args.text_size,
+                                       args.batch_size, args.synchronous)
+            os.remove(db_file)
+            if n <= args.baseline_limit:
+                db_file = os.path.join(tmp, f"baseline_{n}.db")
+                baseline = f"{bench_baseline(db_file, 'bench_stories', n, args.text_size):16,.0f}"
+                os.remove(db_file)
+            else:
+                baseline = f"{'skipped':>16}"
+            print(f"{n:>10,} {writer_rate:14,.0f} {baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+URL Batch Benchmark
+Times the batch helpers in url_batch.py against the per-URL functions they
+replace (sources.strip_query and url_batch.extract_slug) over the
+committed URL files, repeated up to --size URLs. A share of USA Today RSS
+URLs is mixed in so both slug patterns are exercised.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+from itertools import cycle, islice
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from sources import strip_query
+from url_batch import normalize_links, extract_slug, extract_slugs
+
+
+def load_urls(paths, size, usat_share):
+    urls = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            urls.extend(json.load(f))
+    usat = [f"https://rssfeeds.usatoday.com/~/{i}/usatoday-newstopstories~some-story-slug-{i}/"
+            if i % 2 else f"https://rssfeeds.usatoday.com/usatodaycomnation-topstories~another-slug-{i}/"
+            for i in range(int(size * usat_share))]
+    return list(islice(cycle(urls), size - len(usat))) + usat
+
+
+def best_of(repeat, fn, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch URL normalization and slug extraction.')
+    parser.add_argument('paths', nargs='*', help='URL files (default: the *_urls.json files in the repo root)')
+    parser.add_argument('--size', type=int, default=1000000, help='URLs per run (default: 1,000,000)')
+    parser.add_argument('--usat-share', type=float, default=0.2, help='Share of USA Today RSS URLs (default: 0.2)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the best is reported')
+    args = parser.parse_args()
+
+    urls = load_urls(args.paths or sorted(glob.glob(os.path.join(ROOT, "*_urls.json"))), args.size, args.usat_share)
+
+    print(f"{'function':<24}{'per-URL':>12}{'batch':>12}{'speedup':>10}   ({len(urls):,} URLs)")
+    for name, per_url, batch in (
+        ("strip_query", lambda: [strip_query(url) for url in urls], lambda: normalize_links(urls)),
+        ("extract_slug", lambda: [extract_slug(url) for url in urls], lambda: extract_slugs(urls)),
+    ):
+        before = best_of(args.repeat, per_url)
+        after = best_of(args.repeat, batch)
+        print(f"{name:<24}{before:>11.2f}s{after:>11.2f}s{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
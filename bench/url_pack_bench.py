@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+URL Pack Benchmark
+Compares the committed JSON URL histories with their .urlpack equivalents:
+file size (raw and gzipped JSON for reference), load time, streaming
+iteration and membership lookups.
+
+    python bench/url_pack_bench.py                  # every *_urls.json in the repo root
+    python bench/url_pack_bench.py cnn_urls.json --synthetic 1000000
+"""
+
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import random
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from url_pack import URLPack, write_pack
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_pack_urls(path):
+    with URLPack(path) as pack:
+        return pack.urls()
+
+
+def stream_pack(path):
+    with URLPack(path) as pack:
+        for _ in pack:
+            pass
+
+
+def bench(name, urls, json_path, tmp, lookups, repeat):
+    pack_path = os.path.join(tmp, name + ".urlpack")
+    start = time.perf_counter()
+    write_pack(urls, pack_path)
+    pack_write = time.perf_counter() - start
+
+    with open(json_path, "rb") as f:
+        gzip_size = len(gzip.compress(f.read(), 9))
+    json_size = os.path.getsize(json_path)
+    pack_size = os.path.getsize(pack_path)
+
+    json_load = best_of(lambda: load_json(json_path), repeat)
+    json_set = best_of(lambda: set(load_json(json_path)), repeat)
+    pack_open = best_of(lambda: URLPack(pack_path).close(), repeat)
+    pack_load = best_of(lambda: load_pack_urls(pack_path), repeat)
+    pack_stream = best_of(lambda: stream_pack(pack_path), repeat)
+
+    queries = random.Random(0).sample(urls, min(lookups, len(urls)))
+    queries += [url + "-missing" for url in queries]
+    with URLPack(pack_path) as pack:
+        start = time.perf_counter()
+        hits = sum(url in pack for url in queries)
+        lookup = (time.perf_counter() - start) / len(queries)
+    assert hits == len(queries) // 2
+
+    print(f"{name}: {len(urls):,} URLs")
+    print(f"  size     json {json_size:>12,}  json.gz {gzip_size:>10,}  urlpack {pack_size:>10,}"
+          f"  ({json_size / pack_size:.1f}x smaller than json)")
+    print(f"  load     json.load {json_load * 1000:8.1f} ms   json.load+set {json_set * 1000:8.1f} ms")
+    print(f"           pack open {pack_open * 1000:8.1f} ms   pack urls()   {pack_load * 1000:8.1f} ms"
+          f"   pack stream {pack_stream * 1000:8.1f} ms")
+    print(f"  lookup   {lookup * 1e6:.1f} us per URL in an open pack   (write {pack_write:.2f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the URL pack format against JSON.')
+    parser.add_argument('paths', nargs='*', help='JSON URL files (default: *_urls.json in the repo root)')
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help='Also benchmark a history of this many URLs built from the first file')
+    parser.add_argument('--lookups', type=int, default=1000, help='URLs to look up (default: 1000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per timing, best kept (default: 3)')
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(ROOT, "*_urls.json")))
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in paths:
+            bench(os.path.basename(path)[:-len(".json")], load_json(path), path, tmp, args.lookups, args.repeat)
+
+        if args.synthetic and paths:
+            base = load_json(paths[0])
+            urls = [f"{url.rstrip('/')}-{i // len(base)}" for i, url in
+                    zip(range(args.synthetic), (base[i % len(base)] for i in range(args.synthetic)))]
+            json_path = os.path.join(tmp, "synthetic.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(urls, f)
+            bench("synthetic", urls, json_path, tmp, args.lookups, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
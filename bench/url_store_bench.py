@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+URL Store Benchmark
+Measures the per-run de-duplication and save cost of URLStore as the history
+grows.
+
+A run is simulated as a batch of feed items (mostly already-seen URLs plus a
+few new ones) checked against a history of N URLs. Stores are keyed by
+canonical_url, as in collect.py: the first keyed open fingerprints the whole
+history (first), later opens read the fingerprints back (load). The legacy
+list-membership check is timed alongside for sizes where it finishes in
+reasonable time.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from canonical import canonical_url
+from url_store import URLStore
+
+
+def make_history(n):
+    return [f"https://www.example.com/{i // 1000}/story-{i}" for i in range(n)]
+
+
+def make_run(history, items, new_items):
+    step = max(len(history) // items, 1)
+    seen = history[::step][:items - new_items]
+    fresh = [f"https://www.example.com/new/story-{i}" for i in range(new_items)]
+    return seen + fresh
+
+
+def time_store(history, run_items):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_urls.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(history, f)
+
+        start = time.perf_counter()
+        URLStore(path, key=canonical_url)  # seed the log and the key fingerprints
+        first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store = URLStore(path, key=canonical_url)
+        load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for url in run_items:
+            store.add(url)
+        dedupe = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.save()
+        return first, load, dedupe, time.perf_counter() - start
+
+
+def time_list(history, run_items):
+    urls = list(history)
+    start = time.perf_counter()
+    for url in run_items:
+        if url not in urls:
+            urls.append(url)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-run URL de-duplication.')
+    parser.add_argument('--sizes', default='100000,1000000,10000000',
+                        help='Comma-separated history sizes (default: 100k,1M,10M)')
+    parser.add_argument('--items', type=int, default=800,
+                        help='Feed items per simulated run (default: 800)')
+    parser.add_argument('--new', type=int, default=50,
+                        help='New URLs per simulated run (default: 50)')
+    parser.add_argument('--list-limit', type=int, default=1000000,
+                        help='Largest history to time the legacy list check on')
+    args = parser.parse_args()
+
+    print(f"{'history':>12} {'first (s)':>10} {'load (s)':>10} {'store (ms)':>12} {'save (ms)':>10} "
+          f"{'list (ms)':>12}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        history = make_history(size)
+        run_items = make_run(history, args.items, args.new)
+        first, load, dedupe, save = time_store(history, run_items)
+        if size <= args.list_limit:
+            list_ms = f"{time_list(history, run_items) * 1000:12.1f}"
+        else:
+            list_ms = f"{'skipped':>12}"
+        print(f"{size:>12,} {first:10.2f} {load:10.2f} {dedupe * 1000:12.3f} {save * 1000:10.2f} {list_ms}")
+        del history
+
+
+if __name__ == "__main__":
+    main()
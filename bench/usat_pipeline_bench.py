@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+USA Today Pipeline Benchmark
+Measures URLs/sec of ArticleFinder.process_rss_urls against a local stub
+search API and article server with fixed latencies, next to the sequential
+search -> download -> parse loop it replaced.
+
+The pipeline is timed twice: unpaced (unlimited search budget, no per-domain
+rate) to show what the stage concurrency buys, and with the default
+per-domain download rate. Real runs are also paced by the daily search quota;
+the bench prints the ceiling that pacing puts on fresh URLs (searches answered
+from search_cache.db and pages already in html_cache/ are not paced).
+
+    python bench/usat_pipeline_bench.py
+    python bench/usat_pipeline_bench.py --urls 400 --search-latency 0.5
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agg"))
+from usat_downloader import ArticleFinder, parse_article
+from search_cache import seconds_until_reset
+
+RSS_URL = "https://rssfeeds.usatoday.com/~/{n}/usatoday-newstopstories~bench-story-{n}-slug/"
+PAGE = ("<html><head><title>Bench story {n}</title></head><body><article><h1>Bench story {n}</h1>"
+        + "<p>Paragraph of bench story {n}, long enough for newspaper to keep it as article text.</p>" * 20
+        + "</article></body></html>")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Custom Search results pointing back at this server, and the article pages"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/customsearch/v1":
+            time.sleep(self.server.search_latency)
+            n = parse_qs(url.query)["q"][0].split()[-2]
+            body = ('{"items": [{"link": "%s/story/%s/", "title": "Bench story %s"}]}'
+                    % (self.server.url, n, n)).encode()
+            content_type = "application/json"
+        else:
+            time.sleep(self.server.page_latency)
+            body = PAGE.format(n=url.path.strip("/").split("/")[-1]).encode()
+            content_type = "text/html"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_stub(search_latency, page_latency):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.search_latency = search_latency
+    server.page_latency = page_latency
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_finder(server, tmp, name, **kwargs):
+    directory = os.path.join(tmp, name)
+    os.makedirs(directory)
+    return ArticleFinder("key", "cx", output_dir=os.path.join(directory, "html_cache"),
+                         search_cache_file=os.path.join(directory, "search_cache.db"),
+                         search_url=server.url + "/customsearch/v1", **kwargs)
+
+
+def bench_sequential(finder, urls):
+    """The loop process_rss_urls replaced: one URL at a time through all three steps"""
+    start = time.perf_counter()
+    for url in urls:
+        result = finder.resolve_url(url)
+        html_content, _ = finder.download_article(result["found_url"])
+        parse_article(result["found_url"], html_content)
+    return len(urls) / (time.perf_counter() - start)
+
+
+def bench_pipeline(finder, urls, tmp, name, args):
+    start = time.perf_counter()
+    df = finder.process_rss_urls(urls, results_file=os.path.join(tmp, name, "results.jsonl"),
+                                 search_workers=args.search_workers, download_workers=args.download_workers,
+                                 parse_workers=args.parse_workers)
+    elapsed = time.perf_counter() - start
+    if not df["success"].all():
+        raise RuntimeError(f"{name}: {int((~df['success']).sum())} URLs failed")
+    return len(urls) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the usat_downloader pipeline against a stub server.')
+    parser.add_argument('--urls', type=int, default=100, help='URLs per pipeline run (default: 100)')
+    parser.add_argument('--sequential-urls', type=int, default=20,
+                        help='URLs for the sequential baseline (default: 20)')
+    parser.add_argument('--search-latency', type=float, default=0.3, help='Stub search latency in seconds')
+    parser.add_argument('--page-latency', type=float, default=0.5, help='Stub article latency in seconds')
+    parser.add_argument('--search-workers', type=int, default=4, help='Concurrent searches')
+    parser.add_argument('--download-workers', type=int, default=8, help='Concurrent downloads')
+    parser.add_argument('--parse-workers', type=int, default=2, help='Parser processes')
+    parser.add_argument('--daily-quota', type=int, default=10000, help='Daily search quota for the pacing ceiling')
+    parser.add_argument('--per-domain-rate', type=float, default=2.0, help='Default per-domain download rate')
+    parser.add_argument('--dir', help='Directory for the scratch caches (default: a temp dir)')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    server = start_stub(args.search_latency, args.page_latency)
+    urls = [RSS_URL.format(n=n) for n in range(args.urls)]
+    unpaced = dict(daily_quota=10 ** 9, burst=10 ** 9)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        sequential = bench_sequential(make_finder(server, tmp, "sequential", **unpaced),
+                                      urls[:args.sequential_urls])
+        pipeline = bench_pipeline(make_finder(server, tmp, "pipeline", per_domain_rate=0,
+                                              per_domain_connections=args.download_workers, **unpaced),
+                                  urls, tmp, "pipeline", args)
+        throttled = bench_pipeline(make_finder(server, tmp, "throttled", per_domain_rate=args.per_domain_rate,
+                                               **unpaced),
+                                   urls, tmp, "throttled", args)
+    server.shutdown()
+
+    print(f"Stub latency: search {args.search_latency}s, page {args.page_latency}s")
+    print(f"{'mode':<44} {'URLs/s':>8} {'speedup':>8}")
+    print(f"{'sequential loop':<44} {sequential:8.2f} {1:7.1f}x")
+    print(f"{'pipeline, unpaced':<44} {pipeline:8.2f} {pipeline / sequential:7.1f}x")
+    label = f"pipeline, {args.per_domain_rate:g}/s per domain"
+    print(f"{label:<44} {throttled:8.2f} {throttled / sequential:7.1f}x")
+
+    # Every found article is on www.usatoday.com, and every fresh URL costs a search
+    search_rate = args.daily_quota / seconds_until_reset()
+    ceiling = min(search_rate, args.per_domain_rate or float("inf"))
+    print(f"\nWith the default pacing, fresh URLs are capped at {ceiling:.2f} URLs/s right now: "
+          f"{args.daily_quota:,} searches over the {seconds_until_reset() / 3600:.1f}h until the quota "
+          f"resets ({search_rate:.2f}/s after the first burst) and {args.per_domain_rate:g} downloads/s "
+          f"from one domain.")
+
+
+if __name__ == "__main__":
+    main()
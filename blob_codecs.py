@@ -0,0 +1,25 @@
+"""
+Blob Codecs
+Compression for the content-addressed stores: the feed archive
+(feed_archive.py) and the HTML cache (agg/html_cache.py).
+
+Blobs are written with zstd when the zstandard package is installed and gzip
+otherwise; both codecs can be read whenever their package is available.
+"""
+
+import gzip
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Codec name (the blob file extension) -> (compress, decompress)
+CODECS = {
+    "gz": (lambda data: gzip.compress(data, compresslevel=6), gzip.decompress),
+}
+if zstandard is not None:
+    CODECS["zst"] = (zstandard.ZstdCompressor(level=10).compress,
+                     lambda data: zstandard.ZstdDecompressor().decompress(data))
+
+DEFAULT_CODEC = "zst" if zstandard is not None else "gz"
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Canonical URLs
+One canonical form per article, used as the identity of a URL when
+de-duplicating (URLStore at collection time, concat_json when aggregating).
+
+Every URL gets https, a lower-case host without default port or "amp." prefix,
+no fragment, no tracking parameters (utm_*, smid, outputType=amp, ...), no
+leading/trailing "amp" path segment, no trailing index.html and no trailing
+slash. Per-domain rules in RULES then fold host aliases (cnn.com,
+edition.cnn.com -> www.cnn.com), decide which query parameters identify a page
+(NPR's storyId; none for most sites) and rewrite known variants (NYT
+.amp.html pages, the same CNN video filed under several sections).
+
+The canonical form is only a key: stores keep the first form of a URL they
+saw, so existing databases stay keyed by the URLs already downloaded.
+
+    python canonical.py show https://edition.cnn.com/2024/01/02/politics/x/index.html
+    python canonical.py migrate --dry-run      # report duplicates in every source
+    python canonical.py migrate cnn npr        # drop them from these URL stores
+"""
+
+import os
+import re
+import json
+import argparse
+from collections import Counter, namedtuple
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+Rule = namedtuple("Rule", "host aliases keep_query rewrites", defaults=((), None, ()))
+Rule.__doc__ = """
+Canonicalization rule for one site
+
+    host: Canonical host name
+    aliases: Other host names serving the same pages
+    keep_query: Query parameters that identify a page (None keeps every
+        non-tracking parameter, () drops the query)
+    rewrites: (pattern, replacement) regexes applied to the path in order
+"""
+
+RULES = [
+    Rule("www.cnn.com", aliases=("cnn.com", "edition.cnn.com", "us.cnn.com", "amp.cnn.com"), keep_query=(),
+         rewrites=((r"^/cnn(/\d{4}/\d{2}/\d{2}/.*)$", r"\1"),
+                   (r"^/videos/[^/]+(?:/[^/]+)*?/(\d{4}/\d{2}/\d{2}/[^/]+)$", r"/videos/\1"))),
+    Rule("www.nytimes.com", aliases=("nytimes.com", "mobile.nytimes.com"), keep_query=(),
+         rewrites=((r"\.amp\.html$", ".html"),)),
+    Rule("www.npr.org", aliases=("npr.org",), keep_query=("storyId", "id")),
+    Rule("www.washingtonpost.com", aliases=("washingtonpost.com",), keep_query=(),
+         rewrites=((r"/amphtml(?=/|$)", ""),)),
+    Rule("www.propublica.org", aliases=("propublica.org",), keep_query=()),
+    Rule("www.latimes.com", aliases=("latimes.com",), keep_query=()),
+    Rule("www.usatoday.com", aliases=("usatoday.com",), keep_query=()),
+    Rule("www.politico.com", aliases=("politico.com",), keep_query=()),
+    Rule("www.cbsnews.com", aliases=("cbsnews.com",), keep_query=()),
+    Rule("www.nbcnews.com", aliases=("nbcnews.com",), keep_query=()),
+    Rule("abcnews.go.com", aliases=("www.abcnews.go.com",), keep_query=()),
+]
+
+# Bump when the canonical form of any URL changes; URL stores then rebuild the
+# key fingerprints they persisted
+VERSION = 1
+
+TRACKING_PARAMS = {"fbclid", "gclid", "cmpid", "partner", "emc", "smid", "smtyp", "ftag", "taid", "ref", "outputtype"}
+DEFAULT_PORTS = (":80", ":443")
+INDEX_PAGE = re.compile(r"/index\.html?$")
+
+_RULES_BY_HOST = {}
+for _rule in RULES:
+    _compiled = _rule._replace(rewrites=tuple((re.compile(pattern), repl) for pattern, repl in _rule.rewrites))
+    for _host in (_rule.host,) + tuple(_rule.aliases):
+        _RULES_BY_HOST[_host] = _compiled
+
+
+def _is_tracking(name):
+    name = name.lower()
+    return name.startswith("utm_") or name in TRACKING_PARAMS
+
+
+def canonical_url(url):
+    """
+    Return the canonical form of url (non-http(s) input is returned stripped)
+    """
+    url = url.strip()
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ("http", "https"):
+        return url
+
+    host = parts.netloc.lower()
+    if host.endswith(DEFAULT_PORTS):
+        host = host.rsplit(":", 1)[0]
+    rule = _RULES_BY_HOST.get(host)
+    if rule is None and host.startswith("amp."):
+        host = host[4:]
+        rule = _RULES_BY_HOST.get(host)
+    if rule is not None:
+        host = rule.host
+
+    path = parts.path or "/"
+    if path.startswith("/amp/"):
+        path = path[4:]
+    if path.endswith("/amp"):
+        path = path[:-4] or "/"
+    if rule is not None:
+        for pattern, repl in rule.rewrites:
+            path = pattern.sub(repl, path)
+    path = INDEX_PAGE.sub("/", path)
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    query = ""
+    if parts.query and (rule is None or rule.keep_query != ()):
+        params = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                  if not _is_tracking(name) and (rule is None or rule.keep_query is None or name in rule.keep_query)]
+        query = urlencode(sorted(params))
+
+    return f"https://{host}{path}" + (f"?{query}" if query else "")
+
+
+canonical_url.version = VERSION
+
+
+def find_duplicates(urls):
+    """
+    Split urls into the first URL seen for each canonical form and the later duplicates
+
+    Returns:
+        (kept URLs in order, list of (duplicate, kept URL it duplicates))
+    """
+    first = {}
+    kept, duplicates = [], []
+    for url in urls:
+        key = canonical_url(url)
+        if key in first:
+            duplicates.append((url, first[key]))
+        else:
+            first[key] = url
+            kept.append(url)
+    return kept, duplicates
+
+
+def _load_urls(path):
+    """URLs of a source without creating its log (for dry runs)"""
+    from url_store import URLStore, _base_path
+    if os.path.exists(_base_path(path) + ".ndjson"):
+        return URLStore(path).urls
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def migrate(sources, dry_run=False, verbose=False):
+    """
+    Drop the URLs whose canonical form was already collected earlier from each source's store
+
+    A run interrupted after its commit point is completed first, as
+    compacting resets the offsets its journal refers to.
+
+    Returns:
+        Dictionary of source name to (URLs before, duplicates removed)
+    """
+    from url_store import URLStore, RunWriter, _base_path
+
+    if not dry_run:
+        RunWriter()
+    report = {}
+    owners = Counter()
+    for source in sources:
+        path = f"{source.name}_urls.json"
+        if not os.path.exists(path) and not os.path.exists(_base_path(path) + ".ndjson"):
+            continue
+        if dry_run:
+            urls = _load_urls(path)
+        else:
+            store = URLStore(path, indent=source.indent)
+            urls = store.urls
+        kept, duplicates = find_duplicates(urls)
+        owners.update({canonical_url(url) for url in kept})
+        report[source.name] = (len(urls), len(duplicates))
+        if verbose:
+            for duplicate, original in duplicates:
+                print(f"    {duplicate}  ->  {original}")
+        if duplicates and not dry_run:
+            store.urls = kept
+            store.compact()
+            if os.path.exists(path):
+                store.export_json()
+
+    removed = sum(count for _, count in report.values())
+    for name, (before, count) in report.items():
+        print(f"{name:<10} {before:>8} URLs  {count:>6} duplicates")
+    print(f"{'Removing' if not dry_run else 'Would remove'} {removed} duplicate URLs "
+          f"({removed} redundant downloads/parses in create_db.py)")
+    shared = sum(count - 1 for count in owners.values() if count > 1)
+    print(f"{shared} further URLs appear in more than one source's list (downloaded once per source DB)")
+    return report
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Canonical URL forms and duplicate removal for the URL stores.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    show_parser = subparsers.add_parser('show', help='Print the canonical form of URLs')
+    show_parser.add_argument('urls', nargs='+')
+
+    migrate_parser = subparsers.add_parser('migrate', help='Remove duplicate URLs from the URL stores')
+    migrate_parser.add_argument('sources', nargs='*', metavar='SOURCE', help='Sources (default: all)')
+    migrate_parser.add_argument('--dry-run', action='store_true', help='Only report what would be removed')
+    migrate_parser.add_argument('--verbose', action='store_true', help='List every duplicate')
+
+    args = parser.parse_args()
+
+    if args.command == 'show':
+        for url in args.urls:
+            print(canonical_url(url))
+        return
+
+    from sources import SOURCES
+    unknown = [name for name in args.sources if name not in SOURCES]
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(unknown)}")
+    migrate([SOURCES[name] for name in (args.sources or SOURCES)], dry_run=args.dry_run, verbose=args.verbose)
+
+
+if __name__ == "__main__":
+    main()
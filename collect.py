@@ -0,0 +1,255 @@
+"""
+Collect
+Pulls the feeds of any subset of the registered sources in one process and
+appends new article URLs to each source's URL store.
+
+    python collect.py              # every source in sources.SOURCES
+    python collect.py nyt cnn      # just these two
+    python collect.py --replay latest   # rerun the last run from feed_archive/ into a scratch dir
+    python metrics.py report            # per-feed latency from collect_metrics.ndjson
+
+The per-source scripts (nyt.py, cnn.py, ...) are shortcuts for a single source.
+"""
+
+import os
+import glob
+import shutil
+import argparse
+import tempfile
+from datetime import datetime, timezone
+
+from canonical import canonical_url
+from feed_archive import ArchiveFetcher, FeedArchive
+from feed_entries import EntryStore, timestamp
+from fetcher import FeedFetcher, ValidatorCache
+from metrics import RunMetrics
+from sources import SOURCES
+from url_batch import normalize_links
+from url_store import RunWriter, URLStore
+
+
+def collect(sources, fetcher=None, entries=None, archive=None, seen=None, writer=None, metrics=None,
+            root=".", run=None):
+    """
+    Fetch every feed of every source concurrently and update the URL stores
+
+    Nothing is written until every feed has been processed. The entry store
+    and the archive are committed first, then a RunWriter commits the new
+    URLs of all sources at once and records the run's counts in the
+    manifest. Feeds reported unchanged by the fetcher's validator cache are
+    skipped; the cache is saved last, so a failed run never marks a feed as
+    already processed.
+
+    Args:
+        sources: Iterable of sources.Source
+        fetcher: FeedFetcher to use (a default one is created if None)
+        entries: Optional feed_entries.EntryStore to record the entries in
+        archive: Optional feed_archive.FeedArchive to keep the fetched bodies in
+        seen: Run timestamp (default: now)
+        writer: url_store.RunWriter committing the URL stores (a default
+            one for root is created if None)
+        metrics: Optional metrics.RunMetrics recording every feed; written
+            after the run is committed
+        root: Directory of the URL stores
+        run: Run id in the manifest (default: seen); it must be unique, as
+            the manifest skips a record whose run matches the last one
+
+    Returns:
+        Dictionary of source name to number of new URLs
+    """
+    sources = list(sources)
+    fetcher = fetcher or FeedFetcher()
+    seen = seen or timestamp()
+    results, parsed = fetcher.fetch_and_parse(url for source in sources for url in source.feeds)
+    if archive is not None:
+        for source in sources:
+            for url in source.feeds:
+                archive.add(seen, source.name, results[url])
+
+    writer = writer or RunWriter(root)
+    stores, counts = {}, {}
+    for source in sources:
+        store = stores[source.name] = URLStore(os.path.join(root, f"{source.name}_urls.json"),
+                                               indent=source.indent, key=canonical_url)
+        count = counts[source.name] = {"feeds": len(source.feeds), "unchanged": 0, "failed": 0, "items": 0}
+        for url in source.feeds:
+            result = results[url]
+            if result.unchanged:
+                count["unchanged"] += 1
+                if entries is not None:
+                    entries.touch_feed(url, seen)
+                if metrics is not None:
+                    metrics.feed(seen, source.name, result, outcome="unchanged")
+                continue
+            if url not in parsed:
+                count["failed"] += 1
+                print(f"Error processing feed {url}: {result.error}")
+                if metrics is not None:
+                    metrics.feed(seen, source.name, result, outcome="error")
+                continue
+            feed = parsed[url]
+            if feed.bozo and source.skip_bozo:
+                count["failed"] += 1
+                print(f"Warning: Failed to parse feed {url}")
+                if metrics is not None:
+                    metrics.feed(seen, source.name, result, feed, outcome="bozo")
+                continue
+            links, articles = [], []
+            for article in feed.entries:
+                if 'link' not in article:
+                    print(f"Warning: Missing 'link' key in article from feed {url}")
+                    continue
+                links.append(article['link'])
+                articles.append(article)
+            links = normalize_links(links, source.normalize)
+            count["items"] += len(links)
+            new = sum(store.add(link) for link in links)
+            if entries is not None:
+                entries.add_feed(source.name, url, zip(links, articles), seen)
+            if metrics is not None:
+                metrics.feed(seen, source.name, result, feed, items=len(links), new=new)
+
+    record = {"sources": counts}
+    if run is not None and run != seen:
+        record["seen"] = seen
+    if entries is not None:
+        record["entries"], record["sightings"] = entries.commit()
+    if archive is not None:
+        record["archived"] = archive.commit()
+    writer.commit(run or seen, stores, record)
+    if fetcher.cache:
+        fetcher.cache.save()
+    if metrics is not None:
+        metrics.write()
+    return {name: store.added for name, store in stores.items()}
+
+
+def scratch_stores(sources, directory, root="."):
+    """Copy the URL stores of sources from root into directory, for a replay that leaves them alone"""
+    os.makedirs(directory, exist_ok=True)
+    for source in sources:
+        for path in glob.glob(os.path.join(root, f"{source.name}_urls.*")):
+            if not path.endswith((".tmp", ".run")):
+                shutil.copy2(path, directory)
+    return directory
+
+
+def replay(sources, archive, run, entries=None, parse_workers=None, fast_parse=True, root="."):
+    """
+    Run collect() over archived runs instead of the network
+
+    The validator cache is not touched, and sources with no feed in a run are
+    skipped. Each replayed run is recorded in root's manifest under its own
+    id (replay@<start>:<archived run>), next to the archived run's time.
+
+    Args:
+        sources: Iterable of sources.Source
+        archive: feed_archive.FeedArchive to read
+        run: Run timestamp, 'latest' or 'all'
+        entries: Optional feed_entries.EntryStore (entries are recorded at
+            the archived run's time)
+        root: Directory of the URL stores and manifest to write (see
+            scratch_stores to leave the live ones alone)
+
+    Returns:
+        Dictionary of source name to number of new URLs over the replayed runs
+    """
+    runs = [name for name, _, _ in archive.runs()]
+    if run == 'latest':
+        runs = runs[-1:]
+    elif run != 'all':
+        if run not in runs:
+            raise SystemExit(f"No archived run {run!r} in {archive.root}")
+        runs = [run]
+
+    started = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+    added = {}
+    for name in runs:
+        fetcher = ArchiveFetcher(archive, name, parse_workers=parse_workers, fast_parse=fast_parse)
+        archived = [source for source in sources if any(url in fetcher.snapshots for url in source.feeds)]
+        for source, count in collect(archived, fetcher, entries, seen=name, root=root,
+                                     run=f"replay@{started}:{name}").items():
+            added[source] = added.get(source, 0) + count
+        print(f"Replayed run {name}: {len(fetcher.snapshots)} feeds")
+    for name, count in added.items():
+        print(f"{name}: {count} new URLs")
+    return added
+
+
+def main(argv=None):
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Collect article URLs from news feeds.')
+    parser.add_argument('sources', nargs='*', metavar='SOURCE',
+                        help=f"Sources to collect (default: all of {', '.join(SOURCES)})")
+    parser.add_argument('--workers', type=int, default=32, help='Download threads (default: 32)')
+    parser.add_argument('--per-host', type=int, default=4,
+                        help='Maximum simultaneous connections per host (default: 4)')
+    parser.add_argument('--parse-workers', type=int,
+                        help='Parser processes (default: one per CPU, 0 to parse in-process)')
+    parser.add_argument('--timeout', type=float, default=30, help='Request timeout in seconds')
+    parser.add_argument('--feedparser', action='store_true',
+                        help='Parse every feed with feedparser (skip the fast parser)')
+    parser.add_argument('--cache', default='feed_cache.json',
+                        help='Feed validator cache file (default: feed_cache.json)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always download and parse every feed')
+    parser.add_argument('--entries', default='feed_entries.db',
+                        help='Feed entry store (default: feed_entries.db)')
+    parser.add_argument('--no-entries', action='store_true',
+                        help='Only collect URLs, do not record entry metadata')
+    parser.add_argument('--archive', default='feed_archive',
+                        help='Archive of fetched feed bodies (default: feed_archive)')
+    parser.add_argument('--no-archive', action='store_true', help='Do not archive the fetched feeds')
+    parser.add_argument('--metrics', default='collect_metrics.ndjson',
+                        help='Per-feed metrics, one JSON line per feed and run (default: collect_metrics.ndjson)')
+    parser.add_argument('--no-metrics', action='store_true', help='Do not record per-feed metrics')
+    parser.add_argument('--prometheus', metavar='PATH',
+                        help="Also write the run's metrics as a Prometheus textfile (node_exporter)")
+    parser.add_argument('--replay', metavar='RUN',
+                        help="Collect from an archived run instead of the network ('latest', 'all' or a run "
+                             "timestamp), into a scratch copy of the URL stores")
+    parser.add_argument('--replay-dir', metavar='DIR',
+                        help='Scratch directory for --replay (default: a new temporary directory)')
+    parser.add_argument('--commit', action='store_true',
+                        help='With --replay, write the live URL stores, entry store and manifest instead')
+
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.sources if name not in SOURCES]
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(unknown)}")
+
+    if args.commit and args.replay_dir:
+        parser.error("--commit writes the live stores; it cannot be combined with --replay-dir")
+    if (args.commit or args.replay_dir) and not args.replay:
+        parser.error("--commit and --replay-dir only apply to --replay")
+
+    sources = [SOURCES[name] for name in args.sources or SOURCES]
+    if args.replay:
+        root = "." if args.commit else scratch_stores(sources, args.replay_dir or tempfile.mkdtemp(prefix="replay-"))
+        entries_path = args.entries if args.commit else os.path.join(root, os.path.basename(args.entries))
+        entries = None if args.no_entries else EntryStore(entries_path)
+        replay(sources, FeedArchive(args.archive), args.replay, entries,
+               parse_workers=args.parse_workers, fast_parse=not args.feedparser, root=root)
+        if not args.commit:
+            print(f"Replayed into {root}; the live stores are unchanged (use --commit to write them)")
+        return
+
+    entries = None if args.no_entries else EntryStore(args.entries)
+
+    cache = None if args.no_cache else ValidatorCache(args.cache)
+    fetcher = FeedFetcher(max_workers=args.workers, per_host=args.per_host,
+                          parse_workers=args.parse_workers, timeout=args.timeout, cache=cache,
+                          fast_parse=not args.feedparser)
+    archive = None if args.no_archive else FeedArchive(args.archive)
+    metrics = RunMetrics(None if args.no_metrics else args.metrics, args.prometheus)
+    added = collect(sources, fetcher, entries, archive, metrics=metrics)
+    for name, count in added.items():
+        print(f"{name}: {count} new URLs")
+    for elapsed, url in metrics.slowest():
+        print(f"Slowest: {url} ({elapsed:.2f}s)")
+    if cache:
+        print(cache.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Fast Feed
+Lightweight parser for well-formed RSS 2.0, RSS 1.0 (RDF) and Atom feeds.
+
+feedparser sniffs encodings, sanitizes HTML and copes with broken markup; the
+collectors only need each item's link (plus the title, summary, dates and
+categories kept in feed_entries.db). parse_entries streams the items out of
+the feed bytes with lxml's iterparse (xml.etree when lxml is missing) and
+returns entry dicts with the keys collect.py reads, following feedparser's
+rules for which link wins (the last <link>, else a permalink <guid>; in Atom,
+the last alternate HTML link). Anything it is not sure about (malformed XML,
+an unknown root element, a relative or missing link) returns None, and
+fetcher.parse_feed falls back to feedparser, which also reports the bozo
+feeds collect.py checks for.
+
+Feeds are untrusted input. The parser never resolves entities or touches the
+network (older lxml releases, such as the pinned 4.9, expand external
+entities by default), and a feed whose DOCTYPE declares any entity goes to
+feedparser, which strips the declarations.
+
+Summaries are the raw feed text (feedparser would sanitize the HTML).
+
+    python fast_feed.py --check feeds/            # parity with feedparser over saved feeds
+    python fast_feed.py feed.xml                  # print the links
+"""
+
+import os
+import re
+import sys
+import argparse
+from io import BytesIO
+
+try:
+    from lxml import etree
+    LXML = True
+except ImportError:
+    import xml.etree.ElementTree as etree
+    LXML = False
+
+from feedparser.datetimes import _parse_date
+from feedparser.datetimes.rfc822 import _parse_date_rfc822
+
+RSS1 = "{http://purl.org/rss/1.0/}"
+RDF = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}"
+ATOM = ("{http://www.w3.org/2005/Atom}", "{http://purl.org/atom/ns#}")
+DC = "{http://purl.org/dc/elements/1.1/}"
+CONTENT = "{http://purl.org/rss/1.0/modules/content/}"
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+# No entity expansion, no external DTDs or entities, no network, bounded trees
+PARSER_OPTIONS = dict(resolve_entities=False, no_network=True, huge_tree=False, load_dtd=False)
+ENTITY_DECLARATION = re.compile(rb"<!DOCTYPE[^>\[]*\[[^\]]*<!ENTITY", re.IGNORECASE)
+
+# Root element -> (item tag, namespace of the item's children)
+ROOTS = {
+    "rss": ("item", ""),
+    RDF + "RDF": (RSS1 + "item", RSS1),
+    ATOM[0] + "feed": (ATOM[0] + "entry", ATOM[0]),
+    ATOM[1] + "feed": (ATOM[1] + "entry", ATOM[1]),
+}
+
+
+class Unsupported(Exception):
+    """The feed needs feedparser"""
+
+
+def _text(element):
+    """Text content of an element, including any child markup, stripped"""
+    return "".join(element.itertext()).strip()
+
+
+def _is_absolute(link):
+    return link.startswith(("http://", "https://"))
+
+
+def _date(value, rfc822=False):
+    """feedparser's date parsing, trying RFC 822 first for RSS pubDate"""
+    if not value:
+        return None
+    return (rfc822 and _parse_date_rfc822(value)) or _parse_date(value)
+
+
+def _rss_entry(item, ns):
+    link = guid = title = summary = content = published = updated = None
+    tags = []
+    for child in item:
+        tag = child.tag
+        if not isinstance(tag, str):
+            continue
+        if tag == ns + "link":
+            link = _text(child)
+        elif tag == ns + "title":
+            title = _text(child)
+        elif tag == ns + "description":
+            summary = _text(child)
+        elif tag == CONTENT + "encoded":
+            if content is None:
+                content = _text(child)
+        elif tag == "pubDate":
+            published = _date(_text(child), rfc822=True)
+        elif tag == DC + "date":
+            updated = _date(_text(child))
+        elif tag == "guid":
+            if child.get("isPermaLink", "true").strip().lower() != "false":
+                guid = _text(child)
+        elif tag == "category" or tag == DC + "subject":
+            term = _text(child)
+            if term:
+                tags.append({"term": term})
+    return _entry(link or guid, title, summary if summary is not None else content, published, updated, tags)
+
+
+def _atom_entry(entry, ns):
+    link = title = summary = content = published = updated = None
+    tags = []
+    for child in entry:
+        tag = child.tag
+        if not isinstance(tag, str):
+            continue
+        if tag == ns + "link":
+            if child.get("rel", "alternate") == "alternate" and child.get("type", "text/html") in HTML_TYPES:
+                link = (child.get("href") or "").strip()
+        elif tag == ns + "title":
+            title = _text(child)
+        elif tag == ns + "summary":
+            summary = _text(child)
+        elif tag == ns + "content":
+            if content is None:
+                content = _text(child)
+        elif tag == ns + "published" or tag == ns + "issued":
+            published = _date(_text(child))
+        elif tag == ns + "updated" or tag == ns + "modified":
+            updated = _date(_text(child))
+        elif tag == ns + "category":
+            if child.get("term"):
+                tags.append({"term": child.get("term").strip()})
+    return _entry(link, title, summary if summary is not None else content, published, updated, tags)
+
+
+def _entry(link, title, summary, published, updated, tags):
+    if not link or not _is_absolute(link):
+        raise Unsupported(f"missing or relative link {link!r}")
+    entry = {"link": link}
+    if title is not None:
+        entry["title"] = title
+    if summary is not None:
+        entry["summary"] = summary
+    if published is not None:
+        entry["published_parsed"] = published
+    if updated is not None:
+        entry["updated_parsed"] = updated
+    if tags:
+        entry["tags"] = tags
+    return entry
+
+
+def _declares_entities(root):
+    dtd = root.getroottree().docinfo.internalDTD
+    return dtd is not None and any(True for _ in dtd.iterentities())
+
+
+def iter_entries(body):
+    """
+    Yield the entries of a feed as they are parsed
+
+    Raises:
+        Unsupported (or a parser error) if the feed needs feedparser
+    """
+    if ENTITY_DECLARATION.search(body):
+        raise Unsupported("DOCTYPE declares entities")
+    if LXML:
+        events = etree.iterparse(BytesIO(body), events=("start", "end"), **PARSER_OPTIONS)
+    else:
+        events = etree.iterparse(BytesIO(body), events=("start", "end"))
+    root = item_tag = ns = None
+    for event, element in events:
+        if root is None:
+            root = element
+            # Catches declarations the byte scan misses (e.g., UTF-16 feeds)
+            if LXML and _declares_entities(element):
+                raise Unsupported("DOCTYPE declares entities")
+            if element.tag not in ROOTS:
+                raise Unsupported(f"root element {element.tag!r}")
+            item_tag, ns = ROOTS[element.tag]
+            atom = ns in ATOM
+            continue
+        if event != "end" or element.tag != item_tag:
+            continue
+        yield _atom_entry(element, ns) if atom else _rss_entry(element, ns)
+        element.clear()
+        if LXML:
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+
+def parse_entries(body):
+    """
+    Entries of a well-formed feed as feedparser-style dicts (link, title,
+    summary, published_parsed, updated_parsed, tags)
+
+    Returns:
+        List of entry dicts, or None if the feed should go to feedparser
+    """
+    if not body:
+        return None
+    try:
+        return list(iter_entries(body))
+    except (Unsupported, etree.ParseError, ValueError):
+        return None
+
+
+def _feed_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                for filename in sorted(filenames):
+                    yield os.path.join(dirpath, filename)
+        else:
+            yield path
+
+
+def _read(path):
+    if path.endswith(".gz"):
+        import gzip
+        with gzip.open(path, "rb") as f:
+            return f.read()
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def check(bodies):
+    """
+    Compare parse_entries with feedparser over (name, body) pairs
+
+    Links must match exactly; titles, dates, categories and summaries (as
+    stored by feed_entries.py) are reported.
+
+    Returns:
+        Number of feeds whose links differ
+    """
+    import feedparser
+    from feed_entries import entry_fields
+
+    feeds = fast = link_mismatches = 0
+    fields = {"title": [0, 0], "published": [0, 0], "categories": [0, 0], "summary": [0, 0]}
+    for name, body in bodies:
+        feeds += 1
+        entries = parse_entries(body)
+        if entries is None:
+            continue
+        fast += 1
+        reference = [dict(entry) for entry in feedparser.parse(body).entries if "link" in entry]
+        links, expected = [e["link"] for e in entries], [e["link"] for e in reference]
+        if links != expected:
+            link_mismatches += 1
+            print(f"{name}: links differ ({len(links)} vs {len(expected)} from feedparser)")
+            for got, want in [(g, w) for g, w in zip(links, expected) if g != w][:3]:
+                print(f"    {got!r} != {want!r}")
+            continue
+        for got, want in zip(entries, reference):
+            got, want = entry_fields(got), entry_fields(want)
+            for field, counts in fields.items():
+                counts[0] += got[field] == want[field]
+                counts[1] += 1
+
+    print(f"{feeds} feeds: {fast} parsed by the fast path, {feeds - fast} left to feedparser, "
+          f"{link_mismatches} with different links")
+    for field, (same, total) in fields.items():
+        print(f"  {field}: {same}/{total} entries identical")
+    return link_mismatches
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Fast RSS/Atom link extraction with a feedparser parity check.')
+    parser.add_argument('paths', nargs='+', help='Feed files or directories of saved feeds (.gz allowed)')
+    parser.add_argument('--check', action='store_true', help='Compare with feedparser instead of printing links')
+
+    args = parser.parse_args()
+    bodies = ((path, _read(path)) for path in _feed_files(args.paths))
+    if args.check:
+        sys.exit(1 if check(bodies) else 0)
+
+    for path, body in bodies:
+        entries = parse_entries(body)
+        if entries is None:
+            print(f"{path}: needs feedparser", file=sys.stderr)
+            continue
+        for entry in entries:
+            print(entry["link"])
+
+
+if __name__ == "__main__":
+    main()
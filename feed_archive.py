@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Feed Archive
+Compressed, content-addressed archive of the feed bodies fetched by each run.
+
+A body is stored once under the SHA-256 of its content
+(feed_archive/objects/ab/abcdef....xml.gz; zstd when the zstandard package is
+installed), so an hourly run only adds the feeds that changed. The SQLite
+index (feed_archive/index.db) has one row per run and feed with the HTTP
+status, headers and blob; a 304 points at the body it confirmed.
+
+ArchiveFetcher serves a run from the archive with the FeedFetcher interface,
+so collect.py --replay runs the whole pipeline offline, at disk speed, e.g.
+to re-derive URLs after a normalization change or as a fixed input for
+benchmarks:
+
+    python collect.py --replay latest            # the last archived run
+    python collect.py --replay all               # every run, oldest first
+    python feed_archive.py runs                  # list archived runs
+    python feed_archive.py export RUN feeds/     # write a run's bodies as files
+    python feed_archive.py prune --keep-days 14  # drop older runs and unreferenced bodies
+
+The archive is not committed; the scheduled workflow carries it from run to
+run in the GitHub Actions cache and prunes it to bound the cache size.
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+
+from feed_entries import timestamp
+from fetcher import FeedFetcher, FetchResult
+from blob_codecs import CODECS, DEFAULT_CODEC
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    run TEXT NOT NULL,
+    source TEXT NOT NULL,
+    feed TEXT NOT NULL,
+    status INTEGER,
+    final_url TEXT,
+    headers TEXT,
+    sha256 TEXT REFERENCES blobs (sha256),
+    error TEXT,
+    elapsed REAL,
+    PRIMARY KEY (run, feed)
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_feed ON snapshots (feed, run);
+CREATE INDEX IF NOT EXISTS idx_snapshots_source ON snapshots (source, run);
+"""
+
+
+class FeedArchive:
+    def __init__(self, root="feed_archive", codec=DEFAULT_CODEC):
+        """
+        Open (or create) the archive
+
+        Args:
+            root: Archive directory
+            codec: Compression for new blobs ("zst" or "gz")
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported codec {codec!r}; available: {', '.join(CODECS)}")
+        self.root = root
+        self.codec = codec
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "index.db"), isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._blobs = {}
+        self._snapshots = []
+        self.bytes_stored = 0
+
+    def _blob_path(self, sha256, codec):
+        return os.path.join(self.root, "objects", sha256[:2], f"{sha256}.xml.{codec}")
+
+    def _codec(self, sha256):
+        row = self.conn.execute("SELECT codec FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        return row[0] if row else None
+
+    def add(self, run, source, result):
+        """
+        Stage a fetcher.FetchResult of a run; the body is written right away,
+        the index row on commit()
+        """
+        sha256 = None
+        if result.body is not None:
+            sha256 = hashlib.sha256(result.body).hexdigest()
+            with self._lock:
+                known = sha256 in self._blobs or self._codec(sha256) is not None
+            if not known:
+                path = self._blob_path(sha256, self.codec)
+                data = CODECS[self.codec][0](result.body)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                with self._lock:
+                    self._blobs[sha256] = (sha256, self.codec, len(result.body), len(data))
+                    self.bytes_stored += len(data)
+        elif result.unchanged:
+            sha256 = self.latest_blob(result.url)
+        with self._lock:
+            self._snapshots.append((run, source, result.url, result.status, result.final_url,
+                                    json.dumps(result.headers, sort_keys=True), sha256, result.error,
+                                    result.elapsed))
+
+    def commit(self):
+        """Write the staged index rows in one transaction; returns the number of snapshots"""
+        with self._lock:
+            blobs, snapshots = list(self._blobs.values()), self._snapshots
+            self._blobs, self._snapshots = {}, []
+        cur = self.conn.cursor()
+        cur.execute("BEGIN")
+        try:
+            cur.executemany("INSERT OR IGNORE INTO blobs (sha256, codec, size, stored) VALUES (?, ?, ?, ?)", blobs)
+            cur.executemany("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", snapshots)
+            cur.execute("COMMIT")
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+        return len(snapshots)
+
+    def latest_blob(self, feed):
+        """SHA-256 of the last archived body of feed, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT sha256 FROM snapshots WHERE feed = ? AND sha256 IS NOT NULL ORDER BY run DESC LIMIT 1",
+                (feed,)).fetchone()
+        return row[0] if row else None
+
+    def body(self, sha256):
+        """The archived body with this hash"""
+        with self._lock:
+            codec = self._codec(sha256)
+        if codec is None:
+            raise KeyError(sha256)
+        with open(self._blob_path(sha256, codec), "rb") as f:
+            return CODECS[codec][1](f.read())
+
+    def runs(self):
+        """(run, feeds, bodies) for every archived run, oldest first"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT run, count(*), count(sha256) FROM snapshots GROUP BY run ORDER BY run").fetchall()
+
+    def snapshots(self, run):
+        """{feed: (source, status, final_url, headers, sha256, error)} for a run"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT feed, source, status, final_url, headers, sha256, error FROM snapshots WHERE run = ?",
+                (run,)).fetchall()
+        return {feed: (source, status, final_url, json.loads(headers or "{}"), sha256, error)
+                for feed, source, status, final_url, headers, sha256, error in rows}
+
+    def prune(self, keep_days):
+        """
+        Drop the runs older than keep_days and the bodies no remaining run uses
+
+        Returns:
+            (runs removed, bodies removed, bytes freed on disk)
+        """
+        cutoff = timestamp(datetime.now(timezone.utc) - timedelta(days=keep_days))
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                runs = cur.execute("SELECT count(DISTINCT run) FROM snapshots WHERE run < ?", (cutoff,)).fetchone()[0]
+                cur.execute("DELETE FROM snapshots WHERE run < ?", (cutoff,))
+                orphans = cur.execute("""
+                    SELECT sha256, codec, stored FROM blobs
+                    WHERE sha256 NOT IN (SELECT sha256 FROM snapshots WHERE sha256 IS NOT NULL)
+                """).fetchall()
+                cur.executemany("DELETE FROM blobs WHERE sha256 = ?", [(sha256,) for sha256, _, _ in orphans])
+                cur.execute("COMMIT")
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+        # Files go only after the index no longer points at them
+        for sha256, codec, _ in orphans:
+            try:
+                os.remove(self._blob_path(sha256, codec))
+            except FileNotFoundError:
+                pass
+        return runs, len(orphans), sum(stored for _, _, stored in orphans)
+
+    def close(self):
+        self.conn.close()
+
+
+class ArchiveFetcher(FeedFetcher):
+    def __init__(self, archive, run, parse_workers=None, fast_parse=True, max_workers=8):
+        """
+        FeedFetcher that serves one archived run instead of the network
+
+        A feed answered with 304 in that run is served with the body it
+        confirmed, so every archived feed is parsed.
+
+        Args:
+            archive: FeedArchive to read
+            run: Run timestamp (see FeedArchive.runs)
+        """
+        super().__init__(max_workers=max_workers, parse_workers=parse_workers, fast_parse=fast_parse)
+        self.archive = archive
+        self.run = run
+        self.snapshots = archive.snapshots(run)
+
+    def fetch(self, url):
+        snapshot = self.snapshots.get(url)
+        if snapshot is None:
+            return FetchResult(url, url, None, {}, None, "not in the archived run", 0.0)
+        _, status, final_url, headers, sha256, error = snapshot
+        if sha256 is None:
+            return FetchResult(url, final_url or url, status, headers, None, error or "no body archived", 0.0)
+        return FetchResult(url, final_url or url, 200 if status == 304 else status, headers,
+                           self.archive.body(sha256), None, 0.0)
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Inspect the archive of fetched feed bodies.')
+    parser.add_argument('--archive', default='feed_archive', help='Archive directory (default: feed_archive)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('runs', help='List archived runs')
+    export_parser = subparsers.add_parser('export', help="Write a run's feed bodies to a directory")
+    export_parser.add_argument('run', help="Run timestamp or 'latest'")
+    export_parser.add_argument('out', help='Output directory')
+    prune_parser = subparsers.add_parser('prune', help='Drop old runs and the bodies only they used')
+    prune_parser.add_argument('--keep-days', type=int, default=30, help='Days of runs to keep (default: 30)')
+
+    args = parser.parse_args()
+    archive = FeedArchive(args.archive)
+
+    if args.command == 'runs':
+        for run, feeds, bodies in archive.runs():
+            print(f"{run}  {feeds:>4} feeds  {bodies:>4} bodies")
+        row = archive.conn.execute("SELECT count(*), coalesce(sum(size), 0), coalesce(sum(stored), 0) FROM blobs").fetchone()
+        print(f"{row[0]} unique bodies, {row[1]:,} bytes, {row[2]:,} bytes stored")
+    elif args.command == 'prune':
+        runs, bodies, freed = archive.prune(args.keep_days)
+        print(f"Pruned {runs} runs and {bodies} bodies ({freed:,} bytes) older than {args.keep_days} days")
+    else:
+        runs = [run for run, _, _ in archive.runs()]
+        run = runs[-1] if args.run == 'latest' and runs else args.run
+        os.makedirs(args.out, exist_ok=True)
+        count = 0
+        for feed, (source, _, _, _, sha256, _) in sorted(archive.snapshots(run).items()):
+            if sha256 is None:
+                continue
+            name = f"{source}-{hashlib.sha1(feed.encode('utf-8')).hexdigest()[:10]}.xml"
+            with open(os.path.join(args.out, name), "wb") as f:
+                f.write(archive.body(sha256))
+            count += 1
+        print(f"Wrote {count} feeds of run {run} to {args.out}")
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Feed Entries
+SQLite store of the feed entries behind the collected URLs: title, summary,
+publication time and categories of every item, and when and where it was
+listed.
+
+Entries are keyed by canonical URL (canonical.py). `sightings` has one row per
+URL and feed with the first and last run it was listed in and its rank
+(position in the feed: first, best, last and the sum over runs, for the
+average), so dwell time on a front page and "top news" position are
+queryable without downloading any article. A feed the fetcher reports
+unchanged still counts as listing the items of its last fetch.
+
+collect.py stages the entries of a run and writes them in one transaction at
+the end (see collect.py --entries).
+
+    python feed_entries.py stats
+    python feed_entries.py top https://rss.nytimes.com/services/xml/rss/nyt/HomePage.xml
+    python feed_entries.py dwell --source cnn --since 2025-03-01
+    python feed_entries.py show https://www.cnn.com/2025/03/01/politics/...
+"""
+
+import json
+import sqlite3
+import calendar
+import argparse
+from datetime import datetime, timezone
+
+from canonical import canonical_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    link TEXT NOT NULL,
+    source TEXT NOT NULL,
+    title TEXT,
+    summary TEXT,
+    published TEXT,
+    categories TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_source ON entries (source, first_seen);
+CREATE INDEX IF NOT EXISTS idx_entries_first_seen ON entries (first_seen);
+CREATE INDEX IF NOT EXISTS idx_entries_published ON entries (published);
+
+CREATE TABLE IF NOT EXISTS sightings (
+    url TEXT NOT NULL REFERENCES entries (url),
+    feed TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    first_rank INTEGER NOT NULL,
+    best_rank INTEGER NOT NULL,
+    last_rank INTEGER NOT NULL,
+    rank_sum INTEGER NOT NULL,
+    runs INTEGER NOT NULL,
+    PRIMARY KEY (url, feed)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_sightings_feed ON sightings (feed, last_seen);
+CREATE INDEX IF NOT EXISTS idx_sightings_last_seen ON sightings (last_seen);
+"""
+
+UPSERT_ENTRY = """
+INSERT INTO entries (url, link, source, title, summary, published, categories, first_seen, last_seen)
+VALUES (:url, :link, :source, :title, :summary, :published, :categories, :seen, :seen)
+ON CONFLICT (url) DO UPDATE SET
+    title = coalesce(excluded.title, title), summary = coalesce(excluded.summary, summary),
+    published = coalesce(published, excluded.published), categories = coalesce(excluded.categories, categories),
+    first_seen = min(first_seen, excluded.first_seen), last_seen = max(last_seen, excluded.last_seen)
+"""
+
+UPSERT_SIGHTING = """
+INSERT INTO sightings (url, feed, first_seen, last_seen, first_rank, best_rank, last_rank, rank_sum, runs)
+VALUES (:url, :feed, :seen, :seen, :rank, :rank, :rank, :rank, 1)
+ON CONFLICT (url, feed) DO UPDATE SET
+    last_seen = excluded.last_seen, best_rank = min(best_rank, excluded.best_rank),
+    last_rank = excluded.last_rank, rank_sum = rank_sum + excluded.rank_sum, runs = runs + 1
+WHERE excluded.last_seen > sightings.last_seen
+"""
+
+# Carry the items of a feed's last fetch forward to a run where it was unchanged
+TOUCH_ENTRIES = """
+UPDATE entries SET last_seen = :seen
+WHERE last_seen < :seen AND url IN (
+    SELECT url FROM sightings WHERE feed = :feed
+    AND last_seen = (SELECT max(last_seen) FROM sightings WHERE feed = :feed))
+"""
+TOUCH_SIGHTINGS = """
+UPDATE sightings SET last_seen = :seen, rank_sum = rank_sum + last_rank, runs = runs + 1
+WHERE feed = :feed AND last_seen < :seen
+AND last_seen = (SELECT max(last_seen) FROM sightings WHERE feed = :feed)
+"""
+
+
+def timestamp(value=None):
+    """UTC ISO-8601 timestamp (seconds) for a datetime, a struct_time or now"""
+    if value is None:
+        value = datetime.now(timezone.utc)
+    elif not isinstance(value, datetime):
+        value = datetime.fromtimestamp(calendar.timegm(value), timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+def entry_fields(entry):
+    """Title, summary, published timestamp and categories (JSON list) of a feedparser entry dict"""
+    published = entry.get("published_parsed") or entry.get("updated_parsed")
+    try:
+        published = timestamp(published) if published else None
+    except (TypeError, ValueError, OverflowError):
+        published = None
+    terms = [tag.get("term") for tag in entry.get("tags") or () if tag.get("term")]
+    return {
+        "title": entry.get("title") or None,
+        "summary": entry.get("summary") or None,
+        "published": published,
+        "categories": json.dumps(terms) if terms else None,
+    }
+
+
+class EntryStore:
+    def __init__(self, path="feed_entries.db"):
+        """Open (or create) the entry store at path"""
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._entries = {}
+        self._sightings = {}
+        self._touched = []
+
+    def add_feed(self, source, feed, items, seen=None):
+        """
+        Stage the entries of one fetched feed
+
+        Args:
+            source: Source name
+            feed: Feed URL
+            items: (normalized link, feedparser entry dict) pairs in feed order
+            seen: Run timestamp (default: now)
+        """
+        seen = seen or timestamp()
+        rank = 0
+        for link, entry in items:
+            url = canonical_url(link)
+            if (url, feed) in self._sightings:
+                continue
+            rank += 1
+            self._sightings[url, feed] = {"url": url, "feed": feed, "seen": seen, "rank": rank}
+            row = self._entries.get(url)
+            fields = entry_fields(entry)
+            if row is None:
+                self._entries[url] = dict(fields, url=url, link=link, source=source, seen=seen)
+            else:
+                row.update((key, value) for key, value in fields.items() if value is not None)
+
+    def touch_feed(self, feed, seen=None):
+        """Stage a feed that is unchanged since its last fetch"""
+        self._touched.append({"feed": feed, "seen": seen or timestamp()})
+
+    def commit(self):
+        """
+        Write the staged entries in one transaction
+
+        Returns:
+            (entries written, feed sightings written)
+        """
+        counts = (len(self._entries), len(self._sightings))
+        cur = self.conn.cursor()
+        cur.execute("BEGIN")
+        try:
+            cur.executemany(UPSERT_ENTRY, self._entries.values())
+            cur.executemany(UPSERT_SIGHTING, self._sightings.values())
+            cur.executemany(TOUCH_ENTRIES, self._touched)
+            cur.executemany(TOUCH_SIGHTINGS, self._touched)
+            cur.execute("COMMIT")
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+        self._entries, self._sightings, self._touched = {}, {}, []
+        return counts
+
+    def query(self, sql, params=()):
+        """Run a read query; returns a list of sqlite3.Row"""
+        cur = self.conn.cursor()
+        cur.row_factory = sqlite3.Row
+        return cur.execute(sql, params).fetchall()
+
+    def top(self, feed, limit=20):
+        """The items of a feed's latest run in feed order"""
+        return self.query("""
+            SELECT s.last_rank AS rank, e.title, e.url, s.first_seen, s.last_seen
+            FROM sightings s JOIN entries e USING (url)
+            WHERE s.feed = ? AND s.last_seen = (SELECT max(last_seen) FROM sightings WHERE feed = ?)
+            ORDER BY s.last_rank LIMIT ?""", (feed, feed, limit))
+
+    def dwell(self, source=None, since=None, limit=20):
+        """URLs that stayed longest in any one feed, with their best and average rank"""
+        where, params = ["1"], []
+        if source:
+            where.append("e.source = ?")
+            params.append(source)
+        if since:
+            where.append("e.first_seen >= ?")
+            params.append(since)
+        return self.query(f"""
+            SELECT e.url, e.title, s.feed, s.first_seen, s.last_seen,
+                   round((julianday(s.last_seen) - julianday(s.first_seen)) * 24, 1) AS hours,
+                   s.best_rank, round(1.0 * s.rank_sum / s.runs, 1) AS avg_rank
+            FROM sightings s JOIN entries e USING (url)
+            WHERE {' AND '.join(where)}
+            ORDER BY julianday(s.last_seen) - julianday(s.first_seen) DESC LIMIT ?""", params + [limit])
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Query the feed entry store.')
+    parser.add_argument('--db', default='feed_entries.db', help='Entry store (default: feed_entries.db)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('stats', help='Entries per source')
+
+    top_parser = subparsers.add_parser('top', help="A feed's items in its latest run")
+    top_parser.add_argument('feed')
+    top_parser.add_argument('--limit', type=int, default=20)
+
+    dwell_parser = subparsers.add_parser('dwell', help='Items listed longest in a feed')
+    dwell_parser.add_argument('--source')
+    dwell_parser.add_argument('--since', help='First seen on or after (YYYY-MM-DD)')
+    dwell_parser.add_argument('--limit', type=int, default=20)
+
+    show_parser = subparsers.add_parser('show', help='An entry and the feeds that listed it')
+    show_parser.add_argument('url')
+
+    args = parser.parse_args()
+    store = EntryStore(args.db)
+
+    if args.command == 'stats':
+        for row in store.query("""SELECT source, count(*) AS entries, min(first_seen) AS since,
+                                  max(last_seen) AS latest FROM entries GROUP BY source ORDER BY source"""):
+            print(f"{row['source']:<10} {row['entries']:>8} entries  {row['since']} .. {row['latest']}")
+    elif args.command == 'top':
+        for row in store.top(args.feed, args.limit):
+            print(f"{row['rank']:>3}. {row['title']}\n     {row['url']} (since {row['first_seen']})")
+    elif args.command == 'dwell':
+        for row in store.dwell(args.source, args.since, args.limit):
+            print(f"{row['hours']:>7}h  best #{row['best_rank']}  avg #{row['avg_rank']}  {row['title']}\n"
+                  f"          {row['url']}\n          in {row['feed']}")
+    else:
+        url = canonical_url(args.url)
+        rows = store.query("SELECT * FROM entries WHERE url = ?", (url,))
+        if not rows:
+            print(f"Not found: {url}")
+            return
+        for key, value in dict(rows[0]).items():
+            print(f"{key}: {value}")
+        for row in store.query("SELECT * FROM sightings WHERE url = ? ORDER BY first_seen", (url,)):
+            print(f"  {row['feed']}: {row['first_seen']} .. {row['last_seen']}, "
+                  f"rank {row['first_rank']} -> {row['last_rank']} (best {row['best_rank']}, {row['runs']} runs)")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
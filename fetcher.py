@@ -0,0 +1,327 @@
+"""
+Feed Fetcher
+Downloads RSS/Atom feeds concurrently and hands the bodies to feedparser.
+
+Downloads run on a thread pool with a cap on simultaneous connections per
+host; parsing is CPU-bound, so the bodies are parsed in a process pool.
+Well-formed feeds are parsed by fast_feed.py, the rest by feedparser.
+
+Every FetchResult carries the time spent per phase: waiting for a per-host
+slot (queued), resolving the host (dns), opening the TCP/TLS connection
+(connect, zero when a kept-alive connection is reused), waiting for the
+response headers (wait) and reading the body (transfer). FeedFetcher's
+connections open their sockets the way urllib3's create_connection does,
+with the lookup split out to be timed, so each connection costs a single
+lookup.
+
+With a ValidatorCache, requests are conditional (ETag / Last-Modified) and a
+feed whose body is unchanged since the last run is not parsed again.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import threading
+from functools import partial
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from urllib.parse import urlparse
+
+import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.connection import allowed_gai_family
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+try:
+    from urllib3.exceptions import NameResolutionError  # urllib3 2
+except ImportError:
+    NameResolutionError = None
+
+from fast_feed import parse_entries
+
+FetchResult = namedtuple("FetchResult", "url final_url status headers body error elapsed unchanged timings",
+                         defaults=(False, None))
+ParsedFeed = namedtuple("ParsedFeed", "bozo bozo_message entries parser elapsed",
+                        defaults=("feedparser", 0.0))
+
+PHASES = ("queued", "dns", "connect", "wait", "transfer")
+
+# Response headers feedparser uses for encoding detection and relative links
+PARSE_HEADERS = ("content-type", "content-language", "content-location")
+
+
+def parse_feed(body, headers=None, fast=True):
+    """
+    Parse a feed body, with fast_feed.parse_entries first if fast is set and
+    feedparser for anything it leaves
+
+    Module-level so it can run in a worker process; returns a ParsedFeed made
+    of plain picklable values.
+    """
+    start = time.perf_counter()
+    if fast:
+        entries = parse_entries(body)
+        if entries is not None:
+            return ParsedFeed(False, None, entries, "fast", time.perf_counter() - start)
+    feed = feedparser.parse(body, response_headers=headers or {})
+    bozo_message = str(feed.get("bozo_exception", "")) if feed.bozo else None
+    return ParsedFeed(bool(feed.bozo), bozo_message, [dict(entry) for entry in feed.entries],
+                      "feedparser", time.perf_counter() - start)
+
+
+# Phase timings of the request running on this thread
+_timing = threading.local()
+
+
+class _TimedConnectionMixin:
+    """Adds DNS and connection setup time to the calling thread's timings"""
+
+    def _new_conn(self):
+        timings = getattr(_timing, "current", None)
+        if timings is None:
+            return super()._new_conn()
+        try:
+            sock = self._connect_socket(timings)
+        except socket.gaierror as e:
+            if NameResolutionError is not None:
+                raise NameResolutionError(self.host, self, e) from e
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})") from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+        sys.audit("http.client.connect", self, self.host, self.port)
+        return sock
+
+    def _connect_socket(self, timings):
+        """urllib3's create_connection, with the lookup timed as dns"""
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host.strip("[]"), self.port, allowed_gai_family(),
+                                           socket.SOCK_STREAM)
+        finally:
+            dns = time.perf_counter() - start
+            timings["dns"] += dns
+            timings["connect"] -= dns  # connect() times the whole of connection setup
+        error = None
+        for family, socktype, proto, _, sockaddr in addresses:
+            sock = None
+            try:
+                sock = socket.socket(family, socktype, proto)
+                for option in self.socket_options or ():
+                    sock.setsockopt(*option)
+                # urllib3's "default timeout" sentinel leaves the socket as it is
+                if self.timeout is None or isinstance(self.timeout, (int, float)):
+                    sock.settimeout(self.timeout)
+                if self.source_address:
+                    sock.bind(self.source_address)
+                sock.connect(sockaddr)
+                return sock
+            except OSError as e:
+                error = e
+                if sock is not None:
+                    sock.close()
+        raise error if error is not None else OSError("getaddrinfo returns an empty list")
+
+    def connect(self):
+        timings = getattr(_timing, "current", None)
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            if timings is not None:
+                timings["connect"] += time.perf_counter() - start
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report DNS and connect time"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool,
+                                                   "https": _TimedHTTPSConnectionPool}
+
+
+class ValidatorCache:
+    def __init__(self, path="feed_cache.json"):
+        """
+        Load the per-feed validators saved by the previous run
+
+        Args:
+            path: JSON file mapping feed URL to its ETag, Last-Modified,
+                content hash and body size
+        """
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.validators = json.load(f)
+        except FileNotFoundError:
+            self.validators = {}
+        self._lock = threading.Lock()
+        self.not_modified = 0
+        self.unchanged_bodies = 0
+        self.bytes_saved = 0
+
+    def request_headers(self, url):
+        """Conditional request headers for url"""
+        entry = self.validators.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record_not_modified(self, url):
+        with self._lock:
+            self.not_modified += 1
+            self.bytes_saved += self.validators.get(url, {}).get("size", 0)
+
+    def update(self, url, headers, body):
+        """Store the validators for a fresh body; return True if the body matches the cached hash"""
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            unchanged = self.validators.get(url, {}).get("sha256") == digest
+            if unchanged:
+                self.unchanged_bodies += 1
+            self.validators[url] = {
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+                "sha256": digest,
+                "size": len(body),
+            }
+        return unchanged
+
+    @property
+    def parses_avoided(self):
+        return self.not_modified + self.unchanged_bodies
+
+    def summary(self):
+        return (f"Feed cache: {self.not_modified} not modified, {self.unchanged_bodies} unchanged bodies, "
+                f"{self.bytes_saved} bytes saved, {self.parses_avoided} parse calls avoided")
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.validators, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class FeedFetcher:
+    def __init__(self, max_workers=32, per_host=4, parse_workers=None, timeout=30, cache=None, fast_parse=True):
+        """
+        Initialize the fetcher
+
+        Args:
+            max_workers: Number of download threads
+            per_host: Maximum simultaneous connections to a single host
+            parse_workers: Number of parser processes (0 parses in-process,
+                None uses one per CPU)
+            timeout: Per-request timeout in seconds
+            cache: Optional ValidatorCache for conditional requests
+            fast_parse: Try fast_feed.py before feedparser
+        """
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.parse_workers = os.cpu_count() if parse_workers is None else parse_workers
+        self.timeout = timeout
+        self.cache = cache
+        self.fast_parse = fast_parse
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": feedparser.USER_AGENT,
+            "Accept": feedparser.http.ACCEPT_HEADER,
+        })
+        adapter = TimedHTTPAdapter(pool_connections=max_workers, pool_maxsize=per_host)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._host_limits = {}
+        self._host_limits_lock = threading.Lock()
+
+    def _host_limit(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._host_limits_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def fetch(self, url):
+        """Download a single feed; errors are captured in the result rather than raised"""
+        start = time.perf_counter()
+        timings = dict.fromkeys(PHASES, 0.0)
+        request_headers = self.cache.request_headers(url) if self.cache else {}
+        with self._host_limit(url):
+            sent = time.perf_counter()
+            timings["queued"] = sent - start
+            _timing.current = timings
+            try:
+                response = self.session.get(url, headers=request_headers, timeout=self.timeout)
+                done = time.perf_counter()
+                response.raise_for_status()
+            except requests.RequestException as e:
+                return FetchResult(url, url, getattr(e.response, "status_code", None), {}, None,
+                                   str(e), time.perf_counter() - start, timings=timings)
+            finally:
+                _timing.current = None
+        # response.elapsed runs until the headers were parsed; the body is read after
+        headers_at = response.elapsed.total_seconds()
+        timings["wait"] = max(0.0, headers_at - timings["dns"] - timings["connect"])
+        timings["transfer"] = max(0.0, done - sent - headers_at)
+        headers = {k.lower(): v for k, v in response.headers.items()}
+        headers.setdefault("content-location", response.url)
+
+        if response.status_code == 304 and request_headers:
+            self.cache.record_not_modified(url)
+            return FetchResult(url, response.url, 304, headers, None, None,
+                               time.perf_counter() - start, unchanged=True, timings=timings)
+        unchanged = self.cache.update(url, headers, response.content) if self.cache else False
+        return FetchResult(url, response.url, response.status_code, headers, response.content,
+                           None, time.perf_counter() - start, unchanged, timings)
+
+    def fetch_all(self, urls):
+        """Download every URL concurrently; returns {url: FetchResult}"""
+        urls = list(dict.fromkeys(urls))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return dict(zip(urls, pool.map(self.fetch, urls)))
+
+    def parse_all(self, results):
+        """Parse fetched bodies; returns {url: ParsedFeed} for every changed, successful fetch"""
+        ok = [r for r in results.values() if r.body is not None and not r.unchanged]
+        jobs = [(r.body, {k: r.headers[k] for k in PARSE_HEADERS if k in r.headers}) for r in ok]
+        parse = partial(parse_feed, fast=self.fast_parse)
+        if self.parse_workers and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.parse_workers, len(jobs))) as pool:
+                parsed = list(pool.map(parse, *zip(*jobs)))
+        else:
+            parsed = [parse(body, headers) for body, headers in jobs]
+        return {r.url: feed for r, feed in zip(ok, parsed)}
+
+    def fetch_and_parse(self, urls):
+        """Download and parse every URL; returns ({url: FetchResult}, {url: ParsedFeed})"""
+        results = self.fetch_all(urls)
+        return results, self.parse_all(results)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Metrics
+Per-feed instrumentation of the collection runs.
+
+collect.py records one JSON line per feed and run in collect_metrics.ndjson:
+the time spent in each phase of the fetch (queued for a per-host slot, dns,
+connect, wait for the response headers, transfer of the body; see
+fetcher.py), the parse time and parser, the response size, the number of
+items and how many of them were new to the URL store. With --prometheus the
+last run is also written as a node_exporter textfile, replaced atomically.
+
+    python collect.py --prometheus /var/lib/node_exporter/top_news.prom
+    python metrics.py report                          # p50/p95 latency per feed
+    python metrics.py report --source cnn --since 2025-03-01 --sort parse
+    python metrics.py prune --keep-days 90            # drop older runs
+
+The log is not committed; the scheduled workflow carries it from run to run
+in the GitHub Actions cache and prunes it to bound the cache size.
+"""
+
+import os
+import json
+import math
+import time
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from fetcher import PHASES
+from feed_entries import timestamp
+
+PROMETHEUS_GAUGES = (
+    ("bytes", "top_news_feed_bytes", "Size of the feed body fetched in the last run"),
+    ("items", "top_news_feed_items", "Items listed by the feed in the last run"),
+    ("new", "top_news_feed_new_urls", "Items of the last run new to the URL store"),
+    ("fetch", "top_news_feed_fetch_seconds", "Time to fetch the feed in the last run"),
+    ("parse", "top_news_feed_parse_seconds", "Time to parse the feed in the last run"),
+)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..1) of a list of numbers, None if empty"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class RunMetrics:
+    def __init__(self, path="collect_metrics.ndjson", prometheus=None):
+        """
+        Collect the per-feed metrics of one run
+
+        Args:
+            path: Newline-delimited JSON file receiving one record per feed
+                (None to skip it)
+            prometheus: Optional node_exporter textfile for the last run
+        """
+        self.path = path
+        self.prometheus = prometheus
+        self.started = time.time()
+        self.records = []
+
+    def feed(self, run, source, result, parsed=None, outcome="ok", items=0, new=0):
+        """
+        Record one feed of a run
+
+        Args:
+            run: Run timestamp
+            source: Source name
+            result: fetcher.FetchResult of the feed
+            parsed: fetcher.ParsedFeed, if the feed was parsed
+            outcome: ok, unchanged, error (not fetched or parsed) or bozo
+                (skipped as malformed)
+            items: Links taken from the feed
+            new: Links that were new to the source's URL store
+        """
+        timings = result.timings or {}
+        record = {
+            "run": run, "source": source, "feed": result.url, "outcome": outcome,
+            "status": result.status, "error": result.error,
+            "bytes": len(result.body) if result.body is not None else 0,
+            "fetch": round(result.elapsed, 6),
+            **{phase: round(timings.get(phase, 0.0), 6) for phase in PHASES},
+            "parse": round(parsed.elapsed, 6) if parsed is not None else None,
+            "parser": parsed.parser if parsed is not None else None,
+            "items": items, "new": new, "seen": items - new,
+        }
+        self.records.append(record)
+        return record
+
+    def write(self):
+        """Append the run's records and write the Prometheus textfile"""
+        if self.path and self.records:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record) + "\n" for record in self.records))
+        if self.prometheus:
+            tmp_path = self.prometheus + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, self.prometheus)
+
+    def prometheus_text(self):
+        """The last run in the Prometheus text exposition format"""
+        lines = []
+
+        def gauge(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_label(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        feeds = [({"source": r["source"], "feed": r["feed"]}, r) for r in self.records]
+        gauge("top_news_feed_up", "1 if the feed was fetched and parsed (or unchanged) in the last run",
+              [(labels, int(r["outcome"] in ("ok", "unchanged"))) for labels, r in feeds])
+        gauge("top_news_feed_phase_seconds", "Time spent in each phase of fetching the feed in the last run",
+              [(dict(labels, phase=phase), r[phase]) for labels, r in feeds for phase in PHASES])
+        for key, name, help_text in PROMETHEUS_GAUGES:
+            gauge(name, help_text, [(labels, r[key]) for labels, r in feeds if r[key] is not None])
+        gauge("top_news_run_duration_seconds", "Duration of the last collection run",
+              [({}, round(time.time() - self.started, 3))])
+        gauge("top_news_run_last_timestamp_seconds", "Unix time the last collection run finished",
+              [({}, int(time.time()))])
+        return "\n".join(lines) + "\n"
+
+    def slowest(self, count=3):
+        """The feeds that took longest to fetch, as (seconds, feed)"""
+        return sorted(((r["fetch"], r["feed"]) for r in self.records), reverse=True)[:count]
+
+
+def read_metrics(path="collect_metrics.ndjson", since=None, source=None):
+    """Yield the records of a metrics file, optionally from run `since` on and for one source"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if since and record["run"] < since:
+                continue
+            if source and record["source"] != source:
+                continue
+            yield record
+
+
+def prune(path, keep_days):
+    """
+    Drop the records of runs older than keep_days, rewriting the file atomically
+
+    Returns:
+        Number of records removed
+    """
+    if not os.path.exists(path):
+        return 0
+    cutoff = timestamp(datetime.now(timezone.utc) - timedelta(days=keep_days))
+    removed = 0
+    tmp_path = path + ".tmp"
+    with open(path, "r", encoding="utf-8") as f, open(tmp_path, "w", encoding="utf-8") as out:
+        for line in f:
+            if not line.strip():
+                continue
+            if json.loads(line)["run"] < cutoff:
+                removed += 1
+                continue
+            out.write(line)
+    os.replace(tmp_path, path)
+    return removed
+
+
+def report(records):
+    """
+    Per-feed summary over runs
+
+    Returns:
+        List of dicts with the run count, p50/p95 of the fetch time and its
+        phases and of the parse time, mean items per fetched run and new
+        items per run, runs with no items and errors, one per feed
+    """
+    feeds = {}
+    for record in records:
+        feeds.setdefault((record["source"], record["feed"]), []).append(record)
+
+    rows = []
+    for (source, feed), runs in feeds.items():
+        fetched = [r for r in runs if r["outcome"] in ("ok", "bozo")]
+        row = {"source": source, "feed": feed, "runs": len(runs),
+               "errors": sum(r["outcome"] == "error" for r in runs),
+               "empty": sum(r["outcome"] == "ok" and not r["items"] for r in runs),
+               "items": sum(r["items"] for r in fetched) / len(fetched) if fetched else 0.0,
+               "new": sum(r["new"] for r in runs) / len(runs)}
+        for key in ("fetch",) + PHASES:
+            values = [r[key] for r in runs if r["outcome"] != "error"]
+            row[f"{key}_p50"], row[f"{key}_p95"] = percentile(values, 0.5), percentile(values, 0.95)
+        parses = [r["parse"] for r in fetched if r["parse"] is not None]
+        row["parse_p50"], row["parse_p95"] = percentile(parses, 0.5), percentile(parses, 0.95)
+        rows.append(row)
+    return rows
+
+
+def _ms(value):
+    return f"{value * 1000:8.1f}" if value is not None else f"{'-':>8}"
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Report on the per-feed metrics of the collection runs.')
+    parser.add_argument('--metrics', default='collect_metrics.ndjson',
+                        help='Metrics file written by collect.py (default: collect_metrics.ndjson)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    report_parser = subparsers.add_parser('report', help='p50/p95 latency per feed across runs')
+    report_parser.add_argument('--since', help='Runs from this timestamp on (e.g., 2025-03-01)')
+    report_parser.add_argument('--source', help='Only this source')
+    report_parser.add_argument('--sort', choices=['fetch', 'parse', 'errors', 'feed'], default='fetch',
+                               help='Order by p95 fetch or parse time, errors or feed (default: fetch)')
+    report_parser.add_argument('--limit', type=int, help='Show only the first N feeds')
+    prune_parser = subparsers.add_parser('prune', help='Drop the records of old runs')
+    prune_parser.add_argument('--keep-days', type=int, default=90, help='Days of runs to keep (default: 90)')
+
+    args = parser.parse_args()
+    if args.command == 'prune':
+        removed = prune(args.metrics, args.keep_days)
+        print(f"Pruned {removed} records older than {args.keep_days} days from {args.metrics}")
+        return
+
+    rows = report(read_metrics(args.metrics, args.since, args.source))
+    if args.sort == 'feed':
+        rows.sort(key=lambda row: (row["source"], row["feed"]))
+    elif args.sort == 'errors':
+        rows.sort(key=lambda row: (-row["errors"], -(row["fetch_p95"] or 0)))
+    else:
+        rows.sort(key=lambda row: -(row[f"{args.sort}_p95"] or 0))
+    if args.limit:
+        rows = rows[:args.limit]
+
+    print(f"{'runs':>5} {'fetch50':>8} {'fetch95':>8} {'dns95':>8} {'conn95':>8} {'wait95':>8} {'xfer95':>8} "
+          f"{'parse50':>8} {'parse95':>8} {'items':>6} {'new':>6} {'empty':>5} {'err':>4}  feed")
+    for row in rows:
+        print(f"{row['runs']:>5} {_ms(row['fetch_p50'])} {_ms(row['fetch_p95'])} {_ms(row['dns_p95'])} "
+              f"{_ms(row['connect_p95'])} {_ms(row['wait_p95'])} {_ms(row['transfer_p95'])} "
+              f"{_ms(row['parse_p50'])} {_ms(row['parse_p95'])} {row['items']:>6.1f} {row['new']:>6.1f} "
+              f"{row['empty']:>5} {row['errors']:>4}  {row['source']}: {row['feed']}")
+    print(f"{len(rows)} feeds, times in ms")
+
+
+if __name__ == "__main__":
+    main()
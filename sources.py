@@ -0,0 +1,174 @@
+"""
+Sources
+Registry of the news sources we collect: the feeds each one publishes and the
+rule used to normalize its feed links.
+
+Normalization rules:
+    strip_query: keep only scheme, host and path (drops query string and fragment)
+    keep_query: store the feed link unchanged
+"""
+
+from collections import namedtuple
+from urllib.parse import urljoin, urlparse
+
+Source = namedtuple("Source", "name feeds normalize skip_bozo indent",
+                    defaults=("strip_query", False, None))
+
+
+def strip_query(link):
+    return urljoin(link, urlparse(link).path)
+
+
+def keep_query(link):
+    return link
+
+
+NORMALIZERS = {
+    "strip_query": strip_query,
+    "keep_query": keep_query,
+}
+
+SOURCES = {source.name: source for source in [
+    Source(
+        name="nyt",
+        feeds=[
+            "https://www.nytimes.com/svc/collections/v1/publish/https://www.nytimes.com/section/politics/rss.xml",
+            "https://rss.nytimes.com/services/xml/rss/nyt/HomePage.xml",
+            "https://www.nytimes.com/svc/collections/v1/publish/https://www.nytimes.com/section/us/rss.xml",
+            "https://www.nytimes.com/svc/collections/v1/publish/https://www.nytimes.com/section/world/rss.xml",
+            "https://www.nytimes.com/svc/collections/v1/publish/https://www.nytimes.com/section/business/rss.xml",
+            "https://www.nytimes.com/svc/collections/v1/publish/https://www.nytimes.com/section/technology/rss.xml",
+        ],
+        normalize="keep_query",
+    ),
+    Source(
+        name="npr",
+        feeds=[
+            "https://feeds.npr.org/1014/rss.xml",
+            "https://feeds.npr.org/1001/rss.xml",
+            "https://feeds.npr.org/1003/rss.xml",
+            "https://feeds.npr.org/1004/rss.xml",
+            "https://feeds.npr.org/1006/rss.xml",
+            "https://feeds.npr.org/1007/rss.xml",
+            "https://feeds.npr.org/1008/rss.xml",
+            "https://feeds.npr.org/1009/rss.xml",
+            "https://feeds.npr.org/1015/rss.xml",
+            "https://feeds.npr.org/1016/rss.xml",
+            "https://feeds.npr.org/1017/rss.xml",
+        ],
+        normalize="keep_query",
+    ),
+    Source(
+        name="wapo",
+        feeds=[
+            "https://feeds.washingtonpost.com/rss/politics",
+            "https://feeds.washingtonpost.com/rss/national",
+            "https://feeds.washingtonpost.com/rss/world",
+            "https://feeds.washingtonpost.com/rss/business",
+            "https://feeds.washingtonpost.com/rss/business/technology",
+            "https://feeds.washingtonpost.com/rss/sports",
+            "https://feeds.washingtonpost.com/rss/lifestyle",
+            "https://feeds.washingtonpost.com/rss/entertainment",
+        ],
+    ),
+    Source(
+        name="propub",
+        feeds=[
+            "http://feeds.propublica.org/propublica/main",
+        ],
+    ),
+    Source(
+        name="lat",
+        feeds=[
+            "https://www.latimes.com/business/rss2.0.xml",
+            "https://www.latimes.com/california/rss2.0.xml",
+            "https://www.latimes.com/environment/rss2.0.xml",
+            "https://www.latimes.com/entertainment-arts/rss2.0.xml",
+            "https://www.latimes.com/food/rss2.0.xml",
+            "https://www.latimes.com/lifestyle/rss2.0.xml",
+            "https://www.latimes.com/politics/rss2.0.xml",
+            "https://www.latimes.com/science/rss2.0.xml",
+            "https://www.latimes.com/sports/rss2.0.xml",
+            "https://www.latimes.com/travel/rss2.0.xml",
+            "https://www.latimes.com/world-nation/rss2.0.xml",
+        ],
+    ),
+    Source(
+        name="usat",
+        feeds=[
+            "http://rssfeeds.usatoday.com/usatoday-NewsTopStories",
+            "http://rssfeeds.usatoday.com/UsatodaycomNation-TopStories",
+            "http://rssfeeds.usatoday.com/UsatodaycomWashington-TopStories",
+            "http://rssfeeds.usatoday.com/UsatodaycomWorld-TopStories",
+            "http://rssfeeds.usatoday.com/usatoday-LifeTopStories",
+            "http://rssfeeds.usatoday.com/usatoday-TechTopStories",
+        ],
+    ),
+    Source(
+        name="politico",
+        feeds=[
+            "https://rss.politico.com/congress.xml",
+            "https://rss.politico.com/healthcare.xml",
+            "https://rss.politico.com/defense.xml",
+            "https://rss.politico.com/economy.xml",
+            "https://rss.politico.com/energy.xml",
+            "https://rss.politico.com/politics-news.xml",
+        ],
+        skip_bozo=True,
+        indent=4,
+    ),
+    Source(
+        name="cbs",
+        feeds=[
+            "https://www.cbsnews.com/latest/rss/main",
+            "https://www.cbsnews.com/latest/rss/us",
+            "https://www.cbsnews.com/latest/rss/politics",
+            "https://www.cbsnews.com/latest/rss/world",
+            "https://www.cbsnews.com/latest/rss/health",
+            "https://www.cbsnews.com/latest/rss/moneywatch",
+            "https://www.cbsnews.com/latest/rss/science",
+            "https://www.cbsnews.com/latest/rss/technology",
+            "https://www.cbsnews.com/latest/rss/entertainment",
+            "https://www.cbsnews.com/latest/rss/evening-news/cbs-news-investigates",
+            "https://www.cbsnews.com/latest/rss/60-minutes",
+            "https://www.cbsnews.com/latest/rss/evening-news",
+            "https://www.cbsnews.com/latest/rss/face-the-nation",
+        ],
+    ),
+    Source(
+        name="nbc",
+        feeds=[
+            "http://feeds.nbcnews.com/nbcnews/public/news",
+            "http://feeds.nbcnews.com/nbcnews/public/world",
+            "http://feeds.nbcnews.com/nbcnews/public/politics",
+            "http://feeds.nbcnews.com/nbcnews/public/health",
+        ],
+    ),
+    Source(
+        name="abc",
+        feeds=[
+            "https://abcnews.go.com/abcnews/topstories",
+            "https://abcnews.go.com/abcnews/internationalheadlines",
+            "https://abcnews.go.com/abcnews/usheadlines",
+            "https://abcnews.go.com/abcnews/moneyheadlines",
+            "https://abcnews.go.com/abcnews/healthheadlines",
+            "https://abcnews.go.com/abcnews/sportsheadlines",
+            "https://abcnews.go.com/abcnews/entertainmentheadlines",
+            "https://abcnews.go.com/abcnews/technologyheadlines",
+            "https://abcnews.go.com/abcnews/travelheadlines",
+        ],
+    ),
+    Source(
+        name="cnn",
+        feeds=[
+            "http://rss.cnn.com/rss/cnn_topstories.rss",
+            "http://rss.cnn.com/rss/cnn_world.rss",
+            "http://rss.cnn.com/rss/cnn_us.rss",
+            "http://rss.cnn.com/rss/cnn_allpolitics.rss",
+            "http://rss.cnn.com/rss/cnn_tech.rss",
+            "http://rss.cnn.com/rss/cnn_health.rss",
+            "http://rss.cnn.com/rss/cnn_showbiz.rss",
+            "http://rss.cnn.com/rss/cnn_travel.rss",
+        ],
+    ),
+]}
@@ -0,0 +1,11 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The collectors live at the repo root and the aggregation scripts in agg/,
+# which import their siblings directly; the root comes first, as agg/ has
+# scripts of the same name (concat_json.py)
+for path in reversed((ROOT, os.path.join(ROOT, "agg"), os.path.dirname(os.path.abspath(__file__)))):
+    if path not in sys.path:
+        sys.path.insert(0, path)
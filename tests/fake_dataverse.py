@@ -0,0 +1,193 @@
+"""
+Fake Dataverse
+A small in-memory stand-in for the parts of the Dataverse API that
+agg/dataverse.py uses: the native /add endpoint and the direct-upload flow
+(uploadurls -> presigned part PUTs -> complete -> add), with the storage
+"bucket" served from the same port.
+
+    with serve(FakeDataverse, **fake_state(part_size=4)) as server:
+        DataverseUploader(server.url, TOKEN, DATASET).upload_file(path)
+        server.calls       # [("GET", "uploadurls"), ("PUT", "part"), ...]
+        server.datasets    # {DATASET: [{"fileName": ..., "md5": ...}, ...]}
+
+Faults are injected per call kind: server.faults["add"] = [503, 500] makes
+the next two /add requests fail with those statuses before one succeeds,
+and a None in the list lets that call through.
+"""
+
+import json
+import uuid
+import hashlib
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler
+
+TOKEN = "test-token"
+DATASET = "doi:10.5072/FK2/TEST"
+
+
+def fake_state(part_size=None, direct=True):
+    """
+    Attributes for serve(FakeDataverse, ...)
+
+    Args:
+        part_size: Bytes per part; files larger than this are uploaded in parts
+            (None: always a single PUT)
+        direct: Whether the dataset's store allows direct upload
+    """
+    return {
+        "part_size": part_size,
+        "direct": direct,
+        "faults": {},
+        "calls": [],
+        "uploads": {},
+        "objects": {},
+        "datasets": {},
+    }
+
+
+def _parse_multipart(body, content_type):
+    """Fields of a multipart/form-data body as {name: bytes}"""
+    boundary = content_type.split("boundary=", 1)[1].strip('"').encode()
+    fields = {}
+    for part in body.split(b"--" + boundary)[1:]:
+        if part.startswith(b"--"):
+            break
+        head, _, value = part.strip(b"\r\n").partition(b"\r\n\r\n")
+        for line in head.decode().split("\r\n"):
+            if line.lower().startswith("content-disposition"):
+                name = line.split('name="', 1)[1].split('"', 1)[0]
+                fields[name] = value
+    return fields
+
+
+class FakeDataverse(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if not size:
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fault(self, kind):
+        """Log the call and answer with the next injected status, if any"""
+        self.server.calls.append((self.command, kind))
+        pending = self.server.faults.get(kind)
+        status = pending.pop(0) if pending else None
+        if status:
+            self._send(status, {"status": "ERROR", "message": "injected fault"})
+            return True
+        return False
+
+    def _api_call(self, kind):
+        """Whether the request carries the API token; answers 401 if not"""
+        if self.headers.get("X-Dataverse-key") != TOKEN:
+            self.server.calls.append((self.command, kind))
+            self._send(401, {"status": "ERROR", "message": "bad token"})
+            return False
+        return not self._fault(kind)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if not url.path.endswith("/uploadurls") or not self._api_call("uploadurls"):
+            return
+        if not self.server.direct:
+            self._send(404, {"status": "ERROR", "message": "Direct upload not supported"})
+            return
+        size = int(parse_qs(url.query)["size"][0])
+        upload_id = uuid.uuid4().hex
+        storage_id = f"s3://bucket:{upload_id}"
+        part_size = self.server.part_size
+        data = {"storageIdentifier": storage_id}
+        if part_size is None or size <= part_size:
+            data["url"] = f"{self.server.url}/storage/{upload_id}/object"
+            parts = 1
+        else:
+            parts = -(-size // part_size)
+            data.update(
+                partSize=part_size,
+                urls={str(n): f"{self.server.url}/storage/{upload_id}/{n}" for n in range(1, parts + 1)},
+                complete=f"/api/datafiles/mpupload?uploadid={upload_id}&storageidentifier={storage_id}",
+                abort=f"/api/datafiles/mpupload?uploadid={upload_id}&storageidentifier={storage_id}",
+            )
+        self.server.uploads[upload_id] = {"storage_id": storage_id, "parts": {}, "count": parts}
+        self._send(200, {"status": "OK", "data": data})
+
+    def do_PUT(self):
+        url = urlsplit(self.path)
+        body = self._body()
+        if url.path.startswith("/storage/"):
+            _, _, upload_id, part = url.path.split("/")
+            kind = "object" if part == "object" else "part"
+            if self._fault(kind):
+                return
+            if "X-Dataverse-key" in self.headers:
+                self._send(400, {"message": "storage requests must not carry the API token"})
+                return
+            upload = self.server.uploads[upload_id]
+            if part == "object":
+                self.server.objects[upload["storage_id"]] = body
+            else:
+                upload["parts"][part] = body
+            self._send(200, headers={"ETag": f'"{hashlib.md5(body).hexdigest()}"'})
+        elif url.path == "/api/datafiles/mpupload":
+            if not self._api_call("complete"):
+                return
+            upload_id = parse_qs(url.query)["uploadid"][0]
+            upload = self.server.uploads[upload_id]
+            etags = json.loads(body)
+            expected = {part: f'"{hashlib.md5(data).hexdigest()}"' for part, data in upload["parts"].items()}
+            if len(etags) != upload["count"] or etags != expected:
+                self._send(400, {"status": "ERROR", "message": "etags do not match the uploaded parts"})
+                return
+            self.server.objects[upload["storage_id"]] = b"".join(
+                upload["parts"][part] for part in sorted(upload["parts"], key=int))
+            self._send(200, {"status": "OK"})
+        else:
+            self._send(404)
+
+    def do_DELETE(self):
+        url = urlsplit(self.path)
+        if url.path == "/api/datafiles/mpupload" and self._api_call("abort"):
+            self.server.uploads.pop(parse_qs(url.query)["uploadid"][0], None)
+            self._send(204)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self._body()
+        if not url.path.endswith("/add") or not self._api_call("add"):
+            return
+        dataset = parse_qs(url.query)["persistentId"][0]
+        fields = _parse_multipart(body, self.headers["Content-Type"])
+        json_data = json.loads(fields["jsonData"])
+        if "file" in fields:
+            content = fields["file"]
+        else:
+            content = self.server.objects.get(json_data.get("storageIdentifier"))
+            if content is None:
+                self._send(400, {"status": "ERROR", "message": "unknown storageIdentifier"})
+                return
+            if json_data["checksum"]["@value"] != hashlib.md5(content).hexdigest():
+                self._send(400, {"status": "ERROR", "message": "checksum mismatch"})
+                return
+        files = self.server.datasets.setdefault(dataset, [])
+        files.append({"fileName": json_data["fileName"], "md5": hashlib.md5(content).hexdigest()})
+        self._send(200, {"status": "OK", "data": {"files": [
+            {"dataFile": {"id": len(files), "persistentId": f"{dataset}/{len(files)}"}}]}})
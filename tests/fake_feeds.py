@@ -0,0 +1,67 @@
+"""
+Fake Feeds
+Serves canned feed bodies (the files in tests/feeds) the way a news site
+does, for FeedFetcher and collect.py.
+
+    with serve(FakeFeeds, **feeds_state({"/rss": feed_body("atom.xml")})) as server:
+        FeedFetcher(cache=ValidatorCache(path)).fetch(server.url + "/rss")
+
+Every feed is sent with an ETag (from its content) and a fixed
+Last-Modified, and a request carrying either validator while the body is
+unchanged gets a 304. Paths not in feeds get a 404. Replace
+server.feeds[path] to publish a new version, set server.validators = False
+to send no validators, and read server.requests for the (path,
+If-None-Match, If-Modified-Since) of every request.
+"""
+
+import os
+import hashlib
+from http.server import BaseHTTPRequestHandler
+
+FEEDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "feeds")
+LAST_MODIFIED = "Sat, 01 Mar 2025 12:00:00 GMT"
+
+
+def feed_body(name):
+    """A feed of the tests/feeds corpus"""
+    with open(os.path.join(FEEDS, name), "rb") as f:
+        return f.read()
+
+
+def feeds_state(feeds=None):
+    return {"feeds": dict(feeds or {}), "validators": True, "requests": []}
+
+
+def etag(body):
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+
+
+class FakeFeeds(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if_none_match = self.headers.get("If-None-Match")
+        if_modified_since = self.headers.get("If-Modified-Since")
+        self.server.requests.append((self.path, if_none_match, if_modified_since))
+        body = self.server.feeds.get(self.path)
+        if body is None:
+            self._send(404, b"<html><body>Not Found</body></html>", "text/html")
+            return
+        validators = {"ETag": etag(body), "Last-Modified": LAST_MODIFIED} if self.server.validators else {}
+        if validators and (if_none_match == validators["ETag"] or
+                           (if_none_match is None and if_modified_since == LAST_MODIFIED)):
+            self._send(304, b"", None, validators)
+            return
+        self._send(200, body, "application/rss+xml; charset=utf-8", validators)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,67 @@
+"""
+Fake Search
+Stand-in for the Google Custom Search JSON API used by usat_downloader.py.
+
+    with serve(FakeSearch, **search_state({"site:usatoday.com a b": [("https://...", "Title")]})) as server:
+        ArticleFinder(KEY, CX, search_url=server.url + "/customsearch/v1", ...)
+
+Queries not in results get an empty result set. server.faults is a list of
+(status, error body) answers (see google_error) sent before normal
+answers resume, and server.queries logs every q received.
+"""
+
+import json
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler
+
+KEY = "test-key"
+CX = "test-cx"
+
+
+def search_state(results=None):
+    return {"results": results or {}, "faults": [], "queries": []}
+
+
+def google_error(status, reason=None, api_status=None, quota_limit=None):
+    """An error body shaped like Google's (errors[].reason, status, ErrorInfo details)"""
+    error = {"code": status, "message": f"{reason or 'error'} (fake)", "errors": [], "details": []}
+    if reason:
+        error["errors"].append({"message": error["message"], "domain": "usageLimits", "reason": reason})
+    if api_status:
+        error["status"] = api_status
+    if quota_limit:
+        error["details"].append({"@type": "type.googleapis.com/google.rpc.ErrorInfo",
+                                 "reason": "RATE_LIMIT_EXCEEDED", "metadata": {"quota_limit": quota_limit}})
+    return status, {"error": error}
+
+
+class FakeSearch(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        if url.path != "/customsearch/v1":
+            self._send(404, {})
+            return
+        self.server.queries.append(params.get("q"))
+        if self.server.faults:
+            self._send(*self.server.faults.pop(0))
+            return
+        if params.get("key") != KEY or params.get("cx") != CX:
+            self._send(*google_error(400, "keyInvalid", "INVALID_ARGUMENT"))
+            return
+        items = [{"link": link, "title": title} for link, title in self.server.results.get(params["q"], [])]
+        payload = {"searchInformation": {"totalResults": str(len(items))}}
+        if items:
+            payload["items"] = items
+        self._send(200, payload)
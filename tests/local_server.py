@@ -0,0 +1,37 @@
+"""
+Local Server
+Runs a stdlib HTTP handler on a free port of 127.0.0.1 in a background
+thread, for tests that need a real server (the fake feeds and the fake
+Dataverse).
+"""
+
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer
+
+
+@contextmanager
+def serve(handler_class, **attributes):
+    """
+    Serve handler_class until the block exits
+
+    Args:
+        handler_class: BaseHTTPRequestHandler subclass
+        **attributes: Set on the server, where handlers reach them as self.server.<name>
+
+    Yields:
+        The server; its base URL is server.url
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+    server.daemon_threads = True
+    for name, value in attributes.items():
+        setattr(server, name, value)
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
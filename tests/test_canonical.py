@@ -0,0 +1,34 @@
+import os
+import json
+
+from canonical import canonical_url, migrate
+from sources import Source
+from url_store import URLStore, RunWriter, read_urls
+
+
+def test_aliases_and_variants_share_a_key():
+    assert canonical_url("http://edition.cnn.com/2025/03/01/politics/story/index.html?utm_source=x") == \
+        canonical_url("https://www.cnn.com/2025/03/01/politics/story")
+    assert canonical_url("https://www.nytimes.com/2025/03/01/us/story.amp.html") == \
+        "https://www.nytimes.com/2025/03/01/us/story.html"
+
+
+def test_migrate_completes_an_interrupted_run_first(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open("cnn_urls.json", "w") as f:
+        json.dump(["https://www.cnn.com/2025/03/01/politics/a", "https://edition.cnn.com/2025/03/01/politics/a/"], f)
+    store = URLStore("cnn_urls.json")
+    store.add("https://www.cnn.com/2025/03/01/politics/b")
+
+    # A run that died after writing its journal, before renaming the sidecar
+    writer = RunWriter()
+    writer._apply = lambda journal: None
+    writer.commit("2025-03-01T00:00:00+00:00", {"cnn": store})
+    assert os.path.exists("collect_run.journal.json")
+
+    migrate([Source("cnn", [])])
+    assert not os.path.exists("collect_run.journal.json")
+    assert read_urls("cnn_urls.json") == ["https://www.cnn.com/2025/03/01/politics/a",
+                                          "https://www.cnn.com/2025/03/01/politics/b"]
+    RunWriter()  # nothing left to replay
+    assert len(URLStore("cnn_urls.json")) == 2
@@ -0,0 +1,98 @@
+import os
+import json
+import hashlib
+
+from dataverse import DataverseUploader, STATE_SUFFIX
+from fake_dataverse import FakeDataverse, fake_state, TOKEN, DATASET
+from local_server import serve
+
+
+def _file(tmp_path, size, name="corpus.db.gz"):
+    path = tmp_path / name
+    path.write_bytes(bytes(range(256)) * (size // 256) + bytes(size % 256))
+    return str(path)
+
+
+def _md5(path):
+    with open(path, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+def _uploader(server, **kwargs):
+    return DataverseUploader(server.url, TOKEN, DATASET, backoff=0, timeout=10, **kwargs)
+
+
+def test_native_upload_when_direct_is_unavailable(tmp_path):
+    path = _file(tmp_path, 10000)
+    with serve(FakeDataverse, **fake_state(direct=False)) as server:
+        assert _uploader(server).upload_file(path)
+    assert server.datasets[DATASET] == [{"fileName": "corpus.db.gz", "md5": _md5(path)}]
+    assert [kind for _, kind in server.calls] == ["uploadurls", "add"]
+
+
+def test_single_put_direct_upload(tmp_path):
+    path = _file(tmp_path, 10000)
+    with serve(FakeDataverse, **fake_state()) as server:
+        assert _uploader(server).upload_file(path)
+    assert server.datasets[DATASET][0]["md5"] == _md5(path)
+    assert [kind for _, kind in server.calls] == ["uploadurls", "object", "add"]
+
+
+def test_multipart_upload(tmp_path):
+    path = _file(tmp_path, 10000)
+    with serve(FakeDataverse, **fake_state(part_size=4096)) as server:
+        assert _uploader(server).upload_file(path)
+    assert server.datasets[DATASET][0]["md5"] == _md5(path)
+    assert [kind for _, kind in server.calls] == ["uploadurls", "part", "part", "part", "complete", "add"]
+    assert not os.path.exists(path + STATE_SUFFIX)
+
+
+def test_retries_transient_errors(tmp_path):
+    path = _file(tmp_path, 10000)
+    with serve(FakeDataverse, **fake_state(part_size=4096)) as server:
+        server.faults.update(part=[503], add=[500, 429])
+        assert _uploader(server).upload_file(path)
+    kinds = [kind for _, kind in server.calls]
+    assert kinds.count("part") == 4
+    assert kinds.count("add") == 3
+    assert server.datasets[DATASET][0]["md5"] == _md5(path)
+
+
+def test_resume_after_interrupted_part(tmp_path):
+    path = _file(tmp_path, 10000)
+    with serve(FakeDataverse, **fake_state(part_size=4096)) as server:
+        server.faults["part"] = [None, None, 400]
+        assert not _uploader(server).upload_file(path)
+        with open(path + STATE_SUFFIX) as f:
+            assert list(json.load(f)["etags"]) == ["1", "2"]
+
+        del server.calls[:]
+        assert _uploader(server).upload_file(path)
+    assert [kind for _, kind in server.calls] == ["part", "complete", "add"]
+    assert server.datasets[DATASET][0]["md5"] == _md5(path)
+
+
+def test_resume_after_failed_registration_skips_complete(tmp_path):
+    path = _file(tmp_path, 10000)
+    with serve(FakeDataverse, **fake_state(part_size=4096)) as server:
+        server.faults["add"] = [400]
+        assert not _uploader(server).upload_file(path)
+        with open(path + STATE_SUFFIX) as f:
+            assert json.load(f)["completed"]
+
+        del server.calls[:]
+        assert _uploader(server).upload_file(path)
+    assert [kind for _, kind in server.calls] == ["add"]
+    assert server.datasets[DATASET] == [{"fileName": "corpus.db.gz", "md5": _md5(path)}]
+    assert not os.path.exists(path + STATE_SUFFIX)
+
+
+def test_completed_state_survives_url_expiry(tmp_path):
+    path = _file(tmp_path, 10000)
+    with serve(FakeDataverse, **fake_state(part_size=4096)) as server:
+        server.faults["add"] = [400]
+        assert not _uploader(server).upload_file(path)
+
+        del server.calls[:]
+        assert _uploader(server, url_expiration=-1).upload_file(path)
+    assert [kind for _, kind in server.calls] == ["add"]
@@ -0,0 +1,59 @@
+import os
+import re
+
+import pytest
+
+import fast_feed
+from fast_feed import check, parse_entries, iter_entries, Unsupported, _feed_files, _read
+from fetcher import parse_feed
+
+FEEDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "feeds")
+
+# Feeds the fast path must leave to feedparser
+FEEDPARSER_ONLY = {"rss_relative_link.xml", "rss_missing_link.xml", "malformed.xml",
+                   "internal_entity.xml", "external_entity.xml", "not_a_feed.xml"}
+
+XXE_FEED = """<?xml version="1.0" encoding="{encoding}"?>
+<!DOCTYPE rss [<!ENTITY xxe SYSTEM "file://{path}">]>
+<rss version="2.0"><channel><title>t</title><link>https://www.example.com/</link><description>d</description>
+<item><title>Leak: &xxe;</title><link>https://www.example.com/2025/03/01/xxe</link></item>
+</channel></rss>
+"""
+
+
+def _bodies():
+    return [(os.path.basename(path), _read(path)) for path in _feed_files([FEEDS])]
+
+
+def test_corpus_matches_feedparser():
+    assert check(_bodies()) == 0
+
+
+def test_corpus_fast_path_coverage():
+    fast = {name for name, body in _bodies() if parse_entries(body) is not None}
+    assert fast == {name for name, _ in _bodies()} - FEEDPARSER_ONLY
+
+
+@pytest.fixture
+def secret(tmp_path):
+    path = tmp_path / "secret.txt"
+    path.write_text("TOPSECRET")
+    return str(path)
+
+
+def test_external_entity_goes_to_feedparser_unresolved(secret):
+    body = XXE_FEED.format(encoding="UTF-8", path=secret).encode()
+    assert parse_entries(body) is None
+    parsed = parse_feed(body)
+    assert parsed.parser == "feedparser"
+    assert "TOPSECRET" not in repr(parsed.entries)
+
+
+@pytest.mark.skipif(not fast_feed.LXML, reason="needs lxml")
+def test_entity_declarations_are_rejected_by_the_parser_too(secret, monkeypatch):
+    # Without the byte scan (as for a UTF-16 feed) the parser still refuses
+    monkeypatch.setattr(fast_feed, "ENTITY_DECLARATION", re.compile(rb"(?!)"))
+    for encoding, codec in (("UTF-8", "utf-8"), ("UTF-16", "utf-16")):
+        body = XXE_FEED.format(encoding=encoding, path=secret).encode(codec)
+        with pytest.raises(Unsupported):
+            list(iter_entries(body))
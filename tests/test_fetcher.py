@@ -0,0 +1,159 @@
+import socket
+import threading
+import ipaddress
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import collect
+from fetcher import FeedFetcher, ValidatorCache, PHASES, parse_feed
+from fake_feeds import FakeFeeds, feeds_state, feed_body, etag, LAST_MODIFIED
+from local_server import serve
+from sources import Source
+from url_store import read_urls
+
+
+class Hello(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "5")
+        self.end_headers()
+        self.wfile.write(b"hello")
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Host names passed to getaddrinfo (numeric addresses need no lookup)"""
+    hosts = []
+    getaddrinfo = socket.getaddrinfo
+
+    def counting(host, *args, **kwargs):
+        try:
+            ipaddress.ip_address(host)
+        except ValueError:
+            hosts.append(host)
+        return getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", counting)
+    return hosts
+
+
+def test_one_timed_lookup_per_connection(lookups):
+    with serve(Hello) as server:
+        url = server.url.replace("127.0.0.1", "localhost")
+        result = FeedFetcher(parse_workers=0).fetch(url + "/feed")
+    assert result.status == 200 and result.body == b"hello"
+    assert lookups == ["localhost"]
+    assert set(result.timings) == {"queued"} | set(PHASES)
+    assert result.timings["dns"] > 0 and result.timings["connect"] >= 0
+
+
+def test_failed_lookup_is_timed_and_reported(lookups):
+    result = FeedFetcher(parse_workers=0).fetch("http://feed.invalid/rss")
+    assert result.status is None and result.error
+    assert lookups == ["feed.invalid"]
+    assert result.timings["dns"] > 0
+
+
+@pytest.fixture
+def feeds():
+    state = feeds_state({"/rss": feed_body("rss_cdata.xml"), "/atom": feed_body("atom.xml"),
+                         "/broken": feed_body("malformed.xml")})
+    with serve(FakeFeeds, **state) as server:
+        yield server
+
+
+def test_unchanged_feed_costs_a_304(feeds, tmp_path):
+    path = str(tmp_path / "feed_cache.json")
+    url = feeds.url + "/rss"
+    first = FeedFetcher(parse_workers=0, cache=ValidatorCache(path))
+    result = first.fetch(url)
+    assert result.status == 200 and not result.unchanged
+    assert set(result.timings) == {"queued"} | set(PHASES)
+    first.cache.save()
+
+    cache = ValidatorCache(path)
+    result = FeedFetcher(parse_workers=0, cache=cache).fetch(url)
+    assert result.status == 304 and result.unchanged and result.body is None
+    assert feeds.requests[-1] == ("/rss", etag(feed_body("rss_cdata.xml")), LAST_MODIFIED)
+    assert (cache.not_modified, cache.bytes_saved) == (1, len(feed_body("rss_cdata.xml")))
+
+    # A new version is fetched and parsed again
+    feeds.feeds["/rss"] = feed_body("rss_guid_permalink.xml")
+    results, parsed = FeedFetcher(parse_workers=0, cache=cache).fetch_and_parse([url])
+    assert results[url].status == 200 and not results[url].unchanged
+    assert url in parsed
+
+
+def test_same_body_without_validators_is_not_parsed(feeds, tmp_path):
+    feeds.validators = False
+    fetcher = FeedFetcher(parse_workers=0, cache=ValidatorCache(str(tmp_path / "feed_cache.json")))
+    url = feeds.url + "/atom"
+    assert not fetcher.fetch(url).unchanged
+    results, parsed = fetcher.fetch_and_parse([url])
+    assert results[url].status == 200 and results[url].unchanged
+    assert parsed == {} and fetcher.cache.unchanged_bodies == 1
+    assert feeds.requests[-1] == ("/atom", None, None)
+
+
+def test_missing_feed_is_an_error_result(feeds):
+    url = feeds.url + "/gone"
+    results, parsed = FeedFetcher(parse_workers=0).fetch_and_parse([url])
+    assert results[url].status == 404 and results[url].body is None
+    assert "404" in results[url].error
+    assert parsed == {}
+
+
+def test_malformed_feed_falls_back_to_feedparser(feeds):
+    url = feeds.url + "/broken"
+    _, parsed = FeedFetcher(parse_workers=0).fetch_and_parse([url])
+    assert parsed[url].parser == "feedparser" and parsed[url].bozo
+    expected = parse_feed(feed_body("malformed.xml")).entries
+    assert [e["link"] for e in parsed[url].entries] == [e["link"] for e in expected]
+
+
+@pytest.mark.parametrize("skip_bozo, links", [(True, 3), (False, 5)])
+def test_collect_against_feed_server(feeds, tmp_path, capsys, skip_bozo, links):
+    source = Source("fake", [feeds.url + path for path in ("/rss", "/broken", "/gone")], skip_bozo=skip_bozo)
+    fetcher = FeedFetcher(parse_workers=0, cache=ValidatorCache(str(tmp_path / "feed_cache.json")))
+    assert collect.collect([source], fetcher, root=str(tmp_path)) == {"fake": links}
+    assert len(read_urls(str(tmp_path / "fake_urls.json"))) == links
+    out = capsys.readouterr().out
+    assert f"Error processing feed {feeds.url}/gone" in out
+    assert ("Failed to parse feed" in out) == skip_bozo
+
+    # The next run is answered with 304s (the skipped bozo feed too) and adds nothing
+    assert collect.collect([source], fetcher, root=str(tmp_path)) == {"fake": 0}
+    assert fetcher.cache.not_modified == 2
+
+
+def test_other_urllib3_users_are_left_alone(lookups):
+    import urllib3
+    from urllib3.util import connection
+    assert connection.create_connection.__module__ == "urllib3.util.connection"
+    with serve(Hello) as server:
+        url = server.url.replace("127.0.0.1", "localhost")
+        FeedFetcher(parse_workers=0)
+        assert urllib3.PoolManager().request("GET", url + "/feed").data == b"hello"
+
+
+class _IPv6Server(ThreadingHTTPServer):
+    address_family = socket.AF_INET6
+
+
+def test_ipv6_addresses_connect_with_the_full_sockaddr(lookups):
+    try:
+        server = _IPv6Server(("::1", 0), Hello)
+    except OSError:
+        pytest.skip("no IPv6 loopback")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        result = FeedFetcher(parse_workers=0).fetch(f"http://[::1]:{server.server_address[1]}/feed")
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert result.status == 200 and result.body == b"hello"
@@ -0,0 +1,16 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from feed_entries import timestamp
+from metrics import prune, read_metrics
+
+
+def test_prune_drops_old_runs(tmp_path):
+    path = tmp_path / "collect_metrics.ndjson"
+    now = datetime.now(timezone.utc)
+    runs = [timestamp(now - timedelta(days=days)) for days in (100, 91, 5, 0)]
+    path.write_text("".join(json.dumps({"run": run, "source": "cnn"}) + "\n" for run in runs) + "\n")
+
+    assert prune(str(path), keep_days=90) == 2
+    assert [record["run"] for record in read_metrics(str(path))] == runs[2:]
+    assert prune(str(tmp_path / "missing.ndjson"), keep_days=90) == 0
@@ -0,0 +1,97 @@
+import os
+import json
+
+import pytest
+
+import collect
+from collect import replay, scratch_stores
+from feed_archive import FeedArchive, ArchiveFetcher
+from fetcher import FetchResult
+from sources import SOURCES
+
+FEEDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "feeds")
+RUN = "2025-03-01T12:00:00+00:00"
+CNN = SOURCES["cnn"]
+
+
+def _body(name):
+    with open(os.path.join(FEEDS, name), "rb") as f:
+        return f.read()
+
+
+def _manifest(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _snapshot(path):
+    """Contents of every file in a directory, to show it was left alone"""
+    contents = {}
+    for name in sorted(os.listdir(path)):
+        if os.path.isfile(os.path.join(path, name)):
+            with open(os.path.join(path, name), "rb") as f:
+                contents[name] = f.read()
+    return contents
+
+
+@pytest.fixture
+def live(tmp_path, monkeypatch):
+    """A collector directory whose one archived run has already been collected"""
+    monkeypatch.chdir(tmp_path)
+    archive = FeedArchive("feed_archive")
+    archive.add(RUN, "cnn", FetchResult(CNN.feeds[0], CNN.feeds[0], 200, {}, _body("rss_cdata.xml"), None, 0.0))
+    archive.commit()
+    collect.collect([CNN], ArchiveFetcher(archive, RUN, parse_workers=0), seen=RUN)
+    yield archive
+    archive.close()
+
+
+def test_replay_defaults_to_a_scratch_copy(live, tmp_path):
+    before = _snapshot(tmp_path)
+    scratch = scratch_stores([CNN], str(tmp_path / "scratch"))
+    assert replay([CNN], live, "latest", parse_workers=0, root=scratch) == {"cnn": 0}
+    assert _snapshot(tmp_path) == before
+
+    records = _manifest(os.path.join(scratch, "collect_runs.ndjson"))
+    assert records[-1]["run"].startswith("replay@") and records[-1]["run"].endswith(RUN)
+    assert records[-1]["seen"] == RUN
+    assert records[-1]["sources"]["cnn"]["total"] == 3
+
+
+def test_committed_replays_are_recorded(live):
+    replay([CNN], live, "latest", parse_workers=0)
+    replay([CNN], live, "all", parse_workers=0)
+    runs = [record["run"] for record in _manifest("collect_runs.ndjson")]
+    assert runs[0] == RUN
+    assert len(runs) == 3 and all(run.startswith("replay@") for run in runs[1:])
+
+
+def test_cli_replay_leaves_live_state_alone(live, tmp_path, capsys):
+    before = _snapshot(tmp_path)
+    collect.main(["cnn", "--replay", "latest", "--replay-dir", "out", "--parse-workers", "0"])
+    assert _snapshot(tmp_path) == before
+    assert "live stores are unchanged" in capsys.readouterr().out
+    assert os.path.exists(os.path.join("out", "feed_entries.db"))
+    assert _manifest(os.path.join("out", "collect_runs.ndjson"))[-1]["seen"] == RUN
+
+    collect.main(["cnn", "--replay", "latest", "--commit", "--parse-workers", "0", "--no-entries"])
+    assert _manifest("collect_runs.ndjson")[-1]["run"].startswith("replay@")
+
+
+def test_prune_keeps_bodies_still_in_use(tmp_path):
+    archive = FeedArchive(str(tmp_path / "feed_archive"))
+    old, new = "2020-01-01T00:00:00+00:00", "2999-01-01T00:00:00+00:00"
+    shared, dropped = _body("atom.xml"), _body("rdf.xml")
+    archive.add(old, "cnn", FetchResult("https://a.example/feed", "https://a.example/feed", 200, {}, shared, None, 0.0))
+    archive.add(old, "cnn", FetchResult("https://b.example/feed", "https://b.example/feed", 200, {}, dropped, None, 0.0))
+    archive.add(new, "cnn", FetchResult("https://a.example/feed", "https://a.example/feed", 200, {}, shared, None, 0.0))
+    archive.commit()
+
+    runs, bodies, freed = archive.prune(keep_days=30)
+    assert (runs, bodies) == (1, 1) and freed > 0
+    assert [run for run, _, _ in archive.runs()] == [new]
+    sha256 = archive.snapshots(new)["https://a.example/feed"][4]
+    assert archive.body(sha256) == shared
+    objects = [name for _, _, names in os.walk(tmp_path / "feed_archive" / "objects") for name in names]
+    assert len(objects) == 1
+    archive.close()
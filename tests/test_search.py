@@ -0,0 +1,93 @@
+import pytest
+
+import search_cache
+from search_cache import SearchCache, SearchScheduler, quota_day, quota_error
+from usat_downloader import ArticleFinder
+from fake_search import FakeSearch, search_state, google_error, KEY, CX
+from local_server import serve
+
+QUERY = "site:usatoday.com storm hits coast"
+
+
+@pytest.fixture
+def finder_for(tmp_path):
+    finders = []
+
+    def make(server, **kwargs):
+        kwargs.setdefault("daily_quota", 100)
+        finder = ArticleFinder(KEY, CX, output_dir=str(tmp_path / "html_cache"),
+                               search_cache_file=str(tmp_path / "search_cache.db"),
+                               search_url=server.url + "/customsearch/v1", backoff=0, **kwargs)
+        finders.append(finder)
+        return finder
+
+    yield make
+    for finder in finders:
+        finder.search_cache.close()
+
+
+def test_quota_error_reads_structured_reasons():
+    assert quota_error(google_error(403, "dailyLimitExceeded")[1]) == "daily"
+    assert quota_error(google_error(403, "quotaExceeded")[1]) == "daily"
+    assert quota_error(google_error(429, api_status="RESOURCE_EXHAUSTED",
+                                    quota_limit="DefaultPerDayPerProject")[1]) == "daily"
+    assert quota_error(google_error(403, "rateLimitExceeded")[1]) == "rate"
+    assert quota_error(google_error(429, api_status="RESOURCE_EXHAUSTED")[1]) == "rate"
+    # A bad key mentioning "limit" in its message is not a quota problem
+    assert quota_error({"error": {"code": 403, "message": "API key limit: key invalid",
+                                  "errors": [{"reason": "keyInvalid"}]}}) is None
+    assert quota_error("quota exceeded") is None
+
+
+def test_scheduler_paces_remaining_quota_until_reset(tmp_path, monkeypatch):
+    cache = SearchCache(str(tmp_path / "search_cache.db"))
+    try:
+        monkeypatch.setattr(search_cache, "seconds_until_reset", lambda now=None: 3600.0)
+        scheduler = SearchScheduler(cache, daily_quota=10000, burst=5)
+        # A full budget with an hour left is spent within that hour, not at 10000/day
+        assert scheduler.bucket.rate == pytest.approx(10000 / 3600)
+
+        cache.set_calls(quota_day(), 9000)
+        scheduler.acquire()
+        assert scheduler.bucket.rate == pytest.approx(999 / 3600)
+        assert scheduler.remaining() == 999
+    finally:
+        cache.close()
+
+
+def test_search_found_and_cached(finder_for):
+    with serve(FakeSearch, **search_state({QUERY: [("https://www.usatoday.com/story/1/", "Storm")]})) as server:
+        finder = finder_for(server)
+        assert finder.search_for_article("storm hits coast") == ("https://www.usatoday.com/story/1/", "Storm")
+        assert finder.search_for_article("storm hits coast") == ("https://www.usatoday.com/story/1/", "Storm")
+        assert finder.search_for_article("nothing here") == (None, None)
+        assert finder.search_for_article("nothing here") == (None, None)
+    assert server.queries == [QUERY, "site:usatoday.com nothing here"]
+    assert finder.cached_search_count == 2
+
+
+def test_daily_quota_error_exhausts_budget(finder_for):
+    with serve(FakeSearch, **search_state()) as server:
+        server.faults.append(google_error(403, "dailyLimitExceeded", "PERMISSION_DENIED"))
+        finder = finder_for(server, max_retries=0)
+        assert finder.search_for_article("storm hits coast") == (None, None)
+    assert finder.scheduler.remaining() == 0
+
+
+def test_rate_limit_error_is_retried(finder_for):
+    with serve(FakeSearch, **search_state({QUERY: [("https://www.usatoday.com/story/1/", "Storm")]})) as server:
+        server.faults.append(google_error(403, "rateLimitExceeded"))
+        server.faults.append(google_error(429, api_status="RESOURCE_EXHAUSTED"))
+        finder = finder_for(server)
+        assert finder.search_for_article("storm hits coast")[0] == "https://www.usatoday.com/story/1/"
+    assert len(server.queries) == 3
+    assert finder.scheduler.remaining() == 97
+
+
+def test_forbidden_without_quota_reason_keeps_budget(finder_for):
+    with serve(FakeSearch, **search_state()) as server:
+        server.faults.append(google_error(403, "accessNotConfigured", "PERMISSION_DENIED"))
+        finder = finder_for(server)
+        assert finder.search_for_article("storm hits coast") == (None, None)
+    assert len(server.queries) == 1
+    assert finder.scheduler.remaining() == 99
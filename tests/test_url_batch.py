@@ -0,0 +1,32 @@
+import os
+import glob
+import json
+
+from url_batch import check
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Links where the fast paths must defer to the per-URL functions
+EDGE_CASES = [
+    "https://www.cnn.com/a/../b/story?x=1",
+    "https://www.cnn.com//2025/03/01/story",
+    "https://www.cnn.com/2025/03/01/story;jsessionid=1?x=1#top",
+    "HTTPS://WWW.CNN.COM/Story?utm_source=rss",
+    "ftp://example.com/file?x",
+    "/relative/path?x=1",
+    "https://rssfeeds.usatoday.com/~/1/usatoday-newstopstories~storm-hits-coast/",
+    "https://rssfeeds.usatoday.com/usatodaycomnation-topstories~flood-warning/usatoday-news~later-section/",
+    "https://www.example.com/~not-a-slug",
+]
+
+
+def test_batch_functions_match_on_committed_url_files(capsys):
+    paths = sorted(glob.glob(os.path.join(ROOT, "*_urls.json")))
+    assert paths
+    assert check(paths) == 0
+
+
+def test_batch_functions_match_on_edge_cases(tmp_path):
+    path = tmp_path / "edge_urls.json"
+    path.write_text(json.dumps(EDGE_CASES))
+    assert check([str(path)]) == 0
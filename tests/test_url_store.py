@@ -0,0 +1,103 @@
+import os
+import json
+
+from url_store import URLStore, RunWriter, read_urls, INDEX_FORMAT
+
+
+def _store(tmp_path, urls=()):
+    path = tmp_path / "cnn_urls.json"
+    if not path.exists():
+        path.write_text(json.dumps(list(urls)))
+    return URLStore(str(path))
+
+
+def _commit(tmp_path, run, *urls):
+    store = _store(tmp_path)
+    for url in urls:
+        store.add(url)
+    RunWriter(str(tmp_path)).commit(run, {"cnn": store})
+    return store
+
+
+def test_sidecar_stays_the_same_size(tmp_path):
+    _store(tmp_path, ["https://www.cnn.com/a"])
+    sizes = set()
+    for n in range(20):
+        _commit(tmp_path, f"2025-03-01T{n:02d}:00:00+00:00", f"https://www.cnn.com/{n}")
+        sizes.add(os.path.getsize(tmp_path / "cnn_urls.idx.json"))
+    assert max(sizes) < 100  # three numbers, however many runs
+    store = _store(tmp_path)
+    assert [count for _, count, _ in store.runs()] == [1] * 20
+    offset = store.runs()[5][0]
+    assert store.urls_since(offset)[0] == "https://www.cnn.com/5"
+    assert len(read_urls(str(tmp_path / "cnn_urls.json"))) == 21
+
+
+def test_interrupted_run_leaves_no_run_record(tmp_path):
+    _commit(tmp_path, "2025-03-01T00:00:00+00:00", "https://www.cnn.com/a")
+    store = _store(tmp_path)
+    store.add("https://www.cnn.com/b")
+    store.prepare()  # dies before the commit
+    assert len(_store(tmp_path).runs()) == 1
+
+    store = _commit(tmp_path, "2025-03-01T01:00:00+00:00", "https://www.cnn.com/c")
+    assert [count for _, count, _ in store.runs()] == [1, 1]
+    assert store.urls == ["https://www.cnn.com/a", "https://www.cnn.com/c"]
+
+
+def test_format_1_sidecar_moves_runs_to_the_run_log(tmp_path):
+    line = json.dumps("https://www.cnn.com/a") + "\n"
+    (tmp_path / "cnn_urls.ndjson").write_text(line)
+    runs = [[0, 1, "2025-03-01T00:00:00+00:00"]]
+    (tmp_path / "cnn_urls.idx.json").write_text(json.dumps({"format": 1, "size": len(line), "count": 1,
+                                                              "runs": runs}))
+    store = _store(tmp_path)
+    assert store.runs() == runs
+    index = json.loads((tmp_path / "cnn_urls.idx.json").read_text())
+    assert index["format"] == INDEX_FORMAT and "runs" not in index
+
+
+def test_compact_clears_the_run_log(tmp_path):
+    _commit(tmp_path, "2025-03-01T00:00:00+00:00", "https://www.cnn.com/a")
+    store = _store(tmp_path)
+    store.compact()
+    assert store.runs() == [] and _store(tmp_path).runs() == []
+    assert _store(tmp_path).urls == ["https://www.cnn.com/a"]
+
+
+def _counting_key(calls, version=1):
+    def canonical_url(url):
+        calls.append(url)
+        return url.rstrip("/")
+    canonical_url.version = version
+    return canonical_url
+
+
+def test_keys_are_persisted_with_the_log(tmp_path):
+    path = str(tmp_path / "cnn_urls.json")
+    (tmp_path / "cnn_urls.json").write_text(json.dumps(["https://www.cnn.com/a", "https://www.cnn.com/b/"]))
+    calls = []
+    store = URLStore(path, key=_counting_key(calls))
+    assert len(calls) == 2
+    assert store.add("https://www.cnn.com/c") and not store.add("https://www.cnn.com/c/")
+    RunWriter(str(tmp_path)).commit("2025-03-01T00:00:00+00:00", {"cnn": store})
+
+    calls.clear()
+    store = URLStore(path, key=_counting_key(calls))
+    assert calls == []
+    assert "https://www.cnn.com/b" in store and "https://www.cnn.com/c/" in store
+    assert os.path.getsize(tmp_path / "cnn_urls.keys") == 3 * 8
+
+    # URLs appended without a key are keyed on the next load, and only those
+    plain = URLStore(path)
+    plain.add("https://www.cnn.com/d")
+    plain.save()
+    calls.clear()
+    store = URLStore(path, key=_counting_key(calls))
+    assert calls == ["https://www.cnn.com/d"]
+    assert not store.add("https://www.cnn.com/d/")
+
+    # A new key version rebuilds them
+    calls.clear()
+    URLStore(path, key=_counting_key(calls, version=2))
+    assert len(calls) == 4
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from usat_downloader import ArticleFinder, main
+from fake_search import FakeSearch, search_state, KEY, CX
+from local_server import serve
+
+RSS_URL = "https://rssfeeds.usatoday.com/~/1/usatoday-newstopstories~storm-{}-hits-coast/"
+ARTICLE_URL = "https://www.usatoday.com/story/news/2025/03/0{}/storm/"
+PAGE = ("<html><head><title>Storm {0}</title></head><body><article><h1>Storm {0}</h1>"
+        "<p>The storm hit the coast on Monday, flooding streets and closing schools across the county.</p>"
+        "<p>Officials said the water would recede by the end of the week.</p></article></body></html>")
+
+
+@pytest.fixture
+def finder(tmp_path):
+    state = search_state({f"site:usatoday.com storm {n} hits coast": [(ARTICLE_URL.format(n), f"Storm {n}")]
+                          for n in range(1, 5)})
+    with serve(FakeSearch, **state) as server:
+        finder = ArticleFinder(KEY, CX, output_dir=str(tmp_path / "html_cache"),
+                               search_cache_file=str(tmp_path / "search_cache.db"),
+                               search_url=server.url + "/customsearch/v1", backoff=0)
+        for n in range(1, 5):
+            finder.cache.put(ARTICLE_URL.format(n), PAGE.format(n))
+        yield finder
+        finder.search_cache.close()
+
+
+def _result(n, success=True):
+    return json.dumps({"original_rss_url": RSS_URL.format(n), "success": success}) + "\n"
+
+
+def test_checkpoint_skips_corrupt_lines_and_rewrites_file(finder, tmp_path):
+    results = tmp_path / "results.jsonl"
+    good = _result(1) + _result(2, success=False) + _result(3)
+    results.write_text(_result(1) + "{not json\n" + _result(2, success=False) + "[1, 2]\n" + _result(3) + '{"torn')
+
+    done, size = finder._read_checkpoint(str(results))
+    assert done == {RSS_URL.format(1), RSS_URL.format(3)}
+    assert results.read_text() == good
+    assert size == len(good)
+
+
+def test_resume_keeps_results_after_a_corrupt_line(finder, tmp_path):
+    results = tmp_path / "results.jsonl"
+    results.write_text(_result(1) + "{not json\n" + _result(2))
+
+    df = finder.process_rss_urls([RSS_URL.format(n) for n in range(1, 5)], results_file=str(results),
+                                 resume=True, search_workers=2, download_workers=2, parse_workers=1,
+                                 csv_file=str(tmp_path / "summary.csv"))
+    lines = [json.loads(line) for line in results.read_text().splitlines()]
+    assert [line["original_rss_url"] for line in lines[:2]] == [RSS_URL.format(1), RSS_URL.format(2)]
+    assert sorted(line["original_rss_url"] for line in lines[2:]) == [RSS_URL.format(3), RSS_URL.format(4)]
+    assert df["success"].all() and len(df) == 4
+    assert (tmp_path / "summary.csv").exists()
+    assert (tmp_path / "results.manifest.json").exists()
+
+
+def test_main_reports_an_empty_run(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "usat_urls.json").write_text(json.dumps([RSS_URL.format(1)]))
+    main(["usat_urls.json", "--start", "1", "--api-key", KEY, "--cx", CX])
+    out = capsys.readouterr().out
+    assert "Total URLs processed: 0" in out and "Successfully retrieved: 0" in out
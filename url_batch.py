@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+URL Batch
+List-at-a-time versions of the per-URL helpers that show up in hot loops when
+historical URL lists are reprocessed:
+
+    normalize_links(links, rule)  -- the sources.py normalizers (strip_query / keep_query)
+    extract_slugs(urls)           -- extract_slug, used by ArticleFinder in agg/usat_downloader.py
+
+Slug extraction folds the two slug patterns into one precompiled alternation
+that is only run on URLs containing "usatoday". strip_query takes a
+precompiled fast path for ordinary http(s) URLs and only calls urljoin/urlparse
+for links where those do more than cut the query (dot segments, doubled
+slashes, ;params, unusual schemes or hosts). The results are identical to the per-URL
+functions, which --check verifies over URL files:
+
+    python url_batch.py --check                  # every *_urls.json here
+    python url_batch.py --check cnn_urls.json
+"""
+
+import re
+import sys
+import json
+import glob
+import argparse
+
+from sources import NORMALIZERS, strip_query
+
+# Both extract_slug patterns in one regex; the section pattern
+# takes precedence, so a topstories match is re-checked for a later section one
+SECTION_PATTERN = r'usatoday-\w+~(?P<section>.*?)(?:/|$)'
+SLUG_PATTERN = re.compile(SECTION_PATTERN + r'|usatodaycom\w+-topstories~(?P<topstories>.*?)(?:/|$)')
+SECTION_SLUG = re.compile(SECTION_PATTERN)
+
+# An http(s) URL whose path can be cut from the query without urljoin's help
+STRIP_QUERY_FAST = re.compile(
+    r"(https?://[A-Za-z0-9.:@_~%!$&'()*+,=-]*)(/[^?#;\t\r\n]*)(?:[?#].*)?", re.DOTALL)
+UNSAFE_PATH = re.compile(r'//|/\.\.?(?:/|$)')
+
+
+def _strip_query_batch(links):
+    normalized = []
+    append = normalized.append
+    fast = STRIP_QUERY_FAST.fullmatch
+    unsafe = UNSAFE_PATH.search
+    for link in links:
+        match = fast(link)
+        if match is None or unsafe(match.group(2)):
+            append(strip_query(link))
+        else:
+            append(match.group(1) + match.group(2))
+    return normalized
+
+
+def normalize_links(links, rule="strip_query"):
+    """
+    Normalize a list of feed links with one of the sources.py rules
+
+    Args:
+        links: Iterable of link strings
+        rule: Normalizer name (a key of sources.NORMALIZERS)
+
+    Returns:
+        List of normalized links, in order
+    """
+    if rule == "strip_query":
+        return _strip_query_batch(links)
+    normalize = NORMALIZERS[rule]
+    return [normalize(link) for link in links]
+
+
+def extract_slug(url):
+    """
+    Extract the article slug from an RSS feed URL
+
+    Returns:
+        (slug, search_term), or (None, None) if no slug was found
+    """
+    # Pattern for specific sections (newstopstories, techtopstories, etc.)
+    match = re.search(r'usatoday-(\w+)~(.*?)(?:/|$)', url)
+    if match:
+        slug = match.group(2)
+        return slug, slug.replace('-', ' ')
+
+    # Pattern for nation-topstories format
+    match = re.search(r'usatodaycom(\w+)-topstories~(.*?)(?:/|$)', url)
+    if match:
+        slug = match.group(2)
+        return slug, slug.replace('-', ' ')
+
+    # Last resort: the last segment of the URL path, if it looks like a slug (contains dashes)
+    last_segment = url.rstrip('/').split('/')[-1]
+    if '-' in last_segment and not last_segment.startswith('~'):
+        return last_segment, last_segment.replace('-', ' ')
+
+    return None, None
+
+
+def extract_slugs(urls):
+    """
+    Extract (slug, search_term) from a list of RSS URLs
+
+    Returns:
+        List of (slug, search_term) tuples, (None, None) where no slug was found
+    """
+    slugs = []
+    append = slugs.append
+    search_slug = SLUG_PATTERN.search
+    for url in urls:
+        match = search_slug(url) if 'usatoday' in url else None
+        if match is not None:
+            slug = match.group('section')
+            if slug is None:
+                section = SECTION_SLUG.search(url, match.start() + 1)
+                slug = section.group('section') if section else match.group('topstories')
+            append((slug, slug.replace('-', ' ')))
+            continue
+
+        # Last resort: the last segment of the URL path, if it looks like a slug
+        last_segment = url.rstrip('/').rpartition('/')[2]
+        if '-' in last_segment and not last_segment.startswith('~'):
+            append((last_segment, last_segment.replace('-', ' ')))
+        else:
+            append((None, None))
+    return slugs
+
+
+def check(paths):
+    """
+    Compare the batch functions with the per-URL ones over URL files
+
+    Returns:
+        Number of mismatches
+    """
+    mismatches = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            urls = json.load(f)
+        checks = [(f"normalize_links[{rule}]", normalize_links(urls, rule), map(normalize, urls))
+                  for rule, normalize in NORMALIZERS.items()]
+        checks.append(("extract_slugs", extract_slugs(urls), map(extract_slug, urls)))
+        for name, batch, reference in checks:
+            bad = [(url, got, want) for url, got, want in zip(urls, batch, reference) if got != want]
+            mismatches += len(bad)
+            print(f"{path}: {name}: {len(urls) - len(bad)}/{len(urls)} identical")
+            for url, got, want in bad[:5]:
+                print(f"    {url!r}: got {got!r}, expected {want!r}")
+    return mismatches
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Batch URL normalization and slug extraction.')
+    parser.add_argument('paths', nargs='*', help='URL files (JSON lists; default: *_urls.json)')
+    parser.add_argument('--check', action='store_true',
+                        help='Verify the batch functions against the per-URL ones')
+    parser.add_argument('--rule', default='strip_query', choices=sorted(NORMALIZERS),
+                        help='Normalization rule for output (default: strip_query)')
+
+    args = parser.parse_args()
+    paths = args.paths or sorted(glob.glob("*_urls.json"))
+    if args.check:
+        sys.exit(1 if check(paths) else 0)
+
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for link in normalize_links(json.load(f), args.rule):
+                print(link)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+URL Pack
+Compact binary format for a URL history (cnn_urls.urlpack).
+
+The committed history of a source is its append-only log (cnn_urls.ndjson,
+see url_store.py); a pack is an opt-in, read-optimized copy of it for
+storage or distribution. `import` packs the current history (the log when
+there is one, else the legacy JSON array), and URLStore seeds a new log from
+a pack when a source has neither.
+
+The unique URLs are sorted and front-coded in blocks: each URL is stored as
+the length of the prefix it shares with the previous one plus the rest, and
+every block is zlib-compressed. Every restart_interval-th URL in a block is
+stored whole. The header keeps the first URL of each block, so membership is
+a binary search over the block heads, one block decompression, a binary
+search over its restart points and at most restart_interval prefix
+expansions; iteration streams the file a block at a time. A column of
+sort ranks records the original order, so a pack exports back to exactly the
+history it was built from.
+
+    python url_pack.py import cnn_urls.json --verify    # cnn_urls.ndjson -> cnn_urls.urlpack
+    python url_pack.py export cnn_urls.urlpack          # -> cnn_urls.json
+    python url_pack.py contains cnn_urls.urlpack https://www.cnn.com/...
+    python url_pack.py info cnn_urls.urlpack
+"""
+
+import os
+import sys
+import json
+import zlib
+import struct
+import bisect
+import argparse
+from array import array
+
+MAGIC = b"URLPACK\x01"
+FORMAT = 1
+SEPARATOR = "\x00"
+MAX_SHARED = 0xFFFF
+RESTART_INTERVAL = 16
+ORDER_TYPECODES = "BHI"
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _shared_prefix(a, b):
+    n = min(len(a), len(b), MAX_SHARED)
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def pack_path_for(path):
+    """cnn_urls.json -> cnn_urls.urlpack"""
+    return (path[:-len(".json")] if path.endswith(".json") else path) + ".urlpack"
+
+
+def write_pack(urls, path, block_size=1024, restart_interval=RESTART_INTERVAL, keep_order=True, level=9):
+    """
+    Write a URL list as a pack
+
+    Args:
+        urls: Iterable of URL strings
+        path: Output file
+        block_size: URLs per front-coded block (smaller: faster lookups, larger file)
+        restart_interval: Store every n-th URL of a block whole (smaller: faster lookups)
+        keep_order: Store the original order (needed to export the JSON array as it was)
+        level: zlib compression level
+
+    Returns:
+        Size of the file in bytes
+    """
+    urls = list(urls)
+    ordered = sorted(set(urls))
+    if any(SEPARATOR in url for url in ordered):
+        raise ValueError("URLs may not contain NUL characters")
+
+    blocks = []
+    chunks = []
+    offset = 0
+    for start in range(0, len(ordered), block_size):
+        block = ordered[start:start + block_size]
+        shared = array("H")
+        suffixes = []
+        previous = ""
+        for k, url in enumerate(block):
+            n = _shared_prefix(previous, url) if k % restart_interval else 0
+            shared.append(n)
+            suffixes.append(url[n:])
+            previous = url
+        chunk = zlib.compress(_little_endian(shared) + SEPARATOR.join(suffixes).encode("utf-8"), level)
+        blocks.append([block[0], offset, len(chunk), len(block)])
+        chunks.append(chunk)
+        offset += len(chunk)
+
+    order = None
+    if keep_order:
+        typecode = next(code for code in ORDER_TYPECODES if len(ordered) <= 1 << (8 * array(code).itemsize))
+        rank = {url: i for i, url in enumerate(ordered)}
+        chunk = zlib.compress(_little_endian(array(typecode, (rank[url] for url in urls))), level)
+        order = [offset, len(chunk), typecode]
+        chunks.append(chunk)
+
+    header = {"format": FORMAT, "count": len(urls), "unique": len(ordered), "block_size": block_size,
+              "restart_interval": restart_interval, "blocks": blocks, "order": order}
+    header_bytes = zlib.compress(json.dumps(header, separators=(",", ":")).encode("utf-8"), level)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+class URLPack:
+    def __init__(self, path):
+        """
+        Open a pack written by write_pack; only the header is read up front
+
+        Args:
+            path: Pack file
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a URL pack")
+        (header_size,) = struct.unpack("<I", self._file.read(4))
+        header = json.loads(zlib.decompress(self._file.read(header_size)))
+        if header["format"] != FORMAT:
+            self._file.close()
+            raise ValueError(f"{path}: unsupported pack format {header['format']}")
+        self._data_start = len(MAGIC) + 4 + header_size
+        self.count = header["count"]
+        self.unique = header["unique"]
+        self.block_size = header["block_size"]
+        self.restart_interval = header["restart_interval"]
+        self._blocks = header["blocks"]
+        self._heads = [block[0] for block in self._blocks]
+        self._order = header["order"]
+        self._cached = (None, None)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, url):
+        i = bisect.bisect_right(self._heads, url) - 1
+        if i < 0:
+            return False
+        shared, suffixes, restarts = self._block(i)
+        start = (bisect.bisect_right(restarts, url) - 1) * self.restart_interval
+        previous = ""
+        for j in range(start, min(start + self.restart_interval, len(suffixes))):
+            previous = previous[:shared[j]] + suffixes[j]
+            if previous >= url:
+                return previous == url
+        return False
+
+    def __iter__(self):
+        """Stream the unique URLs in sorted order"""
+        for i in range(len(self._blocks)):
+            shared, suffixes = self._decode_block(i)
+            previous = ""
+            for n, suffix in zip(shared, suffixes):
+                previous = previous[:n] + suffix
+                yield previous
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def urls(self):
+        """All URLs in their original order (sorted and unique if the order was not stored)"""
+        ordered = list(self)
+        if self._order is None:
+            return ordered
+        offset, length, typecode = self._order
+        ranks = _from_little_endian(typecode, zlib.decompress(self._read(offset, length)))
+        return [ordered[rank] for rank in ranks]
+
+    def close(self):
+        self._file.close()
+
+    def _read(self, offset, length):
+        self._file.seek(self._data_start + offset)
+        return self._file.read(length)
+
+    def _decode_block(self, i):
+        """Shared-prefix lengths and suffixes of block i"""
+        _, offset, length, count = self._blocks[i]
+        data = zlib.decompress(self._read(offset, length))
+        return _from_little_endian("H", data[:2 * count]), data[2 * count:].decode("utf-8").split(SEPARATOR)
+
+    def _block(self, i):
+        """Block i with its restart URLs, keeping the last one decoded for runs of nearby lookups"""
+        if self._cached[0] != i:
+            shared, suffixes = self._decode_block(i)
+            self._cached = (i, (shared, suffixes, suffixes[::self.restart_interval]))
+        return self._cached[1]
+
+
+def from_json(json_path, path=None, **kwargs):
+    """
+    Pack the URL history of the legacy JSON path json_path (its log when there
+    is one; see url_store.read_urls) to the matching .urlpack unless path is
+    given; returns the path
+    """
+    from url_store import read_urls
+    path = path or pack_path_for(json_path)
+    write_pack(read_urls(json_path), path, **kwargs)
+    return path
+
+
+def to_json(path, json_path, indent=None):
+    """Write the URLs of a pack as a JSON array in their original order; returns the count"""
+    with URLPack(path) as pack:
+        urls = pack.urls()
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(urls, indent=indent))
+    os.replace(tmp_path, json_path)
+    return len(urls)
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Convert URL histories between JSON and the compact pack format.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Pack URL histories')
+    import_parser.add_argument('paths', nargs='+',
+                               help='Legacy JSON paths of the sources (e.g., cnn_urls.json; its .ndjson log is read when present)')
+    import_parser.add_argument('--block-size', type=int, default=1024, help="URLs per block (default: 1024)")
+    import_parser.add_argument('--restart-interval', type=int, default=RESTART_INTERVAL,
+                               help=f"Store every n-th URL of a block whole (default: {RESTART_INTERVAL})")
+    import_parser.add_argument('--no-order', action='store_true',
+                               help='Do not store the original order (smaller; exports sorted)')
+    import_parser.add_argument('--verify', action='store_true',
+                               help='Check that the pack exports back to the same array')
+
+    export_parser = subparsers.add_parser('export', help='Write packs back as JSON arrays')
+    export_parser.add_argument('paths', nargs='+', help='Pack files (e.g., cnn_urls.urlpack)')
+    export_parser.add_argument('--indent', type=int,
+                               help="Indentation (default: the source's registry setting)")
+
+    contains_parser = subparsers.add_parser('contains', help='Check whether URLs are in a pack')
+    contains_parser.add_argument('path')
+    contains_parser.add_argument('urls', nargs='+')
+
+    info_parser = subparsers.add_parser('info', help='Describe packs')
+    info_parser.add_argument('paths', nargs='+')
+
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        from url_store import read_urls, _base_path
+        for json_path in args.paths:
+            path = from_json(json_path, block_size=args.block_size, restart_interval=args.restart_interval,
+                             keep_order=not args.no_order)
+            source = _base_path(json_path) + ".ndjson"
+            source = source if os.path.exists(source) else json_path
+            print(f"Packed {source} ({os.path.getsize(source):,} bytes) "
+                  f"into {path} ({os.path.getsize(path):,} bytes)")
+            if args.verify:
+                expected = read_urls(json_path)
+                with URLPack(path) as pack:
+                    got = pack.urls() if not args.no_order else list(pack)
+                if args.no_order:
+                    expected = sorted(set(expected))
+                if got != expected:
+                    sys.exit(f"{path} does not match {json_path}")
+                print(f"Verified {len(got)} URLs")
+
+    elif args.command == 'export':
+        from sources import SOURCES
+        for path in args.paths:
+            json_path = path[:-len(".urlpack")] + ".json" if path.endswith(".urlpack") else path + ".json"
+            indent = args.indent
+            name = os.path.basename(json_path)[:-len("_urls.json")]
+            if indent is None and name in SOURCES:
+                indent = SOURCES[name].indent
+            count = to_json(path, json_path, indent=indent)
+            print(f"Exported {count} URLs to {json_path}")
+
+    elif args.command == 'contains':
+        with URLPack(args.path) as pack:
+            missing = 0
+            for url in args.urls:
+                found = url in pack
+                missing += not found
+                print(f"{'yes' if found else 'no '}  {url}")
+        sys.exit(1 if missing else 0)
+
+    else:
+        for path in args.paths:
+            with URLPack(path) as pack:
+                print(f"{path}: {pack.count} URLs ({pack.unique} unique), {len(pack._blocks)} blocks "
+                      f"of {pack.block_size}, order {'stored' if pack._order else 'not stored'}, "
+                      f"{os.path.getsize(path):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+"""
+URL Store
+Insertion-ordered URL history shared by the feed collectors.
+
+Membership is checked against a hash set built once when the history is
+loaded, so de-duplicating a run's feed items costs O(items) regardless of
+how many URLs have been collected before.
+
+The history lives in an append-only newline-delimited log next to the legacy
+JSON file (cnn_urls.json -> cnn_urls.ndjson), with a fixed-size sidecar
+(cnn_urls.idx.json) recording the committed size of the log and of an
+append-only run log (cnn_urls.runs.ndjson: the offset, URL count and time of
+each run). A run only appends to the two logs and replaces the sidecar; the
+legacy JSON array is produced on demand with `python url_store.py export`,
+and downstream tools read the current history with read_urls().
+
+A store keyed by a function of the URL (canonical.canonical_url) also keeps a
+64-bit fingerprint of each URL's key in cnn_urls.keys, appended in step with
+the log, so loading the history never recomputes the keys. The sidecar names
+the key function and version the fingerprints came from; they are rebuilt
+when it changes, and extended when the log has URLs a store opened without a
+key appended.
+
+RunWriter commits the new URLs of several stores as one unit. Every store's
+URLs are appended past its committed size and its new sidecar is written to
+a temporary file. A journal naming those files is then renamed into place;
+that rename is the commit point. The sidecars are renamed after it, and the
+run's counts are appended to a manifest (collect_runs.ndjson). A run that
+dies before the journal leaves every store as it was: the appended bytes lie
+past the committed size and are overwritten by the next run. A run that dies
+after it is completed by the next RunWriter.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from array import array
+from datetime import datetime, timezone
+
+INDEX_FORMAT = 2
+
+
+def _base_path(path):
+    return path[:-len(".json")] if path.endswith(".json") else path
+
+
+def fingerprint(key):
+    """64-bit fingerprint of a URL key, as stored in the keys file"""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _key_id(key):
+    """Name and version of a key function; bump its `version` attribute when its output changes"""
+    return f"{key.__module__}.{key.__qualname__}:{getattr(key, 'version', 0)}"
+
+
+def _fingerprint_bytes(fingerprints):
+    fingerprints = array("Q", fingerprints)
+    if sys.byteorder != "little":
+        fingerprints.byteswap()
+    return fingerprints.tobytes()
+
+
+class URLStore:
+    def __init__(self, path, indent=None, key=None):
+        """
+        Load the URL history for the legacy JSON file at path
+
+        Args:
+            path: Legacy JSON file holding the array of collected URLs
+            indent: Indentation used when the array is exported
+            key: Function mapping a URL to its identity (e.g.,
+                canonical.canonical_url); URLs with the same key are duplicates
+                and only the first one seen is kept. None compares URLs as is.
+                The keys are persisted as fingerprints (see the module doc).
+        """
+        self.path = path
+        self.indent = indent
+        self.key = key
+        base = _base_path(path)
+        self.log_path = base + ".ndjson"
+        self.index_path = base + ".idx.json"
+        self.runs_path = base + ".runs.ndjson"
+        self.keys_path = base + ".keys"
+
+        if os.path.exists(self.log_path):
+            self.urls, self.index = self._read_log()
+        else:
+            self.urls, self.index = self._bootstrap()
+        self._seen = set(self.urls) if key is None else self._load_keys()
+        self._pending = []
+        self.added = 0
+
+    def __contains__(self, url):
+        return self._identity(url) in self._seen
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __iter__(self):
+        return iter(self.urls)
+
+    def add(self, url):
+        """Append url if it has not been seen before; return True if it was new"""
+        seen = self._identity(url)
+        if seen in self._seen:
+            return False
+        self._seen.add(seen)
+        self.urls.append(url)
+        self._pending.append(url)
+        self.added += 1
+        return True
+
+    def save(self):
+        """Append this run's new URLs to the log and record the run"""
+        index = self.prepare()
+        if index is not None:
+            self.index = index
+            self._write_index()
+            self._pending = []
+
+    def prepare(self):
+        """
+        Append this run's new URLs to the log, and the run to the run log,
+        past their committed sizes without committing them
+
+        Returns:
+            The sidecar that commits them, or None if there is nothing new
+        """
+        if not self._pending:
+            return None
+        offset = self.index["size"]
+        data = "".join(json.dumps(url) + "\n" for url in self._pending).encode("utf-8")
+        _append_past(self.log_path, offset, data)
+        run = (json.dumps([offset, len(self._pending), datetime.now(timezone.utc).isoformat()]) + "\n").encode("utf-8")
+        _append_past(self.runs_path, self.index["runs_size"], run)
+        index = dict(self.index, size=offset + len(data), count=self.index["count"] + len(self._pending),
+                     runs_size=self.index["runs_size"] + len(run))
+        if self.key is not None:
+            keys = _fingerprint_bytes(fingerprint(self.key(url)) for url in self._pending)
+            _append_past(self.keys_path, self.index["keys"] * 8, keys)
+            index["keys"] += len(self._pending)
+        return index
+
+    def runs(self):
+        """The committed runs as [offset, URL count, time] lists, oldest first"""
+        try:
+            with open(self.runs_path, "rb") as f:
+                data = f.read(self.index["runs_size"])
+        except FileNotFoundError:
+            return []
+        return [json.loads(line) for line in data.splitlines()]
+
+    def urls_since(self, offset):
+        """Return the URLs appended to the log at or after byte offset"""
+        with open(self.log_path, "rb") as f:
+            f.seek(offset)
+            return self._decode(f.read(self.index["size"] - offset))
+
+    def export_json(self, path=None):
+        """Write the legacy JSON array (to self.path unless path is given)"""
+        path = path or self.path
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.urls, indent=self.indent))
+        os.replace(tmp_path, path)
+        return path
+
+    def compact(self):
+        """
+        Rewrite the log from the in-memory history and clear the run log (its
+        offsets no longer apply); the key fingerprints are rebuilt by the next
+        keyed load
+        """
+        tmp_path = self.log_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            size = self._write_urls(f, self.urls)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+        self.index = self._new_index(size, len(self.urls))
+        self._write_index()
+        if os.path.exists(self.runs_path):
+            _append_past(self.runs_path, 0, b"")
+        self._pending = []
+
+    def _identity(self, url):
+        return url if self.key is None else fingerprint(self.key(url))
+
+    def _load_keys(self):
+        """
+        Fingerprints of the keys of the history, read from the keys file
+
+        Only URLs past the fingerprints on file (or all of them, for a
+        different key function) are keyed, and their fingerprints are
+        appended to the file.
+        """
+        key_id = _key_id(self.key)
+        count = self.index.get("keys", 0) if self.index.get("key") == key_id else 0
+        fingerprints = array("Q")
+        if count:
+            try:
+                with open(self.keys_path, "rb") as f:
+                    data = f.read(count * 8)
+            except FileNotFoundError:
+                data = b""
+            if len(data) == count * 8:
+                fingerprints.frombytes(data)
+                if sys.byteorder != "little":
+                    fingerprints.byteswap()
+        missing = [fingerprint(self.key(url)) for url in self.urls[len(fingerprints):]]
+        if missing or self.index.get("key") != key_id:
+            _append_past(self.keys_path, len(fingerprints) * 8, _fingerprint_bytes(missing))
+            fingerprints.extend(missing)
+            self.index = dict(self.index, key=key_id, keys=len(fingerprints))
+            self._write_index()
+        return set(fingerprints)
+
+    def _bootstrap(self):
+        """Seed the log from the legacy JSON array (or its .urlpack) the first time a source is opened"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                urls = json.load(f)
+        except FileNotFoundError:
+            pack_path = _base_path(self.path) + ".urlpack"
+            if os.path.exists(pack_path):
+                from url_pack import URLPack
+                with URLPack(pack_path) as pack:
+                    urls = pack.urls()
+            else:
+                urls = []
+        with open(self.log_path, "wb") as f:
+            size = self._write_urls(f, urls)
+        index = self._new_index(size, len(urls))
+        self.index = index
+        self._write_index()
+        return urls, index
+
+    def _read_log(self):
+        """Read the committed part of the log, ignoring bytes from an interrupted run"""
+        data, index = _committed_log(self.log_path, self.index_path)
+        urls = self._decode(data)
+        if index is None:
+            index = self._new_index(len(data), len(urls))
+            self.index = index
+            self._write_index()
+        elif "runs" in index:
+            index = self._upgrade_index(index)
+        return urls, index
+
+    def _upgrade_index(self, index):
+        """Move the run list of a format 1 sidecar to the run log"""
+        data = "".join(json.dumps(run) + "\n" for run in index["runs"]).encode("utf-8")
+        _append_past(self.runs_path, 0, data)
+        index = self._new_index(index["size"], index["count"], runs_size=len(data))
+        self.index = index
+        self._write_index()
+        return index
+
+    def _write_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def _new_index(size, count, runs_size=0):
+        return {"format": INDEX_FORMAT, "size": size, "count": count, "runs_size": runs_size, "key": None, "keys": 0}
+
+    @staticmethod
+    def _write_urls(f, urls):
+        size = 0
+        for url in urls:
+            line = (json.dumps(url) + "\n").encode("utf-8")
+            f.write(line)
+            size += len(line)
+        return size
+
+    @staticmethod
+    def _decode(data):
+        """Decode NDJSON string lines in one pass by turning them into a JSON array"""
+        text = data.decode("utf-8").rstrip("\n")
+        if not text:
+            return []
+        return json.loads("[" + text.replace("\n", ",") + "]")
+
+
+def _committed_log(log_path, index_path):
+    """
+    The committed bytes of a log and its sidecar
+
+    Returns:
+        (data, index); index is None if the sidecar is missing or ahead of the
+        log, in which case data is every complete line
+    """
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        index = None
+
+    with open(log_path, "rb") as f:
+        data = f.read()
+    if index is not None and index["size"] <= len(data):
+        return data[:index["size"]], index
+    return data[:data.rfind(b"\n") + 1], None
+
+
+def read_urls(path):
+    """
+    Read the collected URLs for the legacy JSON path without writing anything
+
+    The committed part of the append-only log is read when there is one, so
+    the result includes the latest run even if the JSON array was never
+    exported; otherwise the JSON array (or its .urlpack) is.
+
+    Args:
+        path: Legacy JSON file of a source (e.g., cnn_urls.json)
+
+    Returns:
+        List of URLs in collection order
+    """
+    base = _base_path(path)
+    if os.path.exists(base + ".ndjson"):
+        data, _ = _committed_log(base + ".ndjson", base + ".idx.json")
+        return URLStore._decode(data)
+    if not os.path.exists(path) and os.path.exists(base + ".urlpack"):
+        from url_pack import URLPack
+        with URLPack(base + ".urlpack") as pack:
+            return pack.urls()
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _append_past(path, size, data):
+    """Write data at byte size of path, dropping anything an interrupted run left after it"""
+    with open(path, "ab") as f:
+        f.truncate(size)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _write_durably(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path or ".", os.O_RDONLY)
+    except OSError:
+        return  # directories cannot be opened on Windows
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class RunWriter:
+    def __init__(self, root=".", manifest="collect_runs.ndjson"):
+        """
+        Single writer for the URL stores of a run; completes an interrupted
+        commit left in root
+
+        Args:
+            root: Directory holding the journal (the URL stores' directory)
+            manifest: Newline-delimited JSON file receiving one record per run
+        """
+        self.root = root
+        self.journal_path = os.path.join(root, "collect_run.journal.json")
+        self.manifest_path = os.path.join(root, manifest)
+        self.recover()
+
+    def recover(self):
+        """Finish a commit whose journal was written; returns True if there was one"""
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                journal = json.load(f)
+        except FileNotFoundError:
+            return False
+        self._apply(journal)
+        return True
+
+    def commit(self, run, stores, record=None):
+        """
+        Commit the new URLs of every store at once and append the run to the manifest
+
+        Args:
+            run: Run timestamp
+            stores: Dictionary of source name to URLStore
+            record: Extra fields for the manifest record
+
+        Returns:
+            The manifest record
+        """
+        staged = []
+        for store in stores.values():
+            index = store.prepare()
+            if index is not None:
+                _write_durably(store.index_path + ".run", json.dumps(index))
+                staged.append((store, index))
+
+        record = {"run": run, **(record or {})}
+        record["sources"] = {name: dict(record.get("sources", {}).get(name, {}), new=store.added, total=len(store))
+                             for name, store in stores.items()}
+        journal = {"run": run, "indexes": [os.path.abspath(store.index_path) for store, _ in staged],
+                   "manifest": record}
+        _write_durably(self.journal_path, json.dumps(journal))
+        _fsync_dir(self.root)
+
+        self._apply(journal)
+        for store, index in staged:
+            store.index = index
+            store._pending = []
+        return record
+
+    def _apply(self, journal):
+        for path in journal["indexes"]:
+            if os.path.exists(path + ".run"):
+                os.replace(path + ".run", path)
+        self._append_manifest(journal["manifest"])
+        os.remove(self.journal_path)
+
+    def _append_manifest(self, record):
+        try:
+            with open(self.manifest_path, "rb") as f:
+                f.seek(max(0, os.path.getsize(self.manifest_path) - 65536))
+                lines = f.read().splitlines()
+            if lines and json.loads(lines[-1]).get("run") == record["run"]:
+                return  # already appended before an interruption
+        except (FileNotFoundError, ValueError):
+            pass
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def main():
+    """Export or compact URL logs from the command line."""
+    parser = argparse.ArgumentParser(description='Export or compact append-only URL logs.')
+    parser.add_argument('command', choices=['export', 'compact'],
+                        help='export: write the legacy JSON array; compact: rewrite the log')
+    parser.add_argument('sources', nargs='+', help='Source names (e.g., cnn politico)')
+    parser.add_argument('--indent', type=int,
+                        help="Indentation for exported JSON (default: the source's registry setting)")
+
+    args = parser.parse_args()
+
+    from sources import SOURCES
+
+    RunWriter()
+    for source in args.sources:
+        indent = args.indent
+        if indent is None and source.lower() in SOURCES:
+            indent = SOURCES[source.lower()].indent
+        store = URLStore(f"{source.lower()}_urls.json", indent=indent)
+        if args.command == 'export':
+            path = store.export_json()
+            print(f"Exported {len(store)} URLs to {path}")
+        else:
+            store.compact()
+            print(f"Compacted {store.log_path} ({len(store)} URLs)")
+
+
+if __name__ == "__main__":
+    main()